@@ -21,13 +21,24 @@ class Config:
     DB_NAME = os.getenv("DB_NAME", "sports_betting_db")
     DB_USER = os.getenv("DB_USER", "betting_user")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "")
-    SQLALCHEMY_DATABASE_URI = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        "DATABASE_URL",
+        f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    )
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
     
     # Redis
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
     REDIS_DB = int(os.getenv("REDIS_DB", 0))
     REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+    REDIS_CACHE_ENABLED = os.getenv("REDIS_CACHE_ENABLED", "False").lower() == "true"
+    
+    # Fetch cache TTLs (seconds) per data type
+    CACHE_TTL_LIVE_EVENTS = float(os.getenv("CACHE_TTL_LIVE_EVENTS", 15))
+    CACHE_TTL_ODDS = float(os.getenv("CACHE_TTL_ODDS", 5))
+    CACHE_TTL_HISTORICAL = float(os.getenv("CACHE_TTL_HISTORICAL", 21600))
+    CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", 1024))
     
     # API Keys
     SPORTRADAR_API_KEY = os.getenv("SPORTRADAR_API_KEY")
@@ -39,6 +50,33 @@ class Config:
     ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_QUEUED = os.getenv("LOG_QUEUED", "True").lower() == "true"
+    
+    # Models
+    MODEL_PATH = os.getenv("MODEL_PATH", str(BASE_DIR / "models" / "match_predictor.joblib"))
+    MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", str(BASE_DIR / "models" / "registry"))
+    MODEL_NAME = os.getenv("MODEL_NAME", "match_predictor")
+    MODEL_REFRESH_SECONDS = float(os.getenv("MODEL_REFRESH_SECONDS", 60))
+    
+    # Team Ratings
+    RATINGS_PATH = os.getenv("RATINGS_PATH", str(BASE_DIR / "models" / "team_ratings.npz"))
+    RATINGS_METHOD = os.getenv("RATINGS_METHOD", "elo")
+    
+    # Team Names
+    ENTITY_ALIASES_PATH = os.getenv("ENTITY_ALIASES_PATH", str(BASE_DIR / "data" / "team_aliases.json"))
+    ENTITY_FUZZY_CUTOFF = float(os.getenv("ENTITY_FUZZY_CUTOFF", 0.88))
+    
+    # Training
+    TRAINING_CV_SPLITS = int(os.getenv("TRAINING_CV_SPLITS", 5))
+    TRAINING_CV_GAP = int(os.getenv("TRAINING_CV_GAP", 0))
+    TRAINING_N_JOBS = int(os.getenv("TRAINING_N_JOBS", 0)) or None
+    
+    # Scheduler
+    BOT_DAEMON = os.getenv("BOT_DAEMON", "False").lower() == "true"
+    BOT_CYCLE_INTERVAL_SECONDS = float(os.getenv("BOT_CYCLE_INTERVAL_SECONDS", 300))
+    BOT_SPORTS = os.getenv("BOT_SPORTS", "soccer").split(",")
+    ODDS_POLL_MAX_REQUESTS_PER_MINUTE = int(os.getenv("ODDS_POLL_MAX_REQUESTS_PER_MINUTE", 60))
+    ODDS_POLL_IN_PLAY_INTERVAL = float(os.getenv("ODDS_POLL_IN_PLAY_INTERVAL", 10))
     
     # Risk Management Thresholds
     MAX_DAILY_LOSS_PERCENT = float(os.getenv("MAX_DAILY_LOSS_PERCENT", 5.0))
@@ -57,6 +95,8 @@ class Config:
     LIVE_TRADING = os.getenv("LIVE_TRADING", "False").lower() == "true"
     MIN_ODDS = float(os.getenv("MIN_ODDS", 1.50))
     MAX_ODDS = float(os.getenv("MAX_ODDS", 10.0))
+    ODDS_CACHE_TTL_SECONDS = float(os.getenv("ODDS_CACHE_TTL_SECONDS", 30.0))
+    ODDS_CACHE_MAX_SELECTIONS = int(os.getenv("ODDS_CACHE_MAX_SELECTIONS", 50000))
     
     # Compliance
     REGION = os.getenv("REGION", "EU")
@@ -81,6 +121,8 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     DB_NAME = "sports_betting_test_db"
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    REDIS_CACHE_ENABLED = False
     PAPER_TRADING = True
     LIVE_TRADING = False
 
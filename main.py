@@ -3,37 +3,58 @@ Main Application Entry Point
 Orchestrates all system components
 """
 import logging
+import os
+import time
 from datetime import datetime
+from typing import Dict, List, Optional
 from config import current_config
-from src.data_acquisition import SportsDataFetcher, DataProcessor
-from src.ml_models import MatchPredictor, ValueBettingCalculator
-from src.execution import BetExecutor, ComparisonEngine
-from src.risk_management import BankrollManager, ResponsibleGaming
-from src.utils import setup_logging, AuditLogger
+from src.data_acquisition import SportsDataFetcher, DataProcessor, FetchCache, TeamRatings, EntityIndex
+from src.ml_models import MatchPredictor, ValueBettingCalculator, ModelRegistry
+from src.execution import BetExecutor, ComparisonEngine, ArbitrageEngine, OddsCache
+from src.risk_management import BankrollManager, ResponsibleGaming, ExposureManager
+from src.utils import setup_logging, AuditLogger, DatabaseManager
 
 class BettingSystemOrchestrator:
     """
     Main orchestrator that coordinates all system components
     """
     
-    def __init__(self, config):
+    def __init__(self, config, fetch_cache: Optional[FetchCache] = None):
         self.config = config
-        self.logger = setup_logging(config.LOG_LEVEL)
-        self.audit_logger = AuditLogger()
+        self.logger = setup_logging(config.LOG_LEVEL, queued=getattr(config, "LOG_QUEUED", False))
+        self.audit_logger = AuditLogger(queued=getattr(config, "LOG_QUEUED", False))
+        self.database = DatabaseManager(
+            config.SQLALCHEMY_DATABASE_URI,
+            pool_size=getattr(config, "DB_POOL_SIZE", 5)
+        )
         
         # Initialize components
+        # Pass a long-lived cache to keep provider responses warm across cycles
+        self.fetch_cache = fetch_cache if fetch_cache is not None else FetchCache.from_config(config)
         self.data_fetcher = SportsDataFetcher(
             api_key=config.SPORTRADAR_API_KEY,
-            provider="sportradar"
+            provider="sportradar",
+            cache=self.fetch_cache
         )
-        self.data_processor = DataProcessor()
+        # One team name index, so ratings, features, odds and exposure join on the same ids
+        self.entities = EntityIndex.from_config(config)
+        self.data_processor = DataProcessor(entities=self.entities)
+        self.exposure_manager = ExposureManager(entities=self.entities)
+        # Provider event_id -> fixture_id, the key prices are cached under
+        self.fixture_ids = {}
         self.predictor = MatchPredictor(model_type="gradient_boosting")
         self.executor = BetExecutor(
             bookmaker="betfair",
             username=config.BETFAIR_USERNAME,
             password=config.BETFAIR_PASSWORD
         )
-        self.comparison_engine = ComparisonEngine()
+        # One price cache shared by odds comparison and arbitrage detection
+        self.odds_cache = OddsCache(
+            ttl_seconds=getattr(config, "ODDS_CACHE_TTL_SECONDS", 30.0),
+            max_selections=getattr(config, "ODDS_CACHE_MAX_SELECTIONS", 50000)
+        )
+        self.comparison_engine = ComparisonEngine(odds_cache=self.odds_cache)
+        self.arbitrage_engine = ArbitrageEngine(odds_cache=self.odds_cache)
         self.bankroll_manager = BankrollManager(
             initial_bankroll=config.BANKROLL_INITIAL,
             max_daily_loss_percent=config.MAX_DAILY_LOSS_PERCENT,
@@ -57,10 +78,55 @@ class BettingSystemOrchestrator:
             self.logger.error(f"Authentication failed: {str(e)}")
             return False
     
+    def warm_up(self) -> bool:
+        """
+        One-time startup for long-running use: authenticate, open the database
+        pool and load the trained model
+
+        Returns:
+            True if authentication succeeded
+        """
+        if not self.authenticate():
+            return False
+        
+        if not self.database.connect():
+            self.logger.warning("Database unavailable - running without persistence")
+        
+        # Prefer the registry (memory-mapped, hot-swappable); fall back to a pickle
+        registry_dir = getattr(self.config, "MODEL_REGISTRY_DIR", None)
+        model_name = getattr(self.config, "MODEL_NAME", "match_predictor")
+        if registry_dir and os.path.isdir(registry_dir):
+            registry = ModelRegistry(registry_dir)
+            if registry.current_version(model_name) is not None:
+                self.predictor.load_from_registry(
+                    registry, model_name,
+                    check_interval=getattr(self.config, "MODEL_REFRESH_SECONDS", None)
+                )
+        # Live ratings, when saved; otherwise form is rebuilt per event from fetched history
+        ratings_path = getattr(self.config, "RATINGS_PATH", None)
+        if ratings_path and os.path.exists(ratings_path):
+            self.data_processor.ratings = TeamRatings.load(
+                ratings_path, entities=self.entities,
+                method=getattr(self.config, "RATINGS_METHOD", "elo")
+            )
+            self.logger.info(f"Loaded ratings for {len(self.data_processor.ratings)} teams")
+
+        model_path = getattr(self.config, "MODEL_PATH", None)
+        if not self.predictor.is_trained and model_path and os.path.exists(model_path):
+            self.predictor.load_model(model_path)
+            self.predictor.compile_model()
+        if not self.predictor.is_trained:
+            self.logger.warning("No trained model loaded - predictions will be skipped")
+        return True
+    
+    def odds_key(self, event_id: str):
+        """Key of an event's prices in the odds cache: its fixture id once known, else the event_id"""
+        return self.fixture_ids.get(event_id, event_id)
+
     def process_event(self, event_id: str, sport: str = "soccer") -> None:
         """
         Process a single sporting event
-        
+
         Flow:
         1. Fetch event and odds data
         2. Get historical context
@@ -69,118 +135,229 @@ class BettingSystemOrchestrator:
         5. Evaluate value and risk
         6. Execute bet if criteria met
         """
-        try:
-            # Step 1: Fetch data
-            live_events = self.data_fetcher.fetch_live_events(sport=sport)
-            if not live_events:
-                self.logger.warning(f"No live events found for {sport}")
-                return
-            
-            event = next((e for e in live_events if e.get("event_id") == event_id), None)
-            if not event:
+        self.process_events([event_id], sport=sport)
+
+    def process_events(self, event_ids: Optional[List[str]] = None, sport: str = "soccer") -> Dict:
+        """
+        Process a batch of sporting events in one cycle
+
+        The live board is fetched once and indexed by event_id, then each step
+        of the `process_event` flow runs as a stage over all remaining events.
+
+        Args:
+            event_ids: Events to process (default: every live event for the sport)
+            sport: Sport to fetch the live board for
+
+        Returns:
+            Dictionary with decisions made and per-stage timings in seconds
+        """
+        timings = {}
+        decisions = []
+
+        def timed(stage):
+            timings[stage] = time.perf_counter()
+
+        def done(stage):
+            timings[stage] = time.perf_counter() - timings[stage]
+
+        # Stage 1: Fetch the live board once
+        timed("fetch")
+        live_events = self.data_fetcher.fetch_live_events(sport=sport) or []
+        board = {e.get("event_id"): e for e in live_events if e.get("event_id") is not None}
+        done("fetch")
+
+        if not board:
+            self.logger.warning(f"No live events found for {sport}")
+            return {"decisions": decisions, "stage_timings": timings}
+
+        if event_ids is None:
+            event_ids = list(board)
+
+        events = {}
+        for event_id in event_ids:
+            if event_id in board:
+                events[event_id] = board[event_id]
+            else:
                 self.logger.warning(f"Event {event_id} not found")
-                return
-            
-            # Process event data
-            processed_event = self.data_processor.normalize_event_data(event)
-            
-            # Step 2: Get historical data
-            historical_data = self.data_fetcher.fetch_historical_data(
-                team=processed_event.get("home_team"),
-                limit=50
-            )
-            
-            # Step 3: Make prediction
-            enriched_event = self.data_processor.enrich_event_with_context(
-                processed_event,
-                historical_data
-            )
-            
-            prediction = self.predictor.predict_probability(enriched_event)
-            if not prediction:
-                self.logger.warning(f"Prediction failed for event {event_id}")
-                return
-            
-            # Check confidence threshold
+
+        # Stage 2: Normalize and enrich with historical context (one fetch per team)
+        timed("enrichment")
+        history_by_team = {}
+        enriched = {}
+        for event_id, event in events.items():
+            try:
+                processed_event = self.data_processor.resolve_event(event)
+                if processed_event.get("fixture_id") is not None:
+                    self.fixture_ids[event_id] = processed_event["fixture_id"]
+                team = processed_event.get("home_team")
+                if team not in history_by_team:
+                    history_by_team[team] = self.data_fetcher.fetch_historical_data(team=team, limit=50)
+                enriched[event_id] = self.data_processor.enrich_event_with_context(
+                    processed_event,
+                    history_by_team[team]
+                )
+            except Exception as e:
+                self._record_event_error(event_id, e)
+        done("enrichment")
+
+        # Stage 3: Predictions and confidence filter
+        timed("prediction")
+        predictions = {}
+        batch = self.predictor.predict_many(list(enriched.values())) if enriched else {}
+        if enriched and not batch:
+            self.logger.warning(f"Prediction failed for {len(enriched)} events")
+
+        for i, event_id in enumerate(enriched if batch else []):
+            prediction = {key: float(values[i]) for key, values in batch.items()}
             if prediction.get("confidence", 0) < self.config.MIN_CONFIDENCE_THRESHOLD:
                 self.logger.info(f"Event {event_id}: Confidence too low ({prediction.get('confidence')})")
-                return
-            
-            # Step 4: Compare odds
-            odds_data = self.data_fetcher.fetch_event_odds(event_id)
-            best_odds = self.comparison_engine.get_best_odds(
-                event_id=event_id,
-                market_id="match_odds",
-                selection="home_win"
-            )
-            
-            # Step 5: Calculate value
-            value = ValueBettingCalculator.calculate_value(
-                predicted_prob=prediction.get("home_win", 0),
-                decimal_odds=best_odds.get("best_odds", 1.0)
-            )
-            
-            if not ValueBettingCalculator.has_value(
-                prediction.get("home_win", 0),
-                best_odds.get("best_odds", 1.0),
-                min_threshold=0.05
-            ):
+                continue
+            predictions[event_id] = prediction
+        done("prediction")
+
+        # Stage 4: Compare odds
+        timed("odds_comparison")
+        best_odds_by_event = {}
+        for event_id in predictions:
+            try:
+                # Fetched by provider event_id, cached by fixture so bookmakers' prices join
+                odds_key = self.odds_key(event_id)
+                odds_data = self.data_fetcher.fetch_event_odds(event_id)
+                self.comparison_engine.ingest_odds(odds_key, odds_data)
+                best_odds_by_event[event_id] = self.comparison_engine.get_best_odds(
+                    event_id=odds_key,
+                    market_id="match_odds",
+                    selection="home_win"
+                )
+            except Exception as e:
+                self._record_event_error(event_id, e)
+        done("odds_comparison")
+
+        # Stage 5: Calculate value
+        timed("value")
+        value_bets = {}
+        for event_id, best_odds in best_odds_by_event.items():
+            home_prob = predictions[event_id].get("home_win", 0)
+            decimal_odds = best_odds.get("best_odds", 1.0)
+            if not ValueBettingCalculator.has_value(home_prob, decimal_odds, min_threshold=0.05):
                 self.logger.info(f"Event {event_id}: No positive value found")
-                return
-            
-            # Step 6: Risk check and execution
-            stake = self.bankroll_manager.calculate_optimal_stake(
-                predicted_prob=prediction.get("home_win", 0),
-                decimal_odds=best_odds.get("best_odds", 1.0),
-                use_kelly=True
+                continue
+            value_bets[event_id] = ValueBettingCalculator.calculate_value(
+                predicted_prob=home_prob,
+                decimal_odds=decimal_odds
             )
-            
-            if stake <= 0:
-                self.logger.warning(f"Event {event_id}: Stake calculation resulted in zero")
-                return
-            
-            # Check responsible gaming limits
-            if not self.responsible_gaming.check_daily_limits(self.responsible_gaming.daily_bet_count):
-                self.logger.warning("Daily bet limit reached")
-                return
-            
-            # Final decision
-            decision = {
+        done("value")
+
+        # Stage 6: Risk check, staking and execution
+        timed("staking")
+        for event_id, value in value_bets.items():
+            try:
+                decision = self._stake_and_execute(
+                    event_id, predictions[event_id], best_odds_by_event[event_id], value
+                )
+                if decision:
+                    decisions.append(decision)
+                    event = enriched[event_id]
+                    team = event.get("home_team_id", event.get("home_team"))
+                    self.exposure_manager.add_exposure(sport, team, decision["stake"])
+            except Exception as e:
+                self._record_event_error(event_id, e)
+        done("staking")
+
+        if self.database.is_connected:
+            timed("persistence")
+            self._persist_cycle(sport, enriched, predictions, decisions)
+            done("persistence")
+
+        self.logger.info(
+            f"Processed {len(events)} events ({len(decisions)} bets) - stage timings: "
+            + ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items())
+        )
+
+        return {"decisions": decisions, "stage_timings": timings}
+
+    def _stake_and_execute(self, event_id: str, prediction: Dict, best_odds: Dict,
+                           value: float) -> Optional[Dict]:
+        """Size the stake, apply responsible gaming limits, log and execute one bet"""
+        stake = self.bankroll_manager.calculate_optimal_stake(
+            predicted_prob=prediction.get("home_win", 0),
+            decimal_odds=best_odds.get("best_odds", 1.0),
+            use_kelly=True
+        )
+
+        if stake <= 0:
+            self.logger.warning(f"Event {event_id}: Stake calculation resulted in zero")
+            return None
+
+        # Check responsible gaming limits
+        if not self.responsible_gaming.check_daily_limits(self.responsible_gaming.daily_bet_count):
+            self.logger.warning("Daily bet limit reached")
+            return None
+
+        # Final decision
+        decision = {
+            "event_id": event_id,
+            "prediction": prediction,
+            "odds": best_odds.get("best_odds"),
+            "value": value,
+            "stake": stake,
+            "action": "place_bet",
+            "reason": f"Value bet detected: {value*100:.2f}%",
+            "risk_metrics": {
+                "bankroll_remaining": self.bankroll_manager.current_bankroll,
+                "daily_losses": self.bankroll_manager.daily_losses,
+            },
+        }
+
+        # Log decision
+        self.audit_logger.log_decision(decision)
+
+        # Execute bet if in live mode
+        if not self.config.PAPER_TRADING and self.config.LIVE_TRADING:
+            bet_request = {
                 "event_id": event_id,
-                "prediction": prediction,
+                "market_id": "match_odds",
+                "selection": "home_win",
                 "odds": best_odds.get("best_odds"),
-                "value": value,
                 "stake": stake,
-                "action": "place_bet",
-                "reason": f"Value bet detected: {value*100:.2f}%",
-                "risk_metrics": {
-                    "bankroll_remaining": self.bankroll_manager.current_bankroll,
-                    "daily_losses": self.bankroll_manager.daily_losses,
-                },
+                "bet_type": "back",
             }
-            
-            # Log decision
-            self.audit_logger.log_decision(decision)
-            
-            # Execute bet if in live mode
-            if not self.config.PAPER_TRADING and self.config.LIVE_TRADING:
-                bet_request = {
-                    "event_id": event_id,
-                    "market_id": "match_odds",
-                    "selection": "home_win",
-                    "odds": best_odds.get("best_odds"),
-                    "stake": stake,
-                    "bet_type": "back",
-                }
-                
-                confirmation = self.executor.place_bet(bet_request)
-                self.logger.info(f"Bet placed: {confirmation}")
-            else:
-                self.logger.info(f"Paper trading - Bet would be placed: {stake} at {best_odds.get('best_odds')}")
-        
-        except Exception as e:
-            self.logger.error(f"Error processing event {event_id}: {str(e)}")
-            self.audit_logger.log_error("event_processing", {"event_id": event_id, "error": str(e)})
+
+            confirmation = self.executor.place_bet(bet_request)
+            decision["bet_id"] = confirmation.get("bet_id")
+            self.logger.info(f"Bet placed: {confirmation}")
+        else:
+            self.logger.info(f"Paper trading - Bet would be placed: {stake} at {best_odds.get('best_odds')}")
+
+        return decision
+
+    def _persist_cycle(self, sport: str, events: Dict, predictions: Dict, decisions: List[Dict]) -> None:
+        """Buffer this cycle's events, predictions and bets and write them in one flush"""
+        for event in events.values():
+            self.database.save_event(event)
+        for event_id, prediction in predictions.items():
+            self.database.save_prediction({
+                **prediction,
+                "event_id": event_id,
+                "sport": sport,
+                "model_type": self.predictor.model_type,
+            })
+        for decision in decisions:
+            self.database.save_bet({
+                "bet_id": decision.get("bet_id") or f"{decision['event_id']}_{int(time.time() * 1000)}",
+                "event_id": decision["event_id"],
+                "sport": sport,
+                "market_id": "match_odds",
+                "selection": "home_win",
+                "odds": decision.get("odds"),
+                "stake": decision.get("stake"),
+                "status": "pending" if decision.get("bet_id") else "paper",
+            })
+        self.database.flush()
+
+    def _record_event_error(self, event_id: str, error: Exception) -> None:
+        self.logger.error(f"Error processing event {event_id}: {str(error)}")
+        self.audit_logger.log_error("event_processing", {"event_id": event_id, "error": str(error)})
 
 def main():
     """Main application entry point"""
@@ -201,6 +378,9 @@ def main():
         print("ERROR: Authentication failed. Exiting.")
         return
     
+    if not system.database.connect():
+        print("WARNING: Database unavailable - running without persistence")
+
     print("✓ System initialized and authenticated")
     print("✓ Ready for event processing")
     print("\nSystem Components:")
@@ -2,15 +2,45 @@
 Scheduler para ejecutar el bot de apuestas automáticamente
 Ejecuta cada cierto tiempo para monitorear oportunidades
 """
+import asyncio
+import signal
+import sys
 import schedule
 import time
 import logging
 from datetime import datetime
 from main import BettingSystemOrchestrator
 from config import current_config
+from src.daemon import BotDaemon
+from src.data_acquisition import FetchCache, AdaptivePollScheduler
 from src.utils import setup_logging
 
-logger = setup_logging(current_config.LOG_LEVEL)
+logger = setup_logging(current_config.LOG_LEVEL, queued=current_config.LOG_QUEUED)
+
+# Shared across cycles (and across workers when the Redis tier is enabled)
+fetch_cache = FetchCache.from_config(current_config)
+
+# Orquestador reutilizado entre ciclos (sesiones, caché y modelo en caliente)
+_daemon = None
+
+
+def get_daemon():
+    """
+    Construir el orquestador una sola vez
+    """
+    global _daemon
+    if _daemon is None:
+        system = BettingSystemOrchestrator(current_config, fetch_cache=fetch_cache)
+        _daemon = BotDaemon(
+            system,
+            interval_seconds=current_config.BOT_CYCLE_INTERVAL_SECONDS,
+            sports=current_config.BOT_SPORTS,
+            poll_scheduler=AdaptivePollScheduler(
+                max_requests_per_minute=current_config.ODDS_POLL_MAX_REQUESTS_PER_MINUTE,
+                in_play_interval=current_config.ODDS_POLL_IN_PLAY_INTERVAL,
+            ),
+        )
+    return _daemon
 
 
 def run_bot_cycle():
@@ -22,22 +52,22 @@ def run_bot_cycle():
         logger.info(f"Starting bot cycle at {datetime.now().isoformat()}")
         logger.info("=" * 60)
         
-        # Inicializar sistema
-        system = BettingSystemOrchestrator(current_config)
+        daemon = get_daemon()
         
-        # Autenticar
-        if not system.authenticate():
+        # Autenticar y cargar el modelo (solo la primera vez)
+        if not daemon.warm_up():
             logger.error("Authentication failed")
             return False
         
-        logger.info("System authenticated successfully")
-        logger.info("System initialized and ready for event processing")
+        cycle = daemon.run_cycle()
+        cycle["drift_seconds"] = 0.0
+        daemon.metrics.record(cycle)
         
-        # Aquí iría la lógica de procesamiento de eventos
-        # system.process_events()
-        
-        logger.info("Bot cycle completed successfully")
-        return True
+        logger.info(
+            f"Bot cycle completed in {cycle['latency_seconds']:.2f}s "
+            f"({cycle['decisions']} decisions)"
+        )
+        return cycle["error"] is None
         
     except Exception as e:
         logger.error(f"Error during bot cycle: {str(e)}")
@@ -66,9 +96,28 @@ def schedule_bot():
     logger.info("  - Daily at 12:00 UTC")
 
 
+async def run_daemon():
+    """
+    Modo daemon: ciclos con temporizador asyncio sobre un orquestador persistente
+    """
+    daemon = get_daemon()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, daemon.stop)
+        except NotImplementedError:  # Windows
+            pass
+    
+    logger.info(f"Bot daemon started (every {daemon.interval_seconds:.0f}s for {', '.join(daemon.sports)})")
+    metrics = await daemon.run()
+    logger.info(f"Bot daemon stopped: {metrics}")
+
+
 def main():
     """
     Punto de entrada para el scheduler
+    Por defecto planifica ciclos con `schedule` (cada 6 horas); `--daemon` o
+    BOT_DAEMON=true ejecuta ciclos continuos cada BOT_CYCLE_INTERVAL_SECONDS
     """
     print("=" * 60)
     print("Sports Betting Autonomous System - Scheduler")
@@ -79,6 +128,13 @@ def main():
     print(f"Live Trading: {current_config.LIVE_TRADING}")
     print("=" * 60)
     
+    if "--daemon" in sys.argv[1:] or current_config.BOT_DAEMON:
+        try:
+            asyncio.run(run_daemon())
+        except RuntimeError as e:
+            logger.error(f"Bot daemon error: {str(e)}")
+        return
+    
     # Programar el bot
     schedule_bot()
     
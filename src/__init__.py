@@ -11,7 +11,7 @@ from src.data_acquisition import SportsDataFetcher, DataProcessor
 from src.ml_models import MatchPredictor, OddsConverter, ValueBettingCalculator
 from src.execution import BetExecutor, ComparisonEngine
 from src.risk_management import BankrollManager, ResponsibleGaming, ExposureManager
-from src.utils import setup_logging, AuditLogger
+from src.utils import setup_logging, AuditLogger, iter_audit_records
 
 __all__ = [
     "SportsDataFetcher",
@@ -26,4 +26,5 @@ __all__ = [
     "ExposureManager",
     "setup_logging",
     "AuditLogger",
+    "iter_audit_records",
 ]
@@ -0,0 +1,6 @@
+"""
+Backtesting Module - init
+"""
+from .backtester import Backtester, iter_records
+
+__all__ = ["Backtester", "iter_records"]
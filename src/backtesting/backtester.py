@@ -0,0 +1,331 @@
+"""
+Backtesting Engine
+Replay timestamped odds and results through the live decision logic
+"""
+import heapq
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+import pandas as pd
+
+from src.data_acquisition import TeamFeatureStore
+from src.ml_models import MatchPredictor, ValueBettingCalculator, CalibrationMonitor, OnlineLearner
+from src.risk_management import BankrollManager, ResponsibleGaming
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+def iter_records(path: PathLike, chunksize: int = 50000,
+                 timestamp_column: str = "timestamp") -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV or Parquet file in chunks with parsed timestamps
+
+    Args:
+        path: .csv or .parquet file, sorted by timestamp
+        chunksize: Rows per chunk
+        timestamp_column: Column holding event times
+
+    Yields:
+        DataFrame chunks
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("pyarrow is required to read Parquet files") from e
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunksize)
+
+    for chunk in chunks:
+        chunk[timestamp_column] = pd.to_datetime(chunk[timestamp_column])
+        yield chunk
+
+
+class Backtester:
+    """
+    Event-driven backtester
+
+    Odds and results are merged into one chronological stream. Each odds row
+    goes through prediction -> value check -> BankrollManager.calculate_optimal_stake
+    -> ResponsibleGaming limits, and open bets are settled when their result row
+    arrives. Only open bets and running statistics are held in memory.
+
+    A placed bet's stake is taken out of the bankroll until it settles, so
+    concurrent bets are sized from free capital only (`open_stake` holds
+    the reserved total). Settlements update the bankroll manager's bankroll
+    and daily counters directly rather than through `record_bet_result`, so
+    a replay neither logs every bet nor grows the manager's `bets_history`.
+
+    Odds rows need: timestamp, event_id, selection, odds, plus either a
+    `model_probability` column or the feature columns the predictor reads.
+    Result rows need: timestamp, event_id, winner (the winning selection).
+    """
+
+    def __init__(self, bankroll_manager: BankrollManager,
+                 responsible_gaming: Optional[ResponsibleGaming] = None,
+                 predictor: Optional[MatchPredictor] = None,
+                 min_value: float = 0.05, min_confidence: float = 0.0,
+                 keep_ledger: bool = True,
+                 calibration_monitor: Optional[CalibrationMonitor] = None,
+                 online_learner: Optional[OnlineLearner] = None,
+                 feature_store: Optional[TeamFeatureStore] = None):
+        """
+        Args:
+            bankroll_manager: Bankroll and Kelly staking rules to replay
+            responsible_gaming: Loss-streak and daily bet limits to replay
+            predictor: Trained model used when odds rows carry no model_probability
+            min_value: Minimum value required to bet (as in `ValueBettingCalculator.has_value`)
+            min_confidence: Minimum model confidence required to bet
+            keep_ledger: Keep every settled bet (disable for very long replays)
+            calibration_monitor: Tracks Brier/log loss of settled bets (default: a new monitor)
+            online_learner: Updated with the features and outcome of each settled bet's event
+            feature_store: Team statistics filled into odds rows (home_team/away_team)
+                as of each row's timestamp, so later results never leak in
+        """
+        self.bankroll_manager = bankroll_manager
+        self.responsible_gaming = responsible_gaming or ResponsibleGaming()
+        self.predictor = predictor
+        self.min_value = min_value
+        self.min_confidence = min_confidence
+        self.keep_ledger = keep_ledger
+        self.calibration_monitor = calibration_monitor or CalibrationMonitor()
+        self.online_learner = online_learner
+        self.feature_store = feature_store
+        self.open_stake = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear replay state (bankroll managers are not reset; stakes of dropped open bets are returned)"""
+        self.bankroll_manager.current_bankroll += self.open_stake
+        self.open_stake = 0.0
+        self.open_bets = {}
+        self.open_matches = {}
+        self.ledger = []
+        self.equity_curve = []
+        self.skipped = {"no_prediction": 0, "low_confidence": 0, "no_value": 0,
+                        "zero_stake": 0, "paused": 0, "daily_limit": 0, "already_bet": 0}
+        self.stats = {"bets": 0, "won": 0, "lost": 0, "staked": 0.0, "profit": 0.0}
+        self.current_day = None
+        self.paused_until = None
+        self.peak_bankroll = self.equity
+        self.max_drawdown = 0.0
+
+    @property
+    def equity(self) -> float:
+        """Bankroll including stakes reserved by open bets"""
+        return self.bankroll_manager.current_bankroll + self.open_stake
+
+    # Streams
+
+    def _score_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Fill model_probability for a chunk with one batched model call"""
+        if "model_probability" in chunk.columns or self.predictor is None:
+            return chunk
+
+        records = chunk.to_dict("records")
+        if self.feature_store is not None and {"home_team", "away_team"} <= set(chunk.columns):
+            fields = self.feature_store.match_features(chunk["home_team"].tolist(), chunk["away_team"].tolist(),
+                                                       chunk["timestamp"].tolist())
+            for i, record in enumerate(records):
+                for field, values in fields.items():
+                    if record.get(field) is None or pd.isna(record[field]):
+                        record[field] = values[i]
+        batch = self.predictor.predict_many(records)
+        if not batch:
+            chunk["model_probability"] = float("nan")
+            return chunk
+
+        probabilities = []
+        for i, selection in enumerate(chunk["selection"]):
+            column = batch.get(selection)
+            probabilities.append(float(column[i]) if column is not None else float("nan"))
+        chunk["model_probability"] = probabilities
+        chunk["model_confidence"] = batch["confidence"]
+        return chunk
+
+    def _stream(self, chunks: Iterator[pd.DataFrame], kind: int, score: bool) -> Iterator[tuple]:
+        sequence = 0
+        last = None
+        for chunk in chunks:
+            if score:
+                chunk = self._score_chunk(chunk)
+            for row in chunk.to_dict("records"):
+                timestamp = row["timestamp"]
+                if last is not None and timestamp < last:
+                    raise ValueError(f"Input is not in chronological order at {timestamp}")
+                last = timestamp
+                sequence += 1
+                # Results sort before odds at the same instant so bets settle first
+                yield (timestamp, kind, sequence, row)
+
+    # Replay
+
+    def run(self, odds_path: PathLike, results_path: PathLike, chunksize: int = 50000) -> Dict:
+        """Replay odds and results files (CSV or Parquet) and return the summary"""
+        return self.run_streams(iter_records(odds_path, chunksize), iter_records(results_path, chunksize))
+
+    def run_streams(self, odds_chunks: Iterator[pd.DataFrame],
+                    result_chunks: Iterator[pd.DataFrame]) -> Dict:
+        """
+        Replay chronologically sorted streams of odds and result chunks
+
+        Returns:
+            Backtest summary
+        """
+        merged = heapq.merge(
+            self._stream(result_chunks, 0, score=False),
+            self._stream(odds_chunks, 1, score=True),
+            key=lambda item: item[:3],
+        )
+
+        for timestamp, kind, _, row in merged:
+            self._advance_clock(timestamp)
+            if kind == 0:
+                self._on_result(timestamp, row)
+            else:
+                self._on_odds(timestamp, row)
+
+        return self.summary()
+
+    def _advance_clock(self, timestamp: datetime) -> None:
+        day = timestamp.date()
+        if day == self.current_day:
+            return
+
+        if self.current_day is not None:
+            self.equity_curve.append((self.current_day, self.equity))
+
+        # Daily limits follow simulated days, not wall-clock days
+        self.current_day = day
+        self.bankroll_manager.daily_losses = 0.0
+        self.bankroll_manager.daily_bets_count = 0
+        self.responsible_gaming.daily_bet_count = 0
+
+    def _on_odds(self, timestamp: datetime, row: Dict) -> None:
+        event_bets = self.open_bets.get(row["event_id"], {})
+        if row["selection"] in event_bets:
+            self.skipped["already_bet"] += 1
+            return
+
+        probability = row.get("model_probability")
+        if probability is None or pd.isna(probability):
+            self.skipped["no_prediction"] += 1
+            return
+
+        confidence = row.get("model_confidence", probability)
+        if confidence < self.min_confidence:
+            self.skipped["low_confidence"] += 1
+            return
+
+        odds = float(row["odds"])
+        if not ValueBettingCalculator.has_value(probability, odds, self.min_value):
+            self.skipped["no_value"] += 1
+            return
+
+        rg = self.responsible_gaming
+        if rg.is_paused:
+            if self.paused_until is not None and timestamp >= self.paused_until:
+                rg.is_paused = False
+                rg.consecutive_losses = 0
+            else:
+                self.skipped["paused"] += 1
+                return
+
+        if not rg.check_daily_limits(rg.daily_bet_count):
+            self.skipped["daily_limit"] += 1
+            return
+
+        bm = self.bankroll_manager
+        if bm.kelly_criterion(probability, odds) <= 0:
+            self.skipped["zero_stake"] += 1
+            return
+        stake = bm.calculate_optimal_stake(probability, odds, use_kelly=True)
+        if stake <= 0 or stake > bm.current_bankroll:
+            self.skipped["zero_stake"] += 1
+            return
+
+        bm.current_bankroll -= stake
+        self.open_stake += stake
+        rg.daily_bet_count += 1
+        if self.online_learner is not None:
+            self.open_matches.setdefault(row["event_id"], row)
+        self.open_bets.setdefault(row["event_id"], {})[row["selection"]] = {
+            "event_id": row["event_id"],
+            "selection": row["selection"],
+            "odds": odds,
+            "stake": stake,
+            "probability": float(probability),
+            "sport": row.get("sport"),
+            "market": row.get("market"),
+            "placed_at": timestamp,
+        }
+
+    def _on_result(self, timestamp: datetime, row: Dict) -> None:
+        match = self.open_matches.pop(row["event_id"], None)
+        if match is not None:
+            self.online_learner.add_result(match, row["winner"])
+
+        for bet in self.open_bets.pop(row["event_id"], {}).values():
+            won = bet["selection"] == row["winner"]
+            profit = bet["stake"] * (bet["odds"] - 1.0) if won else -bet["stake"]
+
+            self._settle_bankroll(bet["stake"], won, profit)
+            if self.responsible_gaming.check_loss_streak("won" if won else "lost"):
+                self.paused_until = timestamp + self.responsible_gaming.get_pause_duration()
+
+            self.calibration_monitor.record(bet["probability"], won, bet["sport"], bet["market"])
+            self.stats["bets"] += 1
+            self.stats["won" if won else "lost"] += 1
+            self.stats["staked"] += bet["stake"]
+            self.stats["profit"] += profit
+
+            bankroll = self.equity
+            self.peak_bankroll = max(self.peak_bankroll, bankroll)
+            if self.peak_bankroll > 0:
+                self.max_drawdown = max(self.max_drawdown, 1.0 - bankroll / self.peak_bankroll)
+
+            if self.keep_ledger:
+                self.ledger.append({**bet, "settled_at": timestamp, "won": won, "profit": profit,
+                                    "bankroll_after": bankroll})
+
+    def _settle_bankroll(self, stake: float, won: bool, profit: float) -> None:
+        """Apply a settled bet as `BankrollManager.record_bet_result` would, without its log and history"""
+        bm = self.bankroll_manager
+        self.open_stake -= stake
+        if won:
+            bm.current_bankroll += stake + profit
+        else:
+            bm.daily_losses += stake
+        bm.daily_bets_count += 1
+
+    def summary(self) -> Dict:
+        """Backtest performance summary"""
+        stats = self.stats
+        equity = list(self.equity_curve)
+        if self.current_day is not None:
+            equity.append((self.current_day, self.equity))
+
+        return {
+            "bets_settled": stats["bets"],
+            "bets_open": sum(len(bets) for bets in self.open_bets.values()),
+            "open_stake": self.open_stake,
+            "won": stats["won"],
+            "lost": stats["lost"],
+            "win_rate": stats["won"] / stats["bets"] if stats["bets"] else 0.0,
+            "total_staked": stats["staked"],
+            "total_profit": stats["profit"],
+            "roi": stats["profit"] / stats["staked"] if stats["staked"] else 0.0,
+            "initial_bankroll": self.bankroll_manager.initial_bankroll,
+            "final_bankroll": self.equity,
+            "max_drawdown": self.max_drawdown,
+            "calibration": self.calibration_monitor.report(),
+            "skipped": dict(self.skipped),
+            "equity_curve": equity,
+            "ledger": list(self.ledger),
+        }
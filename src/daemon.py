@@ -0,0 +1,232 @@
+"""
+Bot Daemon
+Long-running cycle loop over one warm orchestrator
+"""
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from src.data_acquisition import AdaptivePollScheduler
+
+logger = logging.getLogger("sports_betting_system")
+
+
+class CycleMetrics:
+    """
+    Rolling latency and timer-drift statistics for daemon cycles
+
+    Drift is how late a cycle started relative to its scheduled tick; latency
+    is how long the cycle took.
+    """
+
+    def __init__(self, window: int = 500):
+        """
+        Args:
+            window: Number of recent cycles kept for percentiles
+        """
+        self.cycles = deque(maxlen=window)
+        self.total_cycles = 0
+        self.total_errors = 0
+        self.skipped_ticks = 0
+
+    def record(self, cycle: Dict) -> None:
+        self.cycles.append(cycle)
+        self.total_cycles += 1
+        if cycle.get("error"):
+            self.total_errors += 1
+
+    @staticmethod
+    def _percentile(values: List[float], q: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def summary(self) -> Dict:
+        """Aggregate statistics over the recent window"""
+        latencies = [c["latency_seconds"] for c in self.cycles]
+        drifts = [c["drift_seconds"] for c in self.cycles]
+        return {
+            "cycles": self.total_cycles,
+            "errors": self.total_errors,
+            "skipped_ticks": self.skipped_ticks,
+            "latency_seconds": {
+                "mean": statistics.fmean(latencies) if latencies else 0.0,
+                "p50": self._percentile(latencies, 0.50),
+                "p95": self._percentile(latencies, 0.95),
+                "max": max(latencies, default=0.0),
+            },
+            "drift_seconds": {
+                "mean": statistics.fmean(drifts) if drifts else 0.0,
+                "p95": self._percentile(drifts, 0.95),
+                "max": max(drifts, default=0.0),
+            },
+            "last_cycle": self.cycles[-1] if self.cycles else None,
+        }
+
+
+class BotDaemon:
+    """
+    Drive `BettingSystemOrchestrator.process_events` on a fixed-rate asyncio timer
+
+    The orchestrator is warmed up once (authentication, database pool, model)
+    and reused, so HTTP sessions and caches stay alive between cycles. Ticks
+    are scheduled from the start time rather than from the previous cycle's
+    end, so timer error does not accumulate; ticks missed while a cycle
+    overran are skipped, not queued.
+
+    With a poll scheduler, the time between cycles is spent refreshing odds
+    of individual events as they fall due (into the shared odds cache).
+    """
+
+    def __init__(self, system, interval_seconds: float = 300.0,
+                 sports: Iterable[str] = ("soccer",), metrics_window: int = 500,
+                 poll_scheduler: Optional[AdaptivePollScheduler] = None):
+        """
+        Args:
+            system: BettingSystemOrchestrator to reuse across cycles
+            interval_seconds: Seconds between cycle starts
+            sports: Sports processed in each cycle
+            metrics_window: Recent cycles kept for latency/drift percentiles
+            poll_scheduler: Optional adaptive scheduler for per-event odds refreshes
+        """
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+
+        self.system = system
+        self.interval_seconds = interval_seconds
+        self.sports = list(sports)
+        self.metrics = CycleMetrics(metrics_window)
+        self.poll_scheduler = poll_scheduler
+        self.odds_polls = 0
+        self.is_warm = False
+        self._stop = None
+
+    def warm_up(self) -> bool:
+        """Prepare the orchestrator once; True when it is ready for cycles"""
+        if not self.is_warm:
+            self.is_warm = self.system.warm_up()
+        return self.is_warm
+
+    def run_cycle(self) -> Dict:
+        """Process every configured sport once (blocking)"""
+        stage_timings = {}
+        decisions = 0
+        error = None
+        start = time.perf_counter()
+
+        for sport in self.sports:
+            try:
+                result = self.system.process_events(sport=sport)
+                decisions += len(result.get("decisions", []))
+                for stage, seconds in result.get("stage_timings", {}).items():
+                    stage_timings[stage] = stage_timings.get(stage, 0.0) + seconds
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Bot cycle failed for {sport}: {error}")
+
+        if self.poll_scheduler is not None:
+            for sport in self.sports:
+                # Served from the fetch cache when the cycle just fetched the board
+                self.poll_scheduler.sync_board(self.system.data_fetcher.fetch_live_events(sport=sport) or [],
+                                               board=sport)
+
+        return {
+            "latency_seconds": time.perf_counter() - start,
+            "decisions": decisions,
+            "stage_timings": stage_timings,
+            "error": error,
+        }
+
+    def poll_odds(self) -> List[str]:
+        """Refresh odds for the events the poll scheduler has due (blocking)"""
+        system = self.system
+
+        def fetch_prices(event_id):
+            odds_key = system.odds_key(event_id)
+            odds = system.data_fetcher.fetch_event_odds(event_id)
+            system.comparison_engine.ingest_odds(odds_key, odds)
+            market = system.odds_cache.market(odds_key, "match_odds")
+            return {selection: max(prices.values()) for selection, prices in market.items()}
+
+        polled = self.poll_scheduler.run_pending(fetch_prices)
+        self.odds_polls += len(polled)
+        return polled
+
+    async def _wait(self, seconds: float) -> bool:
+        """Sleep unless stopped first; True if the daemon was stopped"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _wait_for_tick(self, scheduled: float) -> bool:
+        """Wait for a cycle tick, polling due odds meanwhile; True if stopped"""
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = scheduled - loop.time()
+            if delay <= 0:
+                return self._stop.is_set()
+
+            poll_wait = self.poll_scheduler.seconds_until_due() if self.poll_scheduler else None
+            if poll_wait is None or poll_wait >= delay:
+                return await self._wait(delay)
+
+            if poll_wait > 0 and await self._wait(poll_wait):
+                return True
+            await asyncio.to_thread(self.poll_odds)
+
+    async def run(self, max_cycles: Optional[int] = None) -> Dict:
+        """
+        Run cycles until `stop()` is called or `max_cycles` have completed
+
+        Returns:
+            Metrics summary
+        """
+        if not self.warm_up():
+            raise RuntimeError("Orchestrator warm-up failed")
+
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        start = loop.time()
+        tick = 0
+        completed = 0
+
+        while not self._stop.is_set():
+            scheduled = start + tick * self.interval_seconds
+            if await self._wait_for_tick(scheduled):
+                break
+
+            drift = loop.time() - scheduled
+            cycle = await asyncio.to_thread(self.run_cycle)
+            cycle.update({
+                "tick": tick,
+                "started_at": datetime.now().isoformat(),
+                "drift_seconds": drift,
+            })
+            self.metrics.record(cycle)
+            completed += 1
+            logger.info(
+                f"Cycle {tick}: {cycle['latency_seconds'] * 1000:.1f}ms, drift {drift * 1000:.1f}ms, "
+                f"{cycle['decisions']} decisions"
+            )
+
+            if max_cycles is not None and completed >= max_cycles:
+                break
+
+            # Skip ticks that elapsed while the cycle was running
+            next_tick = max(tick + 1, int((loop.time() - start) // self.interval_seconds) + 1)
+            self.metrics.skipped_ticks += next_tick - tick - 1
+            tick = next_tick
+
+        return {**self.metrics.summary(), "odds_polls": self.odds_polls}
+
+    def stop(self) -> None:
+        """Ask a running loop to exit after the current cycle"""
+        if self._stop is not None:
+            self._stop.set()
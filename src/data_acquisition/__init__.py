@@ -1,6 +1,13 @@
 """
 Data Acquisition Module - init
 """
+from .cache import FetchCache, LRUCache
 from .data_fetcher import SportsDataFetcher, DataProcessor
+from .async_fetcher import AsyncSportsDataFetcher, AsyncRateLimiter
+from .tick_store import OddsTickStore
+from .polling import AdaptivePollScheduler
+from .ratings import TeamRatings
+from .feature_store import TeamFeatureStore
+from .entities import EntityIndex, normalize_name
 
-__all__ = ["SportsDataFetcher", "DataProcessor"]
+__all__ = ["SportsDataFetcher", "DataProcessor", "AsyncSportsDataFetcher", "AsyncRateLimiter", "OddsTickStore", "FetchCache", "LRUCache", "AdaptivePollScheduler", "TeamRatings", "TeamFeatureStore", "EntityIndex", "normalize_name"]
@@ -0,0 +1,219 @@
+"""
+Async Data Acquisition
+Concurrent fan-out of event, odds and history requests with rate limiting
+"""
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+
+from .data_fetcher import SportsDataFetcher
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket limiting requests per second for one provider
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        """
+        Args:
+            rate: Sustained requests per second
+            burst: Maximum requests allowed back to back (default: one second's worth)
+            clock: Time source in seconds
+            sleep: Coroutine function waiting a number of seconds
+        """
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = None
+
+    def bind_loop(self) -> None:
+        """Forget the lock of a previous event loop (the next acquire creates one on the running loop)"""
+        self._lock = None
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await self.sleep((1.0 - self.tokens) / self.rate)
+
+
+def _is_default_adapter(adapter) -> bool:
+    """Whether a session still has the HTTPAdapter requests.Session mounts by default"""
+    return (type(adapter) is HTTPAdapter
+            and getattr(adapter, "_pool_maxsize", None) == DEFAULT_POOLSIZE
+            and adapter.max_retries.total == 0)
+
+
+class AsyncSportsDataFetcher:
+    """
+    Asyncio front-end for one or more SportsDataFetcher providers
+    Runs the blocking provider calls in worker threads, bounded by a global
+    concurrency limit and a per-provider rate limit
+    """
+
+    def __init__(self, fetchers: Union[SportsDataFetcher, Dict[str, SportsDataFetcher]],
+                 max_concurrency: int = 10, rate_limits: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            fetchers: A fetcher, or fetchers keyed by provider name
+            max_concurrency: Maximum requests in flight across all providers
+            rate_limits: Requests per second per provider (unlimited if absent)
+        """
+        if isinstance(fetchers, SportsDataFetcher):
+            fetchers = {fetchers.provider: fetchers}
+        if not fetchers:
+            raise ValueError("At least one SportsDataFetcher is required")
+
+        self.fetchers = fetchers
+        self.default_provider = next(iter(fetchers))
+        self.max_concurrency = max_concurrency
+        self.limiters = {
+            provider: AsyncRateLimiter(rate)
+            for provider, rate in (rate_limits or {}).items()
+        }
+        self._semaphore = None
+        self._loop = None
+
+        # Let each session keep one pooled connection per concurrent request,
+        # leaving adapters the caller configured (retries, pools) alone
+        for fetcher in fetchers.values():
+            for prefix in ("https://", "http://"):
+                if _is_default_adapter(fetcher.session.adapters.get(prefix)):
+                    fetcher.session.mount(prefix, HTTPAdapter(pool_connections=max_concurrency,
+                                                              pool_maxsize=max_concurrency))
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            for limiter in self.limiters.values():
+                limiter.bind_loop()
+        return self._semaphore
+
+    async def _call(self, provider: Optional[str], method: str, *args):
+        provider = provider or self.default_provider
+        fetcher = self.fetchers[provider]
+        limiter = self.limiters.get(provider)
+
+        # Wait for the provider's token before taking a global slot, so a
+        # throttled provider cannot hold slots the others could use
+        semaphore = self._get_semaphore()
+        if limiter is not None:
+            await limiter.acquire()
+        async with semaphore:
+            return await asyncio.to_thread(getattr(fetcher, method), *args)
+
+    async def fetch_live_events(self, sport: str = "soccer",
+                                provider: Optional[str] = None) -> List[Dict]:
+        """Async `SportsDataFetcher.fetch_live_events`"""
+        return await self._call(provider, "fetch_live_events", sport) or []
+
+    async def fetch_event_odds(self, event_id: str, market_type: str = "match_odds",
+                               provider: Optional[str] = None) -> Dict:
+        """Async `SportsDataFetcher.fetch_event_odds`"""
+        return await self._call(provider, "fetch_event_odds", event_id, market_type)
+
+    async def fetch_historical_data(self, team: str, limit: int = 50,
+                                    provider: Optional[str] = None) -> "pd.DataFrame":
+        """Async `SportsDataFetcher.fetch_historical_data`"""
+        return await self._call(provider, "fetch_historical_data", team, limit)
+
+    async def fetch_all_live_events(self, sports: Iterable[str],
+                                    provider: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Fetch live events for many sports concurrently
+
+        Returns:
+            Events keyed by sport
+        """
+        sports = list(sports)
+        results = await asyncio.gather(*(self.fetch_live_events(s, provider) for s in sports))
+        return dict(zip(sports, results))
+
+    async def fetch_all_event_odds(self, event_ids: Iterable[str], market_type: str = "match_odds",
+                                   provider: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Fetch odds for many events concurrently
+
+        Returns:
+            Odds keyed by event id
+        """
+        event_ids = list(dict.fromkeys(event_ids))
+        results = await asyncio.gather(
+            *(self.fetch_event_odds(e, market_type, provider) for e in event_ids)
+        )
+        return dict(zip(event_ids, results))
+
+    async def fetch_all_historical_data(self, teams: Iterable[str], limit: int = 50,
+                                        provider: Optional[str] = None) -> Dict[str, "pd.DataFrame"]:
+        """
+        Fetch historical data for many teams concurrently (duplicates fetched once)
+
+        Returns:
+            DataFrames keyed by team name
+        """
+        teams = [t for t in dict.fromkeys(teams) if t]
+        results = await asyncio.gather(
+            *(self.fetch_historical_data(t, limit, provider) for t in teams)
+        )
+        return dict(zip(teams, results))
+
+    async def fetch_board(self, sports: Iterable[str], market_type: str = "match_odds",
+                          history_limit: int = 50, events_provider: Optional[str] = None,
+                          odds_provider: Optional[str] = None) -> Dict:
+        """
+        Fetch a full cycle's data: live events for every sport, then odds and
+        team history for every event, all fanned out concurrently
+
+        Returns:
+            Dictionary with events by sport, odds by event id and history by team
+        """
+        start = time.perf_counter()
+        events = await self.fetch_all_live_events(sports, events_provider)
+
+        all_events = [e for sport_events in events.values() for e in sport_events]
+        event_ids = [e.get("event_id") for e in all_events if e.get("event_id")]
+        teams = [t for e in all_events for t in (e.get("home_team"), e.get("away_team"))]
+
+        odds, historical = await asyncio.gather(
+            self.fetch_all_event_odds(event_ids, market_type, odds_provider),
+            self.fetch_all_historical_data(teams, history_limit, events_provider),
+        )
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Fetched {len(all_events)} events across {len(events)} sports in {elapsed:.2f}s")
+
+        return {
+            "events": events,
+            "odds": odds,
+            "historical": historical,
+            "elapsed_seconds": elapsed,
+        }
+
+    def run_board(self, sports: Iterable[str], **kwargs) -> Dict:
+        """Blocking wrapper around `fetch_board` for synchronous callers"""
+        return asyncio.run(self.fetch_board(sports, **kwargs))
@@ -0,0 +1,291 @@
+"""
+Fetch Cache
+Tiered cache for provider responses: in-process LRU plus optional shared Redis
+"""
+import logging
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTLS = {
+    "live_events": 15.0,
+    "odds": 5.0,
+    "historical": 6 * 3600.0,
+}
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU with per-entry expiry
+    """
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            clock: Time source for expiry
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(hit, value) for a key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FetchCache:
+    """
+    Read-through cache for SportsDataFetcher responses
+
+    Lookups go local LRU -> Redis -> provider. Concurrent misses for the same
+    key are collapsed: threads in one process wait for a single loader call,
+    and worker processes sharing Redis wait on a short-lived lock key held by
+    whichever worker fetches first. Empty responses (provider errors) are not
+    cached. Redis values are pickled, so only point it at a trusted instance.
+    """
+
+    def __init__(self, local: Optional[LRUCache] = None, redis_client=None,
+                 ttls: Optional[Dict[str, float]] = None, default_ttl: float = 30.0,
+                 prefix: str = "apuestas:fetch:", lock_timeout: float = 10.0,
+                 poll_interval: float = 0.05):
+        """
+        Args:
+            local: In-process tier (default: 1024-entry LRUCache)
+            redis_client: Optional redis.Redis (or compatible) client for the shared tier
+            ttls: Seconds to keep each data type ("live_events", "odds", "historical")
+            default_ttl: TTL for data types missing from `ttls`
+            prefix: Namespace for Redis keys
+            lock_timeout: Longest a worker waits for another worker's fetch
+            poll_interval: Seconds between Redis checks while waiting
+        """
+        self.local = local if local is not None else LRUCache()
+        self.redis = redis_client
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "waits": 0, "redis_errors": 0}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "FetchCache":
+        """
+        Build the cache from Config (Redis tier only when REDIS_CACHE_ENABLED
+        and the server answers)
+        """
+        ttls = {
+            "live_events": getattr(config, "CACHE_TTL_LIVE_EVENTS", DEFAULT_TTLS["live_events"]),
+            "odds": getattr(config, "CACHE_TTL_ODDS", DEFAULT_TTLS["odds"]),
+            "historical": getattr(config, "CACHE_TTL_HISTORICAL", DEFAULT_TTLS["historical"]),
+        }
+        local = LRUCache(getattr(config, "CACHE_LOCAL_MAX_ENTRIES", 1024))
+
+        redis_client = None
+        if getattr(config, "REDIS_CACHE_ENABLED", False):
+            try:
+                import redis
+
+                redis_client = redis.Redis(
+                    host=config.REDIS_HOST,
+                    port=config.REDIS_PORT,
+                    db=config.REDIS_DB,
+                    password=config.REDIS_PASSWORD,
+                    socket_timeout=1.0,
+                )
+                redis_client.ping()
+            except ImportError:
+                logger.warning("redis package not installed - using in-process cache only")
+                redis_client = None
+            except Exception as e:
+                logger.warning(f"Redis unavailable ({str(e)}) - using in-process cache only")
+                redis_client = None
+
+        return cls(local=local, redis_client=redis_client, ttls=ttls)
+
+    def ttl_for(self, data_type: str) -> float:
+        return self.ttls.get(data_type, self.default_ttl)
+
+    @staticmethod
+    def make_key(data_type: str, *parts) -> str:
+        return ":".join([data_type, *(str(p) for p in parts)])
+
+    @staticmethod
+    def _is_empty(value: Any) -> bool:
+        if value is None:
+            return True
+        try:
+            return len(value) == 0
+        except TypeError:
+            return False
+
+    # Redis tier
+
+    def _redis_call(self, method: str, *args, **kwargs):
+        try:
+            return getattr(self.redis, method)(*args, **kwargs)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"Redis {method} failed: {str(e)}")
+            return None
+
+    def _redis_get(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        """(hit, value, seconds the value has left in Redis, or None if unknown)"""
+        raw = self._redis_call("get", self.prefix + key)
+        if raw is None:
+            return False, None, None
+        pttl = self._redis_call("pttl", self.prefix + key)
+        remaining = None if pttl is None or pttl == -1 else max(0, pttl) / 1000
+        return True, pickle.loads(raw), remaining
+
+    def _redis_set(self, key: str, value: Any, ttl: float) -> None:
+        self._redis_call("set", self.prefix + key, pickle.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def _wait_for_peer(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        """Poll Redis while another worker holds the fetch lock"""
+        lock_key = self.prefix + "lock:" + key
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            hit, value, remaining = self._redis_get(key)
+            if hit:
+                return True, value, remaining
+            if self._redis_call("get", lock_key) is None:
+                break
+        return False, None, None
+
+    def _fill_local(self, key: str, value: Any, ttl: float, remaining: Optional[float]) -> None:
+        """Copy a Redis hit into the local tier for no longer than it has left in Redis"""
+        if remaining is not None:
+            ttl = min(ttl, remaining)
+        if ttl > 0:
+            self.local.set(key, value, ttl)
+
+    # Lookups
+
+    def get_or_fetch(self, data_type: str, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Cached value for a key, calling `loader` at most once across concurrent misses
+
+        Args:
+            data_type: TTL class of the value ("live_events", "odds", "historical")
+            key: Cache key (see `make_key`)
+            loader: Fetches the value from the provider
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        hit, value = self.local.get(key)
+        if hit:
+            self.stats["local_hits"] += 1
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = {"done": threading.Event(), "value": None, "error": None}
+
+        if not leader:
+            self.stats["waits"] += 1
+            flight["done"].wait()
+            if flight["error"] is not None:
+                raise flight["error"]
+            return flight["value"]
+
+        try:
+            flight["value"] = self._load(data_type, key, loader)
+            return flight["value"]
+        except BaseException as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight["done"].set()
+
+    def _load(self, data_type: str, key: str, loader: Callable[[], Any]) -> Any:
+        ttl = self.ttl_for(data_type)
+
+        # Another thread may have filled the local tier while we registered
+        hit, value = self.local.get(key)
+        if hit:
+            self.stats["local_hits"] += 1
+            return value
+
+        token = None
+        if self.redis is not None:
+            hit, value, remaining = self._redis_get(key)
+            if hit:
+                self.stats["redis_hits"] += 1
+                self._fill_local(key, value, ttl, remaining)
+                return value
+
+            token = uuid.uuid4().hex
+            acquired = self._redis_call("set", self.prefix + "lock:" + key, token, nx=True,
+                                        px=int(self.lock_timeout * 1000))
+            if not acquired:
+                self.stats["waits"] += 1
+                hit, value, remaining = self._wait_for_peer(key)
+                if hit:
+                    self.stats["redis_hits"] += 1
+                    self._fill_local(key, value, ttl, remaining)
+                    return value
+                token = None
+
+        self.stats["misses"] += 1
+        try:
+            value = loader()
+            if not self._is_empty(value):
+                self.local.set(key, value, ttl)
+                if self.redis is not None:
+                    self._redis_set(key, value, ttl)
+            return value
+        finally:
+            if token is not None:
+                lock_key = self.prefix + "lock:" + key
+                held = self._redis_call("get", lock_key)
+                if held is not None and (held.decode() if isinstance(held, bytes) else held) == token:
+                    self._redis_call("delete", lock_key)
+
+    def invalidate(self, key: str) -> None:
+        """Drop a key from both tiers"""
+        self.local.delete(key)
+        if self.redis is not None:
+            self._redis_call("delete", self.prefix + key)
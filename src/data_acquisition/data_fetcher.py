@@ -5,8 +5,15 @@ Real-time data fetching from sports APIs and storage in database
 import requests
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .cache import FetchCache
+from .entities import EntityIndex
+from .ratings import TeamRatings, HISTORY_COLUMNS
+from .feature_store import TeamFeatureStore
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +23,26 @@ class SportsDataFetcher:
     Supports: Sportradar, Betfair, and other sports data providers
     """
     
-    def __init__(self, api_key: str, provider: str = "sportradar"):
+    def __init__(self, api_key: str, provider: str = "sportradar",
+                 base_urls: Optional[Dict[str, str]] = None,
+                 cache: Optional[FetchCache] = None):
         self.api_key = api_key
         self.provider = provider
+        self.cache = cache
         self.base_urls = {
             "sportradar": "https://api.sportradar.com/soccer/",
             "betfair": "https://api.betfair.com/exchange/betting/",
         }
+        if base_urls:
+            self.base_urls.update(base_urls)
         self.session = requests.Session()
+
+    def _cached(self, data_type: str, loader, *key_parts):
+        """Route a fetch through the shared cache when one is configured"""
+        if self.cache is None:
+            return loader(*key_parts)
+        key = FetchCache.make_key(data_type, self.provider, *key_parts)
+        return self.cache.get_or_fetch(data_type, key, lambda: loader(*key_parts))
         
     def fetch_live_events(self, sport: str = "soccer") -> List[Dict]:
         """
@@ -35,6 +54,9 @@ class SportsDataFetcher:
         Returns:
             List of live event dictionaries
         """
+        return self._cached("live_events", self._load_live_events, sport)
+
+    def _load_live_events(self, sport: str) -> List[Dict]:
         try:
             if self.provider == "sportradar":
                 return self._fetch_sportradar_events(sport)
@@ -68,11 +90,13 @@ class SportsDataFetcher:
                     "home_team": event.get("home", {}).get("name"),
                     "away_team": event.get("away", {}).get("name"),
                     "sport": sport,
+                    "competition": event.get("tournament", {}).get("name"),
                     "status": event.get("status"),
                     "current_time": event.get("time"),
                     "home_score": event.get("home", {}).get("score"),
                     "away_score": event.get("away", {}).get("score"),
                     "timestamp": datetime.now().isoformat(),
+                    "provider": self.provider,
                 })
             
             return processed_events
@@ -115,6 +139,9 @@ class SportsDataFetcher:
         Returns:
             Dictionary with odds data
         """
+        return self._cached("odds", self._load_event_odds, event_id, market_type)
+
+    def _load_event_odds(self, event_id: str, market_type: str) -> Dict:
         try:
             if self.provider == "betfair":
                 return self._fetch_betfair_odds(event_id, market_type)
@@ -137,7 +164,7 @@ class SportsDataFetcher:
             "timestamp": datetime.now().isoformat(),
         }
     
-    def fetch_historical_data(self, team: str, limit: int = 50) -> pd.DataFrame:
+    def fetch_historical_data(self, team: str, limit: int = 50) -> "pd.DataFrame":
         """
         Fetch historical match data for a team
         
@@ -148,6 +175,11 @@ class SportsDataFetcher:
         Returns:
             DataFrame with historical match data
         """
+        return self._cached("historical", self._load_historical_data, team, limit)
+
+    def _load_historical_data(self, team: str, limit: int) -> "pd.DataFrame":
+        import pandas as pd
+
         try:
             # Placeholder implementation - would connect to API
             data = {
@@ -178,6 +210,19 @@ class DataProcessor:
     """
     Process and standardize raw API data
     """
+
+    def __init__(self, ratings: Optional[TeamRatings] = None,
+                 feature_store: Optional[TeamFeatureStore] = None,
+                 entities: Optional[EntityIndex] = None):
+        """
+        Args:
+            ratings: Live team ratings used for form and rating context
+            feature_store: Live rolling team statistics (goals, possession, shots)
+            entities: Team name index; events then carry integer team and fixture ids
+        """
+        self.ratings = ratings
+        self.feature_store = feature_store
+        self.entities = entities
     
     @staticmethod
     def normalize_event_data(raw_event: Dict) -> Dict:
@@ -187,18 +232,72 @@ class DataProcessor:
             "home_team": raw_event.get("home_team"),
             "away_team": raw_event.get("away_team"),
             "sport": raw_event.get("sport"),
+            "competition": raw_event.get("competition"),
             "status": raw_event.get("status"),
             "home_score": raw_event.get("home_score", 0),
             "away_score": raw_event.get("away_score", 0),
             "timestamp": raw_event.get("timestamp"),
             "data_quality": "raw",
         }
+
+    def resolve_event(self, raw_event: Dict) -> Dict:
+        """
+        Normalize raw event data and, given an EntityIndex, add integer
+        home_team_id, away_team_id and fixture_id (resolved under the
+        event's provider, fuzzy matching only within its competition or sport)
+        """
+        event = self.normalize_event_data(raw_event)
+        if self.entities is not None and event["home_team"] and event["away_team"]:
+            provider = raw_event.get("provider")
+            scope = event["competition"] or event["sport"]
+            event["fixture_id"] = self.entities.fixture_id(event["home_team"], event["away_team"], provider, scope)
+            event["home_team_id"] = self.entities.lookup(event["home_team"], provider)
+            event["away_team_id"] = self.entities.lookup(event["away_team"], provider)
+        return event
     
-    @staticmethod
-    def enrich_event_with_context(event: Dict, historical_data: pd.DataFrame) -> Dict:
-        """Add contextual data to event (form, injuries, etc.)"""
-        event["home_form"] = None
-        event["away_form"] = None
+    def _team_keys(self, event: Dict, entities: EntityIndex) -> Tuple:
+        """(home, away) ids when the event's ids come from `entities`, else names"""
+        if entities is self.entities and event.get("home_team_id") is not None:
+            return event["home_team_id"], event["away_team_id"]
+        return event.get("home_team"), event.get("away_team")
+
+    def enrich_event_with_context(self, event: Dict, historical_data: "pd.DataFrame") -> Dict:
+        """
+        Add contextual data to event (form, injuries, etc.)
+
+        Form and ratings come from the live TeamRatings, and rolling goals,
+        possession and shots averages from the live TeamFeatureStore (as of
+        the event's timestamp). Either one missing is rebuilt from
+        `historical_data`. Teams without results keep None, so feature
+        defaults apply. Teams are looked up by their entity ids when the
+        event carries them and the ratings or store share this processor's
+        EntityIndex, otherwise by name.
+        """
+        import pandas as pd
+
+        has_history = (isinstance(historical_data, pd.DataFrame) and not historical_data.empty
+                       and set(HISTORY_COLUMNS) <= set(historical_data.columns))
+
+        ratings = self.ratings
+        if ratings is None and has_history:
+            ratings = TeamRatings.from_history(historical_data, entities=self.entities)
+        if ratings is not None:
+            event.update(ratings.match_features(*self._team_keys(event, ratings.entities)))
+        else:
+            event["home_form"] = None
+            event["away_form"] = None
+
+        feature_store = self.feature_store
+        if feature_store is None and has_history and "date" in historical_data.columns:
+            feature_store = TeamFeatureStore(entities=self.entities)
+            feature_store.ingest_history(historical_data)
+        if feature_store is not None:
+            times = [event["timestamp"]] if event.get("timestamp") is not None else None
+            home, away = self._team_keys(event, feature_store.entities)
+            fields = feature_store.match_features([home], [away], times)
+            for field, values in fields.items():
+                if values[0] is not None or field not in event:
+                    event[field] = values[0]
         event["injuries"] = []
         event["weather"] = None
         return event
@@ -0,0 +1,230 @@
+"""
+Entity Resolution
+Interning of provider team names to compact integer ids
+"""
+import difflib
+import json
+import logging
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tokens that carry no identity ("FC Barcelona" == "Barcelona")
+STOP_TOKENS = frozenset({
+    "fc", "cf", "afc", "sc", "ac", "cd", "ud", "sd", "rc", "ssc", "sl", "sv", "fk", "sk", "bk",
+    "club", "de", "the", "calcio", "futbol", "football",
+})
+
+DEFAULT_PROVIDER = "default"
+
+# A team name, or an id already issued by an EntityIndex
+TeamKey = Union[str, int]
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> str:
+    """
+    Canonical matching form of a team name: accents stripped, lowercase,
+    punctuation removed, "&" spelled "and", and club-type tokens dropped
+    """
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower().replace("&", " and ")
+    tokens = re.sub(r"[^a-z0-9]+", " ", text).split()
+    kept = [t for t in tokens if t not in STOP_TOKENS]
+    return " ".join(kept or tokens)
+
+
+def _numbers(normalized: str) -> Tuple[str, ...]:
+    return tuple(re.findall(r"\d+", normalized))
+
+
+class EntityIndex:
+    """
+    Provider name -> integer id resolution
+
+    Lookups go through, in order: an exact (provider, name) cache, the
+    normalized name, the alias table (normalized alias -> canonical name),
+    and a fuzzy `difflib` match against entities not yet named by the same
+    provider (a provider never names one team two ways) and already seen in
+    the same scope (sport or competition), so near-identical names from
+    different leagues stay apart. Names that still do not resolve become
+    new entities. Every resolution is cached, so
+    repeated lookups are a single dict hit and downstream code can key on
+    ints.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None, fuzzy_cutoff: Optional[float] = 0.88):
+        """
+        Args:
+            aliases: Alias -> canonical name
+            fuzzy_cutoff: Minimum difflib similarity for a fuzzy match (None disables)
+        """
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}  # normalized name -> id
+        self._providers: List[Set[str]] = []
+        self._scopes: List[Set[Optional[str]]] = []
+        self._aliases: Dict[str, str] = {}
+        self._canonical: Dict[str, str] = {}  # normalized canonical name -> display name
+        self._cache: Dict[Tuple[str, str], int] = {}
+        self._seen: Dict[str, int] = {}  # raw name -> id, from any provider
+        self._fixtures: Dict[Tuple[int, int], int] = {}
+        self.fuzzy_matches: List[Dict] = []
+        for alias, canonical in (aliases or {}).items():
+            self.add_alias(alias, canonical)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], **kwargs) -> "EntityIndex":
+        """Index with aliases from a JSON file ({"alias": "canonical name"})"""
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")), **kwargs)
+
+    @classmethod
+    def from_config(cls, config) -> "EntityIndex":
+        path = getattr(config, "ENTITY_ALIASES_PATH", None)
+        kwargs = {"fuzzy_cutoff": getattr(config, "ENTITY_FUZZY_CUTOFF", 0.88)}
+        if path and Path(path).exists():
+            return cls.from_file(path, **kwargs)
+        return cls(**kwargs)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def name(self, team: int) -> str:
+        """Display name of an entity id"""
+        return self.names[team]
+
+    def add_alias(self, alias: str, canonical: str) -> None:
+        """Resolve `alias` to the same entity as `canonical`"""
+        key = normalize_name(alias)
+        self._aliases[key] = normalize_name(canonical)
+        self._canonical[normalize_name(canonical)] = canonical
+        self._cache = {cached: team for cached, team in self._cache.items() if normalize_name(cached[1]) != key}
+        self._seen = {name: team for name, team in self._seen.items() if normalize_name(name) != key}
+
+    def _create(self, name: str, key: str) -> int:
+        team = self.ids[key] = len(self.names)
+        self.names.append(name)
+        self._providers.append(set())
+        self._scopes.append(set())
+        return team
+
+    def _fuzzy(self, key: str, provider: str, scope: Optional[str],
+               teams: Optional[Set[int]] = None) -> Optional[int]:
+        if self.fuzzy_cutoff is None:
+            return None
+        numbers = _numbers(key)
+        candidates = [k for k, team in self.ids.items()
+                      if provider not in self._providers[team] and scope in self._scopes[team]
+                      and (teams is None or team in teams) and _numbers(k) == numbers]
+        match = difflib.get_close_matches(key, candidates, n=1, cutoff=self.fuzzy_cutoff)
+        return self.ids[match[0]] if match else None
+
+    def _exact(self, name: str, provider: str) -> Optional[int]:
+        """Id of a cached, normalized or aliased name, without fuzzy matching"""
+        team = self._cache.get((provider, name))
+        if team is not None:
+            return team
+        key = normalize_name(name)
+        return self.ids.get(self._aliases.get(key, key))
+
+    def lookup(self, name: Optional[TeamKey], provider: Optional[str] = None) -> int:
+        """
+        Id of an already known name, or -1 (nothing is created)
+
+        Without a provider, a name any provider has resolved (including
+        through a fuzzy match) is known. Ids pass through unchanged.
+        """
+        if name is None:
+            return -1
+        if isinstance(name, (int, np.integer)):
+            return int(name) if 0 <= name < len(self.names) else -1
+        team = self._exact(name, provider or DEFAULT_PROVIDER)
+        if team is None and provider is None:
+            team = self._seen.get(name)
+        return -1 if team is None else team
+
+    def resolve(self, name: str, provider: Optional[str] = None, scope: Optional[str] = None) -> int:
+        """
+        Id for a provider's team name, creating a new entity if nothing matches
+
+        Args:
+            name: Team name as the provider spells it
+            provider: Data provider (None for the default provider)
+            scope: Sport or competition; fuzzy matches stay within it
+        """
+        return self._resolve(name, provider or DEFAULT_PROVIDER, scope)
+
+    def _resolve(self, name: str, provider: str, scope: Optional[str],
+                 teams: Optional[Set[int]] = None) -> int:
+        team = self._exact(name, provider)
+        if team is None:
+            key = normalize_name(name)
+            key = self._aliases.get(key, key)
+            team = self._fuzzy(key, provider, scope, teams)
+            if team is not None:
+                self.fuzzy_matches.append({"provider": provider, "name": name, "matched": self.names[team]})
+                logger.info(f"Fuzzy-matched {provider} team {name!r} to {self.names[team]!r}")
+            else:
+                team = self._create(self._canonical.get(key, name), key)
+
+        self._providers[team].add(provider)
+        self._scopes[team].add(scope)
+        self._cache[(provider, name)] = team
+        self._seen.setdefault(name, team)
+        return team
+
+    def resolve_many(self, names: Sequence[str], provider: Optional[str] = None,
+                     scope: Optional[str] = None) -> np.ndarray:
+        """Ids for many names of one provider"""
+        return np.fromiter((self.resolve(name, provider, scope) for name in names), dtype=np.int64, count=len(names))
+
+    def fixture_id(self, home_team: str, away_team: str, provider: Optional[str] = None,
+                   scope: Optional[str] = None) -> int:
+        """
+        Integer id of a (home, away) pairing, shared by every provider whose
+        team names resolve to the same entities
+
+        A fuzzy match is only taken when the fixture confirms it: the
+        opponent resolves exactly and another provider already listed the
+        matched team against that opponent.
+        """
+        provider = provider or DEFAULT_PROVIDER
+        home, away = self._exact(home_team, provider), self._exact(away_team, provider)
+        if home is None and away is not None:
+            teams = {h for h, a in self._fixtures if a == away}
+            pair = (self._resolve(home_team, provider, scope, teams), self._resolve(away_team, provider, scope))
+        elif away is None and home is not None:
+            teams = {a for h, a in self._fixtures if h == home}
+            pair = (self._resolve(home_team, provider, scope), self._resolve(away_team, provider, scope, teams))
+        else:
+            pair = (self._resolve(home_team, provider, scope, set()), self._resolve(away_team, provider, scope, set()))
+        fixture = self._fixtures.get(pair)
+        if fixture is None:
+            fixture = self._fixtures[pair] = len(self._fixtures)
+        return fixture
+
+    # Persistence
+
+    def to_dict(self) -> Dict:
+        return {
+            "names": self.names,
+            "keys": sorted(self.ids, key=self.ids.get),
+            "aliases": self._aliases,
+            "canonical": self._canonical,
+            "fuzzy_cutoff": self.fuzzy_cutoff,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EntityIndex":
+        index = cls(fuzzy_cutoff=data.get("fuzzy_cutoff", 0.88))
+        index._aliases = dict(data.get("aliases", {}))
+        index._canonical = dict(data.get("canonical", {}))
+        for name, key in zip(data["names"], data["keys"]):
+            index._create(name, key)
+        return index
@@ -0,0 +1,339 @@
+"""
+Feature Store
+Per-team rolling and exponentially weighted match statistics with point-in-time lookups
+"""
+import logging
+import math
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .entities import EntityIndex, TeamKey
+from .ratings import conflict_free_batches
+from .tick_store import Timestamp, to_micros
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Statistic -> (column for the home side, column for the away side) in match history rows
+STATS = {
+    "goals": ("home_score", "away_score"),
+    "conceded": ("away_score", "home_score"),
+    "possession": ("possession_home", "possession_away"),
+    "shots": ("shots_home", "shots_away"),
+    "corners": ("corners_home", "corners_away"),
+    "goals_first_half": ("home_goals_first_half", "away_goals_first_half"),
+    "goals_second_half": ("home_goals_second_half", "away_goals_second_half"),
+}
+
+# Event fields read by MATCH_FEATURE_SCHEMA -> (side, statistic)
+EVENT_FIELDS = {
+    "recent_goals_home": ("home", "goals"),
+    "recent_goals_away": ("away", "goals"),
+    "home_possession_avg": ("home", "possession"),
+    "away_possession_avg": ("away", "possession"),
+    "home_shots_avg": ("home", "shots"),
+    "away_shots_avg": ("away", "shots"),
+}
+
+# Composite key team * KEY_SPAN + epoch seconds keeps one team's rows contiguous and time-ordered
+KEY_SPAN = 1 << 34
+
+
+def _to_seconds(timestamps) -> np.ndarray:
+    """Epoch seconds for a sequence of datetimes, ISO strings or epoch seconds"""
+    import pandas as pd
+
+    series = pd.Series(timestamps)
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64).astype(np.int64)
+    micros = pd.to_datetime(series, utc=True).dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+    return micros.astype(np.int64) // 1_000_000
+
+
+class TeamFeatureStore:
+    """
+    Rolling (last `window` matches) and exponentially weighted team statistics
+
+    Every ingested result adds one observation per team to an append-only
+    log, along with the team's exponentially weighted means after that
+    match. Per-team ring buffers keep the current rolling sums, so
+    `current()` is an O(1) gather per team.
+
+    `as_of()` answers point-in-time lookups for a batch of (team, time)
+    pairs without leaking later results: the log is sorted by the composite
+    key (team, time) and each statistic prefix-summed, so the last N
+    matches strictly before a time are one `searchsorted` and a cumsum
+    difference per row. The sorted index is rebuilt lazily after ingests.
+
+    Results must arrive in chronological order per team; missing (NaN)
+    statistics are skipped by both averages.
+    """
+
+    TEAM_TABLES = ("_ring", "_ring_pos", "_ring_count", "_games", "_sums", "_valid", "_ewm", "_last_time")
+
+    def __init__(self, window: int = 5, halflife: float = 3.0,
+                 stats: Sequence[str] = tuple(STATS), capacity: int = 1024,
+                 entities: Optional[EntityIndex] = None):
+        """
+        Args:
+            window: Matches in the rolling average
+            halflife: Matches for an observation's EWM weight to halve
+            stats: Statistics to track (keys of STATS)
+            capacity: Initial observation slots
+            entities: Team name index (default: a private one)
+        """
+        unknown = [s for s in stats if s not in STATS]
+        if unknown:
+            raise ValueError(f"Unknown statistics: {unknown}")
+
+        self.window = window
+        self.halflife = halflife
+        self.alpha = 1.0 - math.exp(math.log(0.5) / halflife)
+        self.stats = list(stats)
+
+        self.entities = entities if entities is not None else EntityIndex()
+        self.size = 0
+        self._log_team = np.zeros(capacity, dtype=np.int64)
+        self._log_time = np.zeros(capacity, dtype=np.int64)
+        self._log_values = np.zeros((capacity, len(self.stats)))
+        self._log_ewm = np.zeros((capacity, len(self.stats)))
+        self._allocate_teams(max(64, len(self.entities)))
+        self._index = None
+
+    # Tables
+
+    def _allocate_teams(self, capacity: int) -> None:
+        n_stats = len(self.stats)
+        self._ring = np.zeros((capacity, self.window, n_stats))
+        self._ring_pos = np.zeros(capacity, dtype=np.int64)
+        self._ring_count = np.zeros(capacity, dtype=np.int64)
+        self._games = np.zeros(capacity, dtype=np.int64)
+        self._sums = np.zeros((capacity, n_stats))
+        self._valid = np.zeros((capacity, n_stats))
+        self._ewm = np.full((capacity, n_stats), np.nan)
+        self._last_time = np.full(capacity, np.iinfo(np.int64).min)
+
+    @property
+    def names(self) -> List[str]:
+        return self.entities.names
+
+    def team_id(self, name: str) -> int:
+        """Integer id of a team, assigned on first sight"""
+        team = self.entities.resolve(name)
+        capacity = len(self._ring)
+        if team >= capacity:
+            old = {table: getattr(self, table) for table in self.TEAM_TABLES}
+            self._allocate_teams(max(team + 1, capacity * 2))
+            for table, values in old.items():
+                getattr(self, table)[:capacity] = values
+        return team
+
+    def _lookup_ids(self, names: Sequence[TeamKey]) -> np.ndarray:
+        """Ids of known teams (names or ids), -1 for unseen ones"""
+        ids = np.fromiter((self.entities.lookup(name) for name in names), dtype=np.int64, count=len(names))
+        return np.where(ids < len(self._ring), ids, -1)
+
+    def _reserve(self, extra: int) -> None:
+        capacity = len(self._log_team)
+        if self.size + extra <= capacity:
+            return
+        capacity = max(self.size + extra, capacity * 2)
+        for name in ("_log_team", "_log_time", "_log_values", "_log_ewm"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self.size] = old[:self.size]
+            setattr(self, name, grown)
+
+    # Ingest
+
+    def _push(self, teams: np.ndarray, seconds: np.ndarray, values: np.ndarray) -> None:
+        """Add one observation per team (teams must be distinct)"""
+        if np.any(seconds < self._last_time[teams]):
+            late = [self.names[t] for t in teams[seconds < self._last_time[teams]]]
+            raise ValueError(f"Results must be ingested in chronological order per team: {late}")
+
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+
+        # Rolling window: replace the oldest slot once the ring is full
+        pos = self._ring_pos[teams]
+        full = (self._ring_count[teams] >= self.window)[:, None]
+        old = self._ring[teams, pos]
+        self._sums[teams] += filled - np.where(full, np.nan_to_num(old), 0.0)
+        self._valid[teams] += valid - np.where(full, ~np.isnan(old), 0.0)
+        self._ring[teams, pos] = values
+        self._ring_pos[teams] = (pos + 1) % self.window
+        self._ring_count[teams] = np.minimum(self._ring_count[teams] + 1, self.window)
+        self._games[teams] += 1
+
+        # EWM: the first value seeds the mean, NaNs leave it unchanged
+        ewm = self._ewm[teams]
+        ewm = np.where(valid, np.where(np.isnan(ewm), values, ewm + self.alpha * (filled - ewm)), ewm)
+        self._ewm[teams] = ewm
+        self._last_time[teams] = seconds
+
+        self._reserve(len(teams))
+        rows = slice(self.size, self.size + len(teams))
+        self._log_team[rows] = teams
+        self._log_time[rows] = seconds
+        self._log_values[rows] = values
+        self._log_ewm[rows] = ewm
+        self.size += len(teams)
+        self._index = None
+
+    def _side_values(self, match: Dict, side: int) -> np.ndarray:
+        values = []
+        for stat in self.stats:
+            value = match.get(STATS[stat][side])
+            values.append(np.nan if value is None else float(value))
+        return np.array(values)
+
+    def ingest(self, match: Dict, timestamp: Optional[Timestamp] = None) -> None:
+        """
+        Add one finished match (a historical data row: home_team, away_team,
+        home_score, away_score, possession_home, ...)
+
+        Args:
+            match: Match result fields
+            timestamp: Kick-off time (default: the match's date or timestamp field)
+        """
+        timestamp = timestamp if timestamp is not None else match.get("date", match.get("timestamp"))
+        if timestamp is None:
+            raise ValueError("Match result has no date")
+        if hasattr(timestamp, "to_pydatetime"):  # pandas Timestamp
+            timestamp = timestamp.to_pydatetime()
+        seconds = to_micros(timestamp) // 1_000_000
+
+        teams = np.array([self.team_id(match["home_team"]), self.team_id(match["away_team"])])
+        if teams[0] == teams[1]:
+            raise ValueError(f"Team {match['home_team']} cannot play itself")
+        self._push(teams, np.array([seconds, seconds]),
+                   np.vstack([self._side_values(match, 0), self._side_values(match, 1)]))
+
+    def ingest_history(self, history: "pd.DataFrame") -> int:
+        """
+        Add many finished matches at once, in batches of matches sharing no team
+
+        Returns:
+            Number of matches ingested
+        """
+        if history is None or history.empty:
+            return 0
+        history = history.sort_values("date", kind="stable").reset_index(drop=True)
+        home = np.fromiter((self.team_id(t) for t in history["home_team"]), dtype=np.int64, count=len(history))
+        away = np.fromiter((self.team_id(t) for t in history["away_team"]), dtype=np.int64, count=len(history))
+        seconds = _to_seconds(history["date"])
+
+        sides = []
+        for side in (0, 1):
+            columns = [STATS[stat][side] for stat in self.stats]
+            sides.append(np.column_stack([
+                history[c].to_numpy(dtype=np.float64, na_value=np.nan) if c in history.columns
+                else np.full(len(history), np.nan)
+                for c in columns
+            ]))
+
+        for rows in conflict_free_batches(home, away, len(self.entities)):
+            self._push(np.concatenate([home[rows], away[rows]]),
+                       np.concatenate([seconds[rows], seconds[rows]]),
+                       np.vstack([sides[0][rows], sides[1][rows]]))
+        return len(history)
+
+    # Lookups
+
+    def _build_index(self) -> Dict[str, np.ndarray]:
+        n = self.size
+        keys = self._log_team[:n] * KEY_SPAN + self._log_time[:n]
+        order = np.argsort(keys, kind="stable")
+        values = self._log_values[:n][order]
+        valid = ~np.isnan(values)
+
+        zeros = np.zeros((1, len(self.stats)))
+        self._index = {
+            "keys": keys[order],
+            "sums": np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=0)]),
+            "valid": np.concatenate([zeros, np.cumsum(valid, axis=0)]),
+            "ewm": self._log_ewm[:n][order],
+        }
+        return self._index
+
+    def as_of(self, teams: Sequence[TeamKey], times: Sequence[Timestamp]) -> Dict[str, np.ndarray]:
+        """
+        Statistics from each team's matches strictly before the paired time
+
+        Args:
+            teams: Team names or EntityIndex ids
+            times: Lookup time per team
+
+        Returns:
+            Columnar dict: matches, <stat>_avg and <stat>_ewm per statistic
+            (NaN where the team had no earlier match with that statistic)
+        """
+        ids = self._lookup_ids(list(teams))
+        if self.size == 0 or len(ids) == 0:
+            n_stats = len(self.stats)
+            return self._columns(np.zeros(len(ids), dtype=np.int64), np.zeros((len(ids), n_stats)),
+                                 np.zeros((len(ids), n_stats)), np.full((len(ids), n_stats), np.nan))
+        seconds = _to_seconds(list(times))
+        index = self._index if self._index is not None else self._build_index()
+        keys = index["keys"]
+
+        known = ids >= 0
+        team_base = np.where(known, ids, 0) * KEY_SPAN
+        start = np.searchsorted(keys, team_base, side="left")
+        end = np.searchsorted(keys, team_base + seconds, side="left")
+        end = np.where(known, end, start)
+        matches = end - start
+        first = end - np.minimum(matches, self.window)
+
+        sums = index["sums"][end] - index["sums"][first]
+        valid = index["valid"][end] - index["valid"][first]
+        ewm = np.where((matches > 0)[:, None], index["ewm"][np.maximum(end - 1, 0)], np.nan)
+        return self._columns(matches, sums, valid, ewm)
+
+    def current(self, teams: Sequence[TeamKey]) -> Dict[str, np.ndarray]:
+        """Statistics over every ingested match (same columns as `as_of`)"""
+        ids = self._lookup_ids(list(teams))
+        known = ids >= 0
+        safe = np.where(known, ids, 0)
+        matches = np.where(known, self._games[safe], 0)
+        sums = np.where(known[:, None], self._sums[safe], 0.0)
+        valid = np.where(known[:, None], self._valid[safe], 0.0)
+        ewm = np.where(known[:, None], self._ewm[safe], np.nan)
+        return self._columns(matches, sums, valid, ewm)
+
+    def _columns(self, matches, sums, valid, ewm) -> Dict[str, np.ndarray]:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(valid > 0, sums / valid, np.nan)
+        columns = {"matches": matches}
+        for j, stat in enumerate(self.stats):
+            columns[f"{stat}_avg"] = means[:, j]
+            columns[f"{stat}_ewm"] = ewm[:, j]
+        return columns
+
+    def match_features(self, home_teams: Sequence[TeamKey], away_teams: Sequence[TeamKey],
+                       times: Optional[Sequence[Timestamp]] = None) -> Dict[str, List[Optional[float]]]:
+        """
+        Event fields for MatchPredictor (recent goals, possession and shots
+        averages) for a batch of fixtures; None where a team has no history
+
+        Args:
+            home_teams: Home team per fixture
+            away_teams: Away team per fixture
+            times: Kick-off per fixture for point-in-time values (default: latest)
+        """
+        if times is None:
+            home, away = self.current(home_teams), self.current(away_teams)
+        else:
+            home, away = self.as_of(home_teams, times), self.as_of(away_teams, times)
+
+        fields = {}
+        for field, (side, stat) in EVENT_FIELDS.items():
+            if stat not in self.stats:
+                continue
+            values = (home if side == "home" else away)[f"{stat}_avg"]
+            fields[field] = [None if np.isnan(v) else float(v) for v in values]
+        return fields
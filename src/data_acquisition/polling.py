@@ -0,0 +1,285 @@
+"""
+Adaptive Odds Polling
+Per-event refresh intervals driven by kickoff time, in-play state and price volatility
+"""
+import heapq
+import logging
+import math
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+IN_PLAY_STATUSES = {"live", "inprogress", "in_progress", "in_play", "1st_half", "2nd_half", "halftime"}
+FINISHED_STATUSES = {"closed", "ended", "finished", "cancelled", "abandoned", "postponed"}
+
+# (seconds to kickoff upper bound, refresh interval in seconds), checked in order
+DEFAULT_PRE_MATCH_TIERS = (
+    (15 * 60, 30.0),
+    (2 * 3600, 120.0),
+    (24 * 3600, 600.0),
+    (math.inf, 3600.0),
+)
+
+
+def to_epoch_seconds(value: Union[datetime, str, int, float, None]) -> Optional[float]:
+    """
+    Convert a datetime, ISO string or epoch seconds to epoch seconds
+    Naive datetimes are taken as UTC
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+class AdaptivePollScheduler:
+    """
+    Priority scheduler deciding which events' odds to refresh next
+
+    Each event gets a refresh interval: in-play events poll fastest, pre-match
+    events slow down with time to kickoff, and recent price volatility shortens
+    the interval further. Due events are kept in a min-heap keyed by due time.
+    A sliding one-minute window caps total requests; when the budget is short,
+    the events most overdue relative to their own interval go first.
+
+    Time comes from `clock` (epoch seconds), so tests can drive a virtual clock.
+    """
+
+    def __init__(self, max_requests_per_minute: int = 60, in_play_interval: float = 10.0,
+                 pre_match_tiers=DEFAULT_PRE_MATCH_TIERS, unknown_kickoff_interval: float = 300.0,
+                 min_interval: float = 5.0, volatility_weight: float = 200.0,
+                 volatility_halflife: int = 5, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            max_requests_per_minute: Global odds request budget
+            in_play_interval: Refresh interval for live events
+            pre_match_tiers: (seconds to kickoff, interval) pairs, nearest kickoff first
+            unknown_kickoff_interval: Interval for pre-match events without a kickoff time
+            min_interval: Floor applied after the volatility adjustment
+            volatility_weight: Interval is divided by (1 + weight * volatility), where
+                volatility is the smoothed mean absolute log price change per poll
+            volatility_halflife: Polls over which a price move's weight halves
+            clock: Time source in epoch seconds
+        """
+        self.max_requests_per_minute = max_requests_per_minute
+        self.in_play_interval = in_play_interval
+        self.pre_match_tiers = tuple(pre_match_tiers)
+        self.unknown_kickoff_interval = unknown_kickoff_interval
+        self.min_interval = min_interval
+        self.volatility_weight = volatility_weight
+        self.volatility_alpha = 1.0 - 0.5 ** (1.0 / max(1, volatility_halflife))
+        self.clock = clock
+
+        self.events = {}
+        self._heap = []
+        self._requests = deque()
+
+    # Event state
+
+    def track(self, event_id: str, kickoff=None, status: Optional[str] = None) -> None:
+        """Add an event or update its kickoff/status, rescheduling if its interval shrank"""
+        status = (status or "").lower()
+        if status in FINISHED_STATUSES:
+            self.untrack(event_id)
+            return
+
+        state = self.events.get(event_id)
+        if state is None:
+            state = self.events[event_id] = {
+                "kickoff": None, "status": "", "volatility": 0.0,
+                "last_prices": {}, "last_polled": None, "due": None, "version": 0, "polls": 0,
+            }
+        if kickoff is not None:
+            state["kickoff"] = to_epoch_seconds(kickoff)
+        if status:
+            state["status"] = status
+
+        now = self.clock()
+        if state["due"] is None:
+            self._schedule(event_id, now)
+        elif state["last_polled"] is not None:
+            # e.g. kickoff: pull the next refresh forward to the new, shorter interval
+            due = max(now, state["last_polled"] + self.interval_for(event_id))
+            if due < state["due"]:
+                self._schedule(event_id, due)
+
+    def untrack(self, event_id: str) -> None:
+        """Stop polling an event (stale heap entries are skipped lazily)"""
+        self.events.pop(event_id, None)
+
+    def sync_board(self, events: Iterable[Dict], board: Optional[str] = None) -> None:
+        """
+        Update tracked events from `SportsDataFetcher.fetch_live_events` output
+        (events may carry `kickoff` or `scheduled` start times)
+
+        Events previously synced from the same board but missing from it now
+        (e.g. finished matches dropping off a live feed) are untracked.
+
+        Args:
+            events: The board's current events
+            board: Board name (e.g. the sport) when several boards share the scheduler
+        """
+        seen = set()
+        for event in events:
+            event_id = event.get("event_id")
+            if event_id is None:
+                continue
+            seen.add(event_id)
+            self.track(event_id, kickoff=event.get("kickoff", event.get("scheduled")),
+                       status=event.get("status"))
+            if event_id in self.events:
+                self.events[event_id]["board"] = board
+
+        dropped = [
+            event_id for event_id, state in self.events.items()
+            if event_id not in seen and "board" in state and state["board"] == board
+        ]
+        for event_id in dropped:
+            self.untrack(event_id)
+
+    def is_in_play(self, event_id: str) -> bool:
+        state = self.events[event_id]
+        if state["status"] in IN_PLAY_STATUSES:
+            return True
+        return state["kickoff"] is not None and state["kickoff"] <= self.clock() and not state["status"]
+
+    def interval_for(self, event_id: str) -> float:
+        """Current refresh interval for an event in seconds"""
+        state = self.events[event_id]
+        if self.is_in_play(event_id):
+            base = self.in_play_interval
+        elif state["kickoff"] is None:
+            base = self.unknown_kickoff_interval
+        else:
+            to_kickoff = state["kickoff"] - self.clock()
+            base = next(interval for bound, interval in self.pre_match_tiers if to_kickoff <= bound)
+        return max(self.min_interval, base / (1.0 + self.volatility_weight * state["volatility"]))
+
+    def _schedule(self, event_id: str, due: float) -> None:
+        state = self.events[event_id]
+        state["version"] += 1
+        state["due"] = due
+        heapq.heappush(self._heap, (due, state["version"], event_id))
+
+    # Budget
+
+    def _trim_window(self, now: float) -> None:
+        while self._requests and self._requests[0] <= now - 60.0:
+            self._requests.popleft()
+
+    def remaining_budget(self) -> int:
+        """Requests still allowed in the current one-minute window"""
+        self._trim_window(self.clock())
+        return max(0, self.max_requests_per_minute - len(self._requests))
+
+    # Polling
+
+    def due(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Events to poll now, within the request budget
+
+        Args:
+            limit: Optional further cap on the number returned
+
+        Returns:
+            Event ids, most overdue (relative to their interval) first
+        """
+        now = self.clock()
+        budget = self.remaining_budget()
+        if limit is not None:
+            budget = min(budget, limit)
+
+        candidates = []
+        while self._heap and self._heap[0][0] <= now:
+            due, version, event_id = heapq.heappop(self._heap)
+            state = self.events.get(event_id)
+            if state is None or state["version"] != version:
+                continue
+            lateness = (now - due) / self.interval_for(event_id)
+            candidates.append((-lateness, due, event_id))
+
+        candidates.sort()
+        selected = [event_id for _, _, event_id in candidates[:budget]]
+        for _, due, event_id in candidates[budget:]:
+            # Over budget: keep the original due time so lateness keeps growing
+            heapq.heappush(self._heap, (due, self.events[event_id]["version"], event_id))
+        return selected
+
+    def mark_polled(self, event_id: str, prices: Optional[Dict[str, float]] = None) -> None:
+        """
+        Record a completed odds request and schedule the event's next refresh
+
+        Args:
+            event_id: Polled event
+            prices: {selection: price} observed, used to update volatility
+        """
+        now = self.clock()
+        self._requests.append(now)
+
+        state = self.events.get(event_id)
+        if state is None:
+            return
+
+        if prices:
+            moves = [
+                abs(math.log(price / state["last_prices"][selection]))
+                for selection, price in prices.items()
+                if price > 0 and state["last_prices"].get(selection, 0) > 0
+            ]
+            if moves:
+                change = sum(moves) / len(moves)
+                state["volatility"] += self.volatility_alpha * (change - state["volatility"])
+            state["last_prices"] = dict(prices)
+
+        state["last_polled"] = now
+        state["polls"] += 1
+        self._schedule(event_id, now + self.interval_for(event_id))
+
+    def seconds_until_due(self) -> Optional[float]:
+        """
+        Seconds until the next poll may run (0 if one is due and budget allows),
+        or None when nothing is tracked
+        """
+        now = self.clock()
+        while self._heap:
+            due, version, event_id = self._heap[0]
+            state = self.events.get(event_id)
+            if state is not None and state["version"] == version:
+                break
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+
+        wait = max(0.0, self._heap[0][0] - now)
+        if self.remaining_budget() == 0:
+            wait = max(wait, self._requests[0] + 60.0 - now)
+        return wait
+
+    def run_pending(self, fetch_prices: Callable[[str], Optional[Dict[str, float]]]) -> List[str]:
+        """
+        Poll every due event within budget
+
+        Args:
+            fetch_prices: Fetches one event's odds and returns {selection: price}
+
+        Returns:
+            Event ids polled
+        """
+        polled = []
+        for event_id in self.due():
+            try:
+                prices = fetch_prices(event_id)
+            except Exception as e:
+                logger.error(f"Error polling odds for {event_id}: {str(e)}")
+                prices = None
+            self.mark_polled(event_id, prices)
+            polled.append(event_id)
+        return polled
@@ -0,0 +1,360 @@
+"""
+Team Ratings
+Elo/Glicko team ratings and rolling form in array-backed tables
+"""
+import logging
+import math
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .entities import EntityIndex, TeamKey
+from .tick_store import Timestamp, to_micros
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MICROS_PER_DAY = 86_400_000_000
+HISTORY_COLUMNS = ("home_team", "away_team", "home_score", "away_score")
+Q = math.log(10) / 400.0
+
+
+def conflict_free_batches(home: np.ndarray, away: np.ndarray, n_teams: int) -> List[np.ndarray]:
+    """
+    Split chronologically ordered matches into batches in which no team appears twice
+
+    A match goes in the batch after the latest one holding either of its
+    teams, so applying the batches in order replays each team's matches in
+    order.
+
+    Returns:
+        Row indices per batch
+    """
+    level = [0] * n_teams
+    batch = np.empty(len(home), dtype=np.int64)
+    for i, (h, a) in enumerate(zip(home.tolist(), away.tolist())):
+        b = max(level[h], level[a])
+        batch[i] = b
+        level[h] = level[a] = b + 1
+
+    order = np.argsort(batch, kind="stable")
+    return np.split(order, np.flatnonzero(np.diff(batch[order])) + 1)
+
+
+def _g(rd):
+    return 1.0 / np.sqrt(1.0 + 3.0 * Q * Q * rd * rd / (math.pi ** 2))
+
+
+class TeamRatings:
+    """
+    Ratings, rating deviations and rolling form for every team
+
+    Teams are interned to integer ids by an EntityIndex (shareable with
+    the feature store and exposure tracking, so provider spellings of one
+    team land on one row); every per-team quantity lives in a NumPy array
+    indexed by that id, and the last `form_window` results sit in
+    a ring buffer with running sums. `update()` applies one result in O(1).
+    `rebuild()` replays a whole league history in batches of matches that
+    share no team, so each batch is a handful of vectorized array operations
+    and the result equals applying `update()` match by match.
+
+    With method="elo", ratings move by `k_factor * (score - expected)`. With
+    method="glicko", each team also carries a rating deviation (Glicko-1,
+    one game per rating period) that grows by `rd_growth` per idle day and
+    sets how far a result moves the rating.
+    """
+
+    TABLES = ("rating", "rd", "games", "last_day", "form_points", "form_goals",
+              "form_pos", "form_count", "points_sum", "goals_sum")
+
+    def __init__(self, method: str = "elo", initial_rating: float = 1500.0,
+                 k_factor: float = 20.0, home_advantage: float = 60.0,
+                 initial_rd: float = 350.0, min_rd: float = 30.0, rd_growth: float = 5.0,
+                 form_window: int = 5, capacity: int = 256,
+                 entities: Optional[EntityIndex] = None):
+        """
+        Args:
+            method: "elo" or "glicko"
+            initial_rating: Rating of a new team
+            k_factor: Elo step size
+            home_advantage: Rating points added to the home side's expectation
+            initial_rd: Glicko rating deviation of a new team (also the cap)
+            min_rd: Glicko rating deviation floor
+            rd_growth: Glicko deviation added per idle day (in quadrature)
+            form_window: Results kept for rolling form and goals
+            capacity: Initial number of team slots
+            entities: Team name index (default: a private one)
+        """
+        if method not in ("elo", "glicko"):
+            raise ValueError(f"Unknown rating method: {method}")
+
+        self.method = method
+        self.initial_rating = initial_rating
+        self.k_factor = k_factor
+        self.home_advantage = home_advantage
+        self.initial_rd = initial_rd
+        self.min_rd = min_rd
+        self.rd_growth = rd_growth
+        self.form_window = form_window
+
+        self.entities = entities if entities is not None else EntityIndex()
+        self._allocate(max(capacity, len(self.entities)))
+
+    # Tables
+
+    def _allocate(self, capacity: int) -> None:
+        self.rating = np.full(capacity, self.initial_rating)
+        self.rd = np.full(capacity, self.initial_rd)
+        self.games = np.zeros(capacity, dtype=np.int32)
+        self.last_day = np.full(capacity, np.nan)
+        self.form_points = np.zeros((capacity, self.form_window), dtype=np.float32)
+        self.form_goals = np.zeros((capacity, self.form_window), dtype=np.float32)
+        self.form_pos = np.zeros(capacity, dtype=np.int32)
+        self.form_count = np.zeros(capacity, dtype=np.int32)
+        self.points_sum = np.zeros(capacity)
+        self.goals_sum = np.zeros(capacity)
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.rating)
+        if needed <= capacity:
+            return
+        old = {name: getattr(self, name) for name in self.TABLES}
+        self._allocate(max(needed, capacity * 2))
+        for name, values in old.items():
+            getattr(self, name)[:capacity] = values
+
+    @property
+    def names(self) -> List[str]:
+        return self.entities.names
+
+    def team_id(self, name: str) -> int:
+        """Integer id of a team, assigned on first sight"""
+        team = self.entities.resolve(name)
+        self._grow(team + 1)
+        return team
+
+    def _known(self, name: Optional[TeamKey]) -> Optional[int]:
+        """Id of a team with at least one result, else None"""
+        team = self.entities.lookup(name)
+        if 0 <= team < len(self.rating) and self.games[team] > 0:
+            return team
+        return None
+
+    def team_ids(self, names: Sequence[str]) -> np.ndarray:
+        """Integer ids for many team names (new names are assigned ids)"""
+        return np.fromiter((self.team_id(name) for name in names), dtype=np.int64, count=len(names))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.games))
+
+    # Rating maths (elementwise: scalars or aligned arrays)
+
+    def _inflate_rd(self, teams, days):
+        rd = self.rd[teams]
+        if days is None:
+            return rd
+        idle = np.nan_to_num(days - self.last_day[teams], nan=0.0)
+        return np.minimum(np.sqrt(rd * rd + self.rd_growth ** 2 * np.maximum(idle, 0.0)), self.initial_rd)
+
+    def _rate(self, home, away, score, days):
+        """New (rating, rd) for both sides from pre-match values; score is 1/0.5/0 for home"""
+        r_h, r_a = self.rating[home], self.rating[away]
+        diff = r_h + self.home_advantage - r_a
+
+        if self.method == "elo":
+            expected = 1.0 / (1.0 + 10.0 ** (-diff / 400.0))
+            delta = self.k_factor * (score - expected)
+            return r_h + delta, self.rd[home], r_a - delta, self.rd[away]
+
+        rd_h, rd_a = self._inflate_rd(home, days), self._inflate_rd(away, days)
+        g_h, g_a = _g(rd_h), _g(rd_a)
+        e_h = 1.0 / (1.0 + 10.0 ** (-g_a * diff / 400.0))
+        e_a = 1.0 / (1.0 + 10.0 ** (g_h * diff / 400.0))
+        inv_h = 1.0 / (rd_h * rd_h) + Q * Q * g_a * g_a * e_h * (1.0 - e_h)
+        inv_a = 1.0 / (rd_a * rd_a) + Q * Q * g_h * g_h * e_a * (1.0 - e_a)
+        return (
+            r_h + Q / inv_h * g_a * (score - e_h),
+            np.maximum(np.sqrt(1.0 / inv_h), self.min_rd),
+            r_a + Q / inv_a * g_h * ((1.0 - score) - e_a),
+            np.maximum(np.sqrt(1.0 / inv_a), self.min_rd),
+        )
+
+    def _push_form(self, teams, points, goals) -> None:
+        """Append one result per team to the rolling windows (teams must be distinct)"""
+        pos = self.form_pos[teams]
+        full = self.form_count[teams] >= self.form_window
+        self.points_sum[teams] += points - np.where(full, self.form_points[teams, pos], 0.0)
+        self.goals_sum[teams] += goals - np.where(full, self.form_goals[teams, pos], 0.0)
+        self.form_points[teams, pos] = points
+        self.form_goals[teams, pos] = goals
+        self.form_pos[teams] = (pos + 1) % self.form_window
+        self.form_count[teams] = np.minimum(self.form_count[teams] + 1, self.form_window)
+
+    def _apply(self, home, away, home_score, away_score, days) -> None:
+        score = np.where(home_score > away_score, 1.0, np.where(home_score < away_score, 0.0, 0.5))
+        r_h, rd_h, r_a, rd_a = self._rate(home, away, score, days)
+        self.rating[home], self.rd[home] = r_h, rd_h
+        self.rating[away], self.rd[away] = r_a, rd_a
+        self.games[home] += 1
+        self.games[away] += 1
+        if days is not None:
+            self.last_day[home] = days
+            self.last_day[away] = days
+
+        teams = np.concatenate([np.atleast_1d(home), np.atleast_1d(away)])
+        self._push_form(
+            teams,
+            np.concatenate([np.atleast_1d(score), 1.0 - np.atleast_1d(score)]),
+            np.concatenate([np.atleast_1d(home_score), np.atleast_1d(away_score)]).astype(np.float64),
+        )
+
+    # Updates
+
+    def update(self, home_team: str, away_team: str, home_score: int, away_score: int,
+               timestamp: Optional[Timestamp] = None) -> None:
+        """Apply one result; results for a team must arrive in chronological order"""
+        home, away = self.team_id(home_team), self.team_id(away_team)
+        if home == away:
+            raise ValueError(f"Team {home_team} cannot play itself")
+        days = to_micros(timestamp) / MICROS_PER_DAY if timestamp is not None else None
+        self._apply(np.array([home]), np.array([away]), np.array([home_score]), np.array([away_score]),
+                    None if days is None else np.array([days]))
+
+    def rebuild(self, home_teams: Sequence[str], away_teams: Sequence[str],
+                home_scores: Sequence[int], away_scores: Sequence[int],
+                timestamps: Optional[Sequence[Timestamp]] = None) -> int:
+        """
+        Reset every team and replay a chronologically ordered history
+
+        Matches are applied in batches from `conflict_free_batches`.
+
+        Returns:
+            Number of batches
+        """
+        home = self.team_ids(list(home_teams))
+        away = self.team_ids(list(away_teams))
+        home_scores = np.asarray(home_scores, dtype=np.float64)
+        away_scores = np.asarray(away_scores, dtype=np.float64)
+        days = None
+        if timestamps is not None:
+            import pandas as pd
+
+            timestamps = pd.Series(timestamps)
+            if pd.api.types.is_numeric_dtype(timestamps):
+                # Epoch seconds, as in to_micros
+                days = timestamps.to_numpy(dtype=np.float64) * 1_000_000 / MICROS_PER_DAY
+            else:
+                micros = pd.to_datetime(timestamps, utc=True).dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+                days = micros.astype(np.int64) / MICROS_PER_DAY
+
+        self._allocate(len(self.rating))
+        if len(home) == 0:
+            return 0
+
+        batches = conflict_free_batches(home, away, len(self.entities))
+        for rows in batches:
+            self._apply(home[rows], away[rows], home_scores[rows], away_scores[rows],
+                        None if days is None else days[rows])
+
+        n_batches = len(batches)
+        logger.info(f"Rebuilt {self.method} ratings for {len(self)} teams from {len(home)} matches "
+                    f"in {n_batches} batches")
+        return n_batches
+
+    @classmethod
+    def from_history(cls, history: "pd.DataFrame", **kwargs) -> "TeamRatings":
+        """
+        Ratings from a match history DataFrame (home_team, away_team,
+        home_score, away_score and optional date columns), sorted by date
+        """
+        ratings = cls(**kwargs)
+        if history is None or history.empty:
+            return ratings
+        if "date" in history.columns:
+            history = history.sort_values("date", kind="stable")
+        ratings.rebuild(
+            history["home_team"].tolist(),
+            history["away_team"].tolist(),
+            history["home_score"].to_numpy(),
+            history["away_score"].to_numpy(),
+            history["date"].tolist() if "date" in history.columns else None,
+        )
+        return ratings
+
+    # Lookups
+
+    def expected_score(self, home_team: TeamKey, away_team: TeamKey) -> float:
+        """Home side's expected score (win probability with draws as half) from ratings"""
+        home = self._known(home_team)
+        away = self._known(away_team)
+        r_h = self.rating[home] if home is not None else self.initial_rating
+        r_a = self.rating[away] if away is not None else self.initial_rating
+        diff = r_h + self.home_advantage - r_a
+        if self.method == "glicko":
+            rd_a = self.rd[away] if away is not None else self.initial_rd
+            diff = diff * _g(rd_a)
+        return float(1.0 / (1.0 + 10.0 ** (-diff / 400.0)))
+
+    def team_summary(self, team: TeamKey) -> Optional[Dict]:
+        """Rating, deviation, games and rolling form of one team, by name or id (None if unseen)"""
+        t = self._known(team)
+        if t is None:
+            return None
+        count = int(self.form_count[t])
+        return {
+            "team_id": t,
+            "rating": float(self.rating[t]),
+            "rating_deviation": float(self.rd[t]),
+            "games": int(self.games[t]),
+            "form": float(self.points_sum[t] / count) if count else None,
+            "goals_avg": float(self.goals_sum[t] / count) if count else None,
+        }
+
+    def match_features(self, home_team: TeamKey, away_team: TeamKey) -> Dict:
+        """
+        Event fields for MatchPredictor (home_form, away_form, recent_goals_*)
+        plus ratings; unknown teams get None so feature defaults apply
+        """
+        home = self.team_summary(home_team) or {}
+        away = self.team_summary(away_team) or {}
+        return {
+            "home_form": home.get("form"),
+            "away_form": away.get("form"),
+            "recent_goals_home": home.get("goals_avg"),
+            "recent_goals_away": away.get("goals_avg"),
+            "home_rating": home.get("rating", self.initial_rating),
+            "away_rating": away.get("rating", self.initial_rating),
+            "rating_expectancy": self.expected_score(home_team, away_team),
+        }
+
+    # Persistence
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write every table to one .npz file (rows keyed by team name)"""
+        n = min(len(self.entities), len(self.rating))
+        np.savez(
+            path,
+            names=np.array(self.names[:n], dtype=str),
+            **{name: getattr(self, name)[:n] for name in self.TABLES},
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path], entities: Optional[EntityIndex] = None, **kwargs) -> "TeamRatings":
+        """
+        Read tables written by `save` (kwargs must match the saving instance's
+        settings); saved names are resolved through `entities`, so rows land
+        on that index's ids
+        """
+        with np.load(path) as data:
+            names = data["names"].tolist()
+            ratings = cls(capacity=max(len(names), 1), entities=entities, **kwargs)
+            rows = ratings.team_ids(names)
+            for name in cls.TABLES:
+                values = data[name]
+                if name in ("form_points", "form_goals") and values.shape[1] != ratings.form_window:
+                    raise ValueError(f"Saved form window {values.shape[1]} != {ratings.form_window}")
+                getattr(ratings, name)[rows] = values
+        return ratings
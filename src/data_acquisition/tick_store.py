@@ -0,0 +1,321 @@
+"""
+Odds Tick Store
+Append-only local history of bookmaker prices in memory-mapped columnar segments
+"""
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Timestamp = Union[datetime, str, int, float]
+
+KEY_FIELDS = ("event", "market", "outcome", "bookmaker")
+COLUMNS = {
+    "ts": np.int64,  # Microseconds since the Unix epoch (UTC)
+    "event": np.int32,
+    "market": np.int32,
+    "outcome": np.int32,
+    "bookmaker": np.int32,
+    "price": np.float64,
+}
+
+
+def to_micros(timestamp: Timestamp) -> int:
+    """
+    Convert a datetime, ISO string or epoch seconds to epoch microseconds
+    Naive datetimes are taken as UTC
+    """
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return int(round(timestamp.timestamp() * 1_000_000))
+    return int(round(float(timestamp) * 1_000_000))
+
+
+class OddsTickStore:
+    """
+    Append-only odds tick store keyed by (event, market, outcome, bookmaker, timestamp)
+
+    Layout on disk:
+        keys.json               string -> integer code tables per key field
+        segments.json           manifest with row count and time range per segment
+        seg_000001/<col>.npy    one file per column, rows sorted by timestamp
+
+    Segments are immutable once written and are read with `np.load(mmap_mode="r")`,
+    so scans only page in the columns and time ranges they touch. Ticks appended
+    since the last `flush()` are not visible to queries.
+    """
+
+    def __init__(self, root: Union[str, Path], segment_size: int = 1_000_000):
+        """
+        Args:
+            root: Directory holding the store (created if missing)
+            segment_size: Buffered ticks that trigger an automatic flush
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_size = segment_size
+
+        self.codes = {field: {} for field in KEY_FIELDS}
+        self.labels = {field: [] for field in KEY_FIELDS}
+        self.segments = []
+        self._buffer = {name: [] for name in COLUMNS}
+        self._mmaps = {}
+
+        self._load_metadata()
+
+    # Metadata
+
+    def _load_metadata(self) -> None:
+        keys_path = self.root / "keys.json"
+        if keys_path.exists():
+            self.labels = json.loads(keys_path.read_text())
+            self.codes = {
+                field: {label: code for code, label in enumerate(labels)}
+                for field, labels in self.labels.items()
+            }
+
+        manifest_path = self.root / "segments.json"
+        if manifest_path.exists():
+            self.segments = json.loads(manifest_path.read_text())
+
+    def _write_json(self, name: str, data) -> None:
+        tmp_path = self.root / f".{name}.tmp"
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.root / name)
+
+    def _intern(self, field: str, label: str) -> int:
+        code = self.codes[field].get(label)
+        if code is None:
+            code = len(self.labels[field])
+            self.codes[field][label] = code
+            self.labels[field].append(label)
+        return code
+
+    def code_for(self, field: str, label: str) -> Optional[int]:
+        """Integer code of a key label, or None if it was never stored"""
+        return self.codes[field].get(label)
+
+    # Writes
+
+    def append(self, event: str, market: str, outcome: str, bookmaker: str,
+               timestamp: Timestamp, price: float) -> None:
+        """Buffer one price tick"""
+        self._append(event, market, outcome, bookmaker, to_micros(timestamp), price)
+
+    def _append(self, event: str, market: str, outcome: str, bookmaker: str,
+                ts_us: int, price: float) -> None:
+        buffer = self._buffer
+        buffer["ts"].append(ts_us)
+        buffer["event"].append(self._intern("event", event))
+        buffer["market"].append(self._intern("market", market))
+        buffer["outcome"].append(self._intern("outcome", outcome))
+        buffer["bookmaker"].append(self._intern("bookmaker", bookmaker))
+        buffer["price"].append(price)
+
+        if len(buffer["ts"]) >= self.segment_size:
+            self.flush()
+
+    def append_market(self, event: str, market: str, market_data: Dict,
+                      timestamp: Optional[Timestamp] = None) -> int:
+        """
+        Record every price in a market snapshot
+
+        Args:
+            event: Event identifier
+            market: Market identifier
+            market_data: {outcome: {bookmaker: price}}, as in `ArbitrageEngine.find_market_arbitrage`
+            timestamp: Snapshot time (default: now)
+
+        Returns:
+            Number of ticks buffered
+        """
+        ts_us = to_micros(timestamp if timestamp is not None else datetime.now(timezone.utc))
+        count = 0
+        for outcome, bookmaker_odds in market_data.items():
+            for bookmaker, price in bookmaker_odds.items():
+                self._append(event, market, outcome, bookmaker, ts_us, price)
+                count += 1
+        return count
+
+    def flush(self) -> Optional[str]:
+        """
+        Write buffered ticks as a new immutable segment
+
+        Returns:
+            Segment name, or None if the buffer was empty
+        """
+        rows = len(self._buffer["ts"])
+        if rows == 0:
+            return None
+
+        columns = {name: np.asarray(values, dtype=COLUMNS[name]) for name, values in self._buffer.items()}
+        order = np.argsort(columns["ts"], kind="stable")
+
+        name = f"seg_{len(self.segments) + 1:06d}"
+        tmp_dir = self.root / f".{name}.tmp"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir()
+        for column, values in columns.items():
+            np.save(tmp_dir / f"{column}.npy", values[order])
+        if (self.root / name).exists():
+            # Left behind by a flush that died before updating the manifest
+            shutil.rmtree(self.root / name)
+        os.replace(tmp_dir, self.root / name)
+
+        # Keys first so a segment never references unknown codes
+        self._write_json("keys.json", self.labels)
+        self.segments.append({
+            "name": name,
+            "rows": rows,
+            "min_ts": int(columns["ts"][order[0]]),
+            "max_ts": int(columns["ts"][order[-1]]),
+        })
+        self._write_json("segments.json", self.segments)
+
+        self._buffer = {column: [] for column in COLUMNS}
+        logger.info(f"Odds tick segment {name} written ({rows} ticks)")
+        return name
+
+    # Reads
+
+    def _segment_column(self, segment: str, column: str) -> np.ndarray:
+        key = (segment, column)
+        if key not in self._mmaps:
+            self._mmaps[key] = np.load(self.root / segment / f"{column}.npy", mmap_mode="r")
+        return self._mmaps[key]
+
+    def _filter_codes(self, filters: Dict[str, Optional[str]]) -> Optional[Dict[str, int]]:
+        codes = {}
+        for field, label in filters.items():
+            if label is None:
+                continue
+            code = self.code_for(field, label)
+            if code is None:
+                return None
+            codes[field] = code
+        return codes
+
+    def iter_ticks(self, start: Optional[Timestamp] = None, end: Optional[Timestamp] = None,
+                   columns: Optional[List[str]] = None, **filters) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Stream ticks in [start, end) one segment at a time
+
+        Args:
+            start: Inclusive lower time bound
+            end: Exclusive upper time bound
+            columns: Columns to return (default: all)
+            **filters: Exact matches on event, market, outcome or bookmaker labels
+
+        Yields:
+            Column arrays for the matching rows of each segment
+        """
+        unknown = set(filters) - set(KEY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown tick filters: {sorted(unknown)}")
+
+        codes = self._filter_codes(filters)
+        if codes is None:
+            return
+
+        start_us = to_micros(start) if start is not None else None
+        end_us = to_micros(end) if end is not None else None
+        columns = columns or list(COLUMNS)
+
+        for segment in self.segments:
+            if start_us is not None and segment["max_ts"] < start_us:
+                continue
+            if end_us is not None and segment["min_ts"] >= end_us:
+                continue
+
+            name = segment["name"]
+            ts = self._segment_column(name, "ts")
+            lo = int(np.searchsorted(ts, start_us, side="left")) if start_us is not None else 0
+            hi = int(np.searchsorted(ts, end_us, side="left")) if end_us is not None else len(ts)
+            if lo >= hi:
+                continue
+
+            mask = None
+            for field, code in codes.items():
+                field_mask = self._segment_column(name, field)[lo:hi] == code
+                mask = field_mask if mask is None else mask & field_mask
+
+            chunk = {}
+            for column in columns:
+                values = self._segment_column(name, column)[lo:hi]
+                chunk[column] = np.asarray(values[mask] if mask is not None else values)
+
+            if len(chunk[columns[0]]):
+                yield chunk
+
+    def query(self, start: Optional[Timestamp] = None, end: Optional[Timestamp] = None,
+              columns: Optional[List[str]] = None, **filters) -> Dict[str, np.ndarray]:
+        """
+        Ticks in [start, end) matching the filters, ordered by timestamp
+
+        Returns:
+            Dictionary of column arrays
+        """
+        columns = columns or list(COLUMNS)
+        chunks = list(self.iter_ticks(start, end, columns=columns, **filters))
+        if not chunks:
+            return {column: np.empty(0, dtype=COLUMNS[column]) for column in columns}
+
+        result = {column: np.concatenate([c[column] for c in chunks]) for column in columns}
+        if len(chunks) > 1 and "ts" in result:
+            order = np.argsort(result["ts"], kind="stable")
+            result = {column: values[order] for column, values in result.items()}
+        return result
+
+    def to_frame(self, ticks: Dict[str, np.ndarray]):
+        """Decode a query result into a pandas DataFrame with string keys"""
+        import pandas as pd
+
+        frame = {}
+        for column, values in ticks.items():
+            if column in KEY_FIELDS:
+                frame[column] = pd.Categorical.from_codes(values, categories=self.labels[column])
+            elif column == "ts":
+                frame["timestamp"] = pd.to_datetime(values, unit="us", utc=True)
+            else:
+                frame[column] = values
+        return pd.DataFrame(frame)
+
+    def closing_prices(self, event: str, market: str,
+                       before: Optional[Timestamp] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Last price per outcome and bookmaker before a cutoff (e.g. kickoff)
+
+        Returns:
+            {outcome: {bookmaker: price}} in the `find_market_arbitrage` format
+        """
+        ticks = self.query(end=before, event=event, market=market,
+                           columns=["ts", "outcome", "bookmaker", "price"])
+        if len(ticks["ts"]) == 0:
+            return {}
+
+        # Keep the last tick of each (outcome, bookmaker) pair
+        pair = ticks["outcome"].astype(np.int64) * (len(self.labels["bookmaker"]) + 1) + ticks["bookmaker"]
+        reversed_pair = pair[::-1]
+        _, first_in_reverse = np.unique(reversed_pair, return_index=True)
+        last = len(pair) - 1 - first_in_reverse
+
+        closing = {}
+        for i in np.sort(last):
+            outcome = self.labels["outcome"][ticks["outcome"][i]]
+            bookmaker = self.labels["bookmaker"][ticks["bookmaker"][i]]
+            closing.setdefault(outcome, {})[bookmaker] = float(ticks["price"][i])
+        return closing
+
+    def __len__(self) -> int:
+        return sum(segment["rows"] for segment in self.segments)
@@ -2,6 +2,7 @@
 Execution Module - init
 """
 from .bet_executor import BetExecutor, ComparisonEngine, BetStatus
-from .arbitrage_engine import ArbitrageEngine, MultiBetOptimizer, CoverageStrategy
+from .odds_cache import OddsCache
+from .arbitrage_engine import ArbitrageEngine, IncrementalArbitrageDetector, MultiBetOptimizer, CoverageStrategy
 
-__all__ = ["BetExecutor", "ComparisonEngine", "BetStatus", "ArbitrageEngine", "MultiBetOptimizer", "CoverageStrategy"]
+__all__ = ["BetExecutor", "ComparisonEngine", "BetStatus", "ArbitrageEngine", "IncrementalArbitrageDetector", "MultiBetOptimizer", "CoverageStrategy", "OddsCache"]
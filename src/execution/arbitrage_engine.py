@@ -2,10 +2,13 @@
 Advanced Arbitrage Engine
 Multi-way arbitrage and guaranteed profit detection
 """
+import heapq
 import logging
 import numpy as np
 from typing import Dict, List, Optional, Tuple
-from itertools import combinations
+
+from src.risk_management import BankrollManager, KellyPortfolioAllocator
+from .odds_cache import OddsCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +19,14 @@ class ArbitrageEngine:
     and multiple outcomes with guaranteed profit potential
     """
 
-    def __init__(self, min_profit_margin: float = 0.01):
+    def __init__(self, min_profit_margin: float = 0.01, odds_cache: Optional[OddsCache] = None):
         """
         Args:
             min_profit_margin: Minimum profit percentage to consider arbitrage (default 1%)
+            odds_cache: Shared price cache read by `find_cached_arbitrage` and `scan_cached_markets`
         """
         self.min_profit_margin = min_profit_margin
+        self.odds_cache = odds_cache
         self.arbitrage_opportunities = []
 
     @staticmethod
@@ -193,6 +198,338 @@ class ArbitrageEngine:
             "profit_margin_percent": margin * 100,
         }
 
+    @staticmethod
+    def build_odds_tensor(markets: List[Dict]) -> Tuple[np.ndarray, List[List[str]], List[str]]:
+        """
+        Pack market dictionaries into a dense odds tensor
+
+        Args:
+            markets: List of market dictionaries in the `find_market_arbitrage` format
+
+        Returns:
+            (odds tensor of shape (markets, outcomes, bookmakers) with NaN for
+            missing prices, outcome names per market, bookmaker names)
+        """
+        bookmakers = []
+        bookmaker_index = {}
+        for market in markets:
+            for bookmaker_odds in market.values():
+                for bookmaker in bookmaker_odds:
+                    if bookmaker not in bookmaker_index:
+                        bookmaker_index[bookmaker] = len(bookmakers)
+                        bookmakers.append(bookmaker)
+
+        max_outcomes = max((len(market) for market in markets), default=0)
+        odds = np.full((len(markets), max_outcomes, len(bookmakers)), np.nan)
+        outcomes = []
+
+        for m, market in enumerate(markets):
+            outcomes.append(list(market.keys()))
+            for o, bookmaker_odds in enumerate(market.values()):
+                for bookmaker, price in bookmaker_odds.items():
+                    odds[m, o, bookmaker_index[bookmaker]] = price
+
+        return odds, outcomes, bookmakers
+
+    def scan_odds_tensor(self, odds: np.ndarray,
+                         outcome_counts: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Scan a whole board of markets for arbitrage in one vectorized pass
+
+        Equivalent to calling `find_market_arbitrage` on every market, with
+        bookmakers ordered along the last axis (ties go to the first bookmaker).
+
+        Args:
+            odds: Array of shape (markets, outcomes, bookmakers). NaN marks a
+                missing price.
+            outcome_counts: Outcomes in each market (M,); slots past a market's
+                count are padding. Default: every slot is an outcome. A market
+                with an unpriced outcome is incomplete and never an arbitrage.
+
+        Returns:
+            Dictionary of arrays:
+                best_odds (M, O): best price per outcome (NaN if absent)
+                best_bookmaker_idx (M, O): bookmaker index of the best price (-1 if absent)
+                num_outcomes (M,): priced outcomes in each market
+                inv_odds_sum (M,): sum of inverse best odds (inf if not scannable)
+                profit_margin (M,): margin where an arbitrage exists, else 0.0
+                stake_proportions (M, O): share of total stake per outcome
+                arbitrage_found (M,): arbitrage above `min_profit_margin`
+        """
+        odds = np.asarray(odds, dtype=np.float64)
+        if odds.ndim != 3:
+            raise ValueError(f"Expected (markets, outcomes, bookmakers) tensor, got shape {odds.shape}")
+
+        num_markets, num_outcome_slots, _ = odds.shape
+        priced = ~np.isnan(odds)
+        present = priced.any(axis=2)
+        if outcome_counts is None:
+            outcome_counts = np.full(num_markets, num_outcome_slots)
+        expected = np.arange(num_outcome_slots)[None, :] < np.asarray(outcome_counts)[:, None]
+
+        # nanargmax rejects all-NaN slices, so fill them before reducing
+        filled = np.where(priced, odds, -np.inf)
+        best_idx = filled.argmax(axis=2)
+        best_odds = np.take_along_axis(filled, best_idx[..., None], axis=2)[..., 0]
+        best_odds = np.where(present, best_odds, np.nan)
+        best_idx = np.where(present, best_idx, -1)
+
+        num_outcomes = present.sum(axis=1)
+        all_above_one = np.where(present, best_odds > 1.0, True).all(axis=1)
+        complete = (present == expected).all(axis=1)
+        scannable = (num_outcomes >= 2) & all_above_one & complete
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_odds = np.where(present, 1.0 / best_odds, 0.0)
+        inv_odds_sum = np.where(scannable, inv_odds.sum(axis=1), np.inf)
+
+        is_arb = inv_odds_sum < 1.0
+        profit_margin = np.zeros(num_markets)
+        profit_margin[is_arb] = (1.0 - inv_odds_sum[is_arb]) / inv_odds_sum[is_arb]
+
+        stake_proportions = np.zeros((num_markets, num_outcome_slots))
+        stake_proportions[scannable] = inv_odds[scannable] / inv_odds_sum[scannable, None]
+
+        return {
+            "best_odds": best_odds,
+            "best_bookmaker_idx": best_idx,
+            "num_outcomes": num_outcomes,
+            "inv_odds_sum": inv_odds_sum,
+            "profit_margin": profit_margin,
+            "stake_proportions": stake_proportions,
+            "arbitrage_found": is_arb & (profit_margin >= self.min_profit_margin),
+        }
+
+    def scan_markets(self, markets: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Batch version of `find_market_arbitrage` over many markets
+
+        Args:
+            markets: List of market dictionaries
+
+        Returns:
+            One result per market, None where no arbitrage was found
+        """
+        if not markets:
+            return []
+
+        odds, outcomes, _ = self.build_odds_tensor(markets)
+        scan = self.scan_odds_tensor(odds, np.array([len(o) for o in outcomes]))
+        results = []
+
+        for m, market_outcomes in enumerate(outcomes):
+            if not scan["arbitrage_found"][m]:
+                results.append(None)
+                continue
+
+            n = len(market_outcomes)
+            margin = float(scan["profit_margin"][m])
+            # Ties go to the first bookmaker listed for the outcome, as in find_market_arbitrage
+            market = markets[m]
+            results.append({
+                "arbitrage_found": True,
+                "outcomes": market_outcomes,
+                "best_odds": scan["best_odds"][m, :n].tolist(),
+                "bookmakers": [max(market[o], key=market[o].get) for o in market_outcomes],
+                "profit_margin": margin,
+                "profit_margin_percent": margin * 100,
+            })
+
+        return results
+
+    def find_cached_arbitrage(self, event_id: str, market_id: str = "match_odds") -> Optional[Dict]:
+        """Find arbitrage in a market using the live prices of the shared odds cache"""
+        if self.odds_cache is None:
+            raise ValueError("ArbitrageEngine has no odds cache")
+        return self.find_market_arbitrage(self.odds_cache.market(event_id, market_id))
+
+    def scan_cached_markets(self, keys: List[Tuple[str, str]]) -> List[Optional[Dict]]:
+        """`scan_markets` over (event_id, market_id) pairs read from the shared odds cache"""
+        if self.odds_cache is None:
+            raise ValueError("ArbitrageEngine has no odds cache")
+        return self.scan_markets([self.odds_cache.market(event_id, market_id) for event_id, market_id in keys])
+
+
+class _OutcomePrices:
+    """
+    Prices for one outcome of one market across bookmakers
+    Max-heap with lazy deletion: stale entries are discarded when they surface
+    """
+
+    __slots__ = ("prices", "heap", "best", "best_bookmaker", "second")
+
+    def __init__(self):
+        self.prices = {}
+        self.heap = []
+        self.best = None
+        self.best_bookmaker = None
+        self.second = None
+
+    def _prune(self, exclude: Optional[str] = None) -> None:
+        """Pop stale entries (and any copy of `exclude`'s entry) off the top"""
+        while self.heap:
+            neg_price, bookmaker = self.heap[0]
+            if bookmaker != exclude and self.prices.get(bookmaker) == -neg_price:
+                return
+            heapq.heappop(self.heap)
+
+    def update(self, bookmaker: str, price: Optional[float]) -> None:
+        """Set (or remove, when price is None) one bookmaker's price"""
+        if price is None:
+            self.prices.pop(bookmaker, None)
+        elif self.prices.get(bookmaker) != price:
+            self.prices[bookmaker] = price
+            heapq.heappush(self.heap, (-price, bookmaker))
+
+        # Rebuild once stale entries dominate so the heap stays O(B)
+        if len(self.heap) > 2 * len(self.prices) + 8:
+            self.heap = [(-p, b) for b, p in self.prices.items()]
+            heapq.heapify(self.heap)
+
+        self._prune()
+        if not self.heap:
+            self.best = self.best_bookmaker = self.second = None
+            return
+
+        # A bookmaker returning to an earlier price leaves a second valid copy
+        top = heapq.heappop(self.heap)
+        self._prune(exclude=top[1])
+        self.second = -self.heap[0][0] if self.heap else None
+        heapq.heappush(self.heap, top)
+        self.best, self.best_bookmaker = -top[0], top[1]
+
+
+class IncrementalArbitrageDetector(ArbitrageEngine):
+    """
+    Stateful arbitrage detection driven by single price updates
+    Keeps best/second-best prices per outcome; the inverse-odds sum is recomputed from them on each update
+    """
+
+    def __init__(self, min_profit_margin: float = 0.01, odds_cache: Optional[OddsCache] = None):
+        super().__init__(min_profit_margin, odds_cache)
+        self.markets = {}
+
+    def add_market(self, market_id: str, market_data: Dict) -> Optional[Dict]:
+        """
+        Register a market and seed it with current prices
+
+        Args:
+            market_id: Market identifier
+            market_data: Outcomes mapped to bookmaker odds, as in `find_market_arbitrage`
+                (an outcome may map to an empty dict when not yet priced)
+
+        Returns:
+            Crossing report if the seeded market is already an arbitrage, else None
+        """
+        self.markets[market_id] = {
+            "outcomes": {outcome: _OutcomePrices() for outcome in market_data},
+            "inv_odds_sum": 0.0,
+            "priced_outcomes": 0,
+            "is_arbitrage": False,
+            "profit_margin": 0.0,
+        }
+
+        crossing = None
+        for outcome, bookmaker_odds in market_data.items():
+            for bookmaker, price in bookmaker_odds.items():
+                crossing = self.update(market_id, outcome, bookmaker, price) or crossing
+        return crossing
+
+    def remove_market(self, market_id: str) -> None:
+        """Forget a market (settled or suspended)"""
+        self.markets.pop(market_id, None)
+
+    def update(self, market_id: str, outcome: str, bookmaker: str,
+               price: Optional[float]) -> Optional[Dict]:
+        """
+        Apply one price update
+
+        Args:
+            market_id: Market identifier
+            outcome: Outcome name within the market
+            bookmaker: Bookmaker name
+            price: New decimal odds, or None to withdraw the price
+
+        Returns:
+            Crossing report when the market enters or leaves arbitrage, else None
+        """
+        market = self.markets.get(market_id)
+        if market is None or outcome not in market["outcomes"]:
+            logger.warning(f"Ignoring update for unknown market/outcome: {market_id}/{outcome}")
+            return None
+
+        if price is not None and price <= 0:
+            price = None
+
+        market["outcomes"][outcome].update(bookmaker, price)
+        return self._evaluate(market_id, market)
+
+    def apply_updates(self, updates: List[Tuple[str, str, str, Optional[float]]]) -> List[Dict]:
+        """
+        Apply a stream of (market_id, outcome, bookmaker, price) updates
+
+        Returns:
+            Crossing reports in the order they happened
+        """
+        crossings = []
+        for market_id, outcome, bookmaker, price in updates:
+            crossing = self.update(market_id, outcome, bookmaker, price)
+            if crossing:
+                crossings.append(crossing)
+        return crossings
+
+    def _evaluate(self, market_id: str, market: Dict) -> Optional[Dict]:
+        """Re-check the threshold for one market and report a crossing"""
+        books = market["outcomes"]
+        # Summed afresh from the best prices (O(outcomes)) so no rounding drift accumulates
+        best = [b.best for b in books.values() if b.best is not None]
+        inv_odds_sum = market["inv_odds_sum"] = sum(1.0 / price for price in best)
+        market["priced_outcomes"] = len(best)
+        complete = len(books) >= 2 and len(best) == len(books)
+
+        margin = 0.0
+        is_arb = False
+        if complete and inv_odds_sum < 1.0 and all(b.best > 1 for b in books.values()):
+            margin = (1.0 - inv_odds_sum) / inv_odds_sum
+            is_arb = margin >= self.min_profit_margin
+
+        market["profit_margin"] = margin
+        if is_arb == market["is_arbitrage"]:
+            return None
+
+        market["is_arbitrage"] = is_arb
+        return self._market_report(market_id, market)
+
+    def _market_report(self, market_id: str, market: Dict) -> Dict:
+        books = market["outcomes"]
+        margin = market["profit_margin"]
+        return {
+            "market_id": market_id,
+            "arbitrage_found": market["is_arbitrage"],
+            "outcomes": list(books.keys()),
+            "best_odds": [b.best for b in books.values()],
+            "second_best_odds": [b.second for b in books.values()],
+            "bookmakers": [b.best_bookmaker for b in books.values()],
+            "inv_odds_sum": market["inv_odds_sum"],
+            "profit_margin": margin,
+            "profit_margin_percent": margin * 100,
+        }
+
+    def get_market_state(self, market_id: str) -> Optional[Dict]:
+        """Current best prices and margin for a market"""
+        market = self.markets.get(market_id)
+        if market is None:
+            return None
+        return self._market_report(market_id, market)
+
+    def current_opportunities(self) -> List[Dict]:
+        """All markets currently above the profit threshold"""
+        return [
+            self._market_report(market_id, market)
+            for market_id, market in self.markets.items()
+            if market["is_arbitrage"]
+        ]
+
 
 class MultiBetOptimizer:
     """
@@ -305,6 +642,109 @@ class MultiBetOptimizer:
             "total_expected_value": sum(v["expected_value"] for v in allocations.values()),
         }
 
+    def optimize_portfolio(self, bets: List[Dict], bankroll_manager: BankrollManager,
+                           method: str = "auto") -> Dict:
+        """
+        Size simultaneous bets jointly instead of one at a time
+
+        Unlike `optimize_multiple_bets`, the total stays within the bankroll
+        manager's single-bet and daily-loss limits, and bets on the same event
+        are treated as mutually exclusive.
+
+        Args:
+            bets: List of bet dictionaries (same format as `optimize_multiple_bets`)
+            bankroll_manager: Bankroll and limits to allocate against
+            method: "auto", "closed_form" or "solver" (see `KellyPortfolioAllocator.allocate`)
+
+        Returns:
+            Optimized bet allocation
+        """
+        allocator = KellyPortfolioAllocator(bankroll_manager, kelly_fraction=self.kelly_fraction)
+        return allocator.allocate(bets, method=method)
+
+    def _combination_result(self, events: List[Dict], indices: Tuple[int, ...]) -> Dict:
+        selected_events = [events[i] for i in indices]
+        probs = [e.get("probability", 0.5) for e in selected_events]
+        odds_list = [e.get("odds", 1.5) for e in selected_events]
+
+        parlay_prob = self.calculate_parlay_probability(probs)
+        parlay_odds = self.calculate_parlay_odds(odds_list)
+
+        # Expected value per unit stake
+        ev = parlay_prob * parlay_odds - 1.0
+
+        return {
+            "events": selected_events,
+            "event_indices": indices,
+            "parlay_probability": parlay_prob,
+            "parlay_odds": parlay_odds,
+            "expected_value_percent": ev * 100,
+            "stake_recommendation": "1 unit per $100 bankroll" if ev > 0.05 else "Skip - Low EV",
+        }
+
+    def find_top_combinations(self, events: List[Dict], max_size: int = 4, top_n: int = 5,
+                              min_size: int = 2, min_ev: Optional[float] = 0.0) -> Dict[int, List[Dict]]:
+        """
+        Exact best-N parlays for every size from min_size to max_size
+
+        Parlay EV + 1 is the product of per-leg p * odds, so each leg gets a
+        log-space score and a subset's score is the sum of its legs. With legs
+        sorted by score, the best subset of size k is the first k legs, and every
+        other subset is reached by shifting one leg to the next free position,
+        which never increases the score. A best-first search over those shifts
+        pops subsets in exact score order, so only about top_n * k subsets are
+        expanded per size instead of C(n, k).
+
+        Args:
+            events: List of event dictionaries with probability and odds
+            max_size: Largest parlay size
+            top_n: Combinations to return per size
+            min_size: Smallest parlay size
+            min_ev: Stop once EV per unit stake falls to this value (None disables)
+
+        Returns:
+            Combinations per size, best first
+        """
+        probs = np.array([e.get("probability", 0.5) for e in events], dtype=np.float64)
+        odds = np.array([e.get("odds", 1.5) for e in events], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where((probs > 0) & (odds > 0), np.log(probs) + np.log(odds), -np.inf)
+
+        order = np.argsort(-scores, kind="stable")
+        sorted_scores = scores[order]
+        n = len(events)
+        log_threshold = np.log1p(min_ev) if min_ev is not None and min_ev > -1 else -np.inf
+
+        results = {}
+        for size in range(min_size, min(max_size, n) + 1):
+            start = tuple(range(size))
+            heap = [(-sorted_scores[:size].sum(), start)]
+            seen = {start}
+            found = []
+
+            while heap and len(found) < top_n:
+                neg_score, positions = heapq.heappop(heap)
+                if -neg_score <= log_threshold or not np.isfinite(neg_score):
+                    break
+
+                found.append(self._combination_result(events, tuple(sorted(int(order[p]) for p in positions))))
+
+                for j in range(size):
+                    nxt = positions[j] + 1
+                    limit = positions[j + 1] if j + 1 < size else n
+                    if nxt >= limit:
+                        continue
+                    child = positions[:j] + (nxt,) + positions[j + 1:]
+                    if child in seen:
+                        continue
+                    seen.add(child)
+                    child_score = -neg_score - sorted_scores[positions[j]] + sorted_scores[nxt]
+                    heapq.heappush(heap, (-child_score, child))
+
+            results[size] = found
+
+        return results
+
     def find_best_combination(self, events: List[Dict], 
                             combination_size: int = 2) -> Optional[Dict]:
         """
@@ -319,36 +759,12 @@ class MultiBetOptimizer:
         """
         if len(events) < combination_size:
             return None
-        
-        best_combination = None
-        best_ev = 0.0
-        
-        # Generate all combinations
-        for combo in combinations(range(len(events)), combination_size):
-            selected_events = [events[i] for i in combo]
-            
-            # Calculate parlay probability and odds
-            probs = [e.get("probability", 0.5) for e in selected_events]
-            odds_list = [e.get("odds", 1.5) for e in selected_events]
-            
-            parlay_prob = self.calculate_parlay_probability(probs)
-            parlay_odds = self.calculate_parlay_odds(odds_list)
-            
-            # Expected value per unit stake
-            ev = parlay_prob * parlay_odds - 1.0
-            
-            if ev > best_ev:
-                best_ev = ev
-                best_combination = {
-                    "events": selected_events,
-                    "event_indices": combo,
-                    "parlay_probability": parlay_prob,
-                    "parlay_odds": parlay_odds,
-                    "expected_value_percent": ev * 100,
-                    "stake_recommendation": "1 unit per $100 bankroll" if ev > 0.05 else "Skip - Low EV",
-                }
-        
-        return best_combination if best_ev > 0 else None
+
+        best = self.find_top_combinations(
+            events, max_size=combination_size, min_size=combination_size, top_n=1, min_ev=0.0
+        ).get(combination_size)
+
+        return best[0] if best else None
 
 
 class CoverageStrategy:
@@ -10,6 +10,8 @@ from typing import Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
+from .odds_cache import OddsCache
+
 logger = logging.getLogger(__name__)
 
 class BetStatus(Enum):
@@ -192,35 +194,74 @@ class BetExecutor:
 class ComparisonEngine:
     """
     Compare odds across multiple bookmakers for arbitrage opportunities
+    Prices are read from a shared OddsCache filled as odds are fetched
     """
     
-    def __init__(self):
+    def __init__(self, odds_cache: Optional[OddsCache] = None):
         self.bookmakers = ["betfair", "kambi", "pinnacle"]
+        self.odds_cache = odds_cache if odds_cache is not None else OddsCache()
+    
+    def ingest_odds(self, event_id: str, odds_data: Dict) -> int:
+        """
+        Record a fetched odds payload in the cache
+
+        Args:
+            event_id: Event the odds belong to
+            odds_data: Payload from `SportsDataFetcher.fetch_event_odds`; `back_odds`
+                entries are {"selection", "price", "bookmaker"} (bookmaker defaults
+                to the payload's provider)
+
+        Returns:
+            Number of prices recorded
+        """
+        market_id = odds_data.get("market_type", "match_odds")
+        default_bookmaker = odds_data.get("bookmaker", "betfair")
+        count = 0
+        for entry in odds_data.get("back_odds", []):
+            if entry.get("selection") is None or entry.get("price") is None:
+                continue
+            self.odds_cache.update(event_id, market_id, entry["selection"],
+                                   entry.get("bookmaker", default_bookmaker), float(entry["price"]))
+            count += 1
+        return count
     
     def get_best_odds(self, event_id: str, market_id: str, selection: str) -> Dict:
         """
         Get best available odds for a selection across bookmakers
         
         Returns:
-            Dictionary with best odds and bookmaker
+            Dictionary with best odds and bookmaker (without `best_odds` when
+            no live price is cached)
         """
-        # Placeholder - would fetch from multiple APIs
+        available = self.odds_cache.ranked(event_id, market_id, selection)
+        if not available:
+            return {"selection": selection, "available_odds": {}}
+
+        best_bookmaker, best_odds = available[0]
         return {
             "selection": selection,
-            "best_odds": 2.5,
-            "best_bookmaker": "betfair",
-            "available_odds": {
-                "betfair": 2.5,
-                "kambi": 2.45,
-                "pinnacle": 2.48,
-            }
+            "best_odds": best_odds,
+            "best_bookmaker": best_bookmaker,
+            "available_odds": dict(available),
         }
     
-    def detect_arbitrage(self, outcomes: List[Dict]) -> Optional[Dict]:
+    def detect_arbitrage(self, outcomes: Optional[List[Dict]] = None,
+                         event_id: Optional[str] = None,
+                         market_id: str = "match_odds") -> Optional[Dict]:
         """
         Detect arbitrage opportunities
         Arbitrage exists when sum of (1/odds) < 1.0 across all outcomes
+
+        Outcomes default to the best cached price of every selection in the
+        event's market when `event_id` is given.
         """
+        if outcomes is None and event_id is not None:
+            outcomes = []
+            for selection in self.odds_cache.market(event_id, market_id):
+                best = self.odds_cache.best(event_id, market_id, selection)
+                if best is not None:
+                    outcomes.append({"selection": selection, "odds": best[0], "bookmaker": best[1]})
+
         if not outcomes:
             return None
         
@@ -0,0 +1,192 @@
+"""
+Odds Cache
+Shared in-memory price book of fetched bookmaker odds
+"""
+import bisect
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SelectionKey = Tuple[str, str, str]
+
+
+class _SelectionBook:
+    """
+    Prices for one selection across bookmakers
+    `ranked` holds (-price, bookmaker) in ascending order, so the best price is first
+    """
+
+    __slots__ = ("prices", "ranked", "oldest")
+
+    def __init__(self):
+        self.prices = {}
+        self.ranked = []
+        self.oldest = float("inf")
+
+    def _unlink(self, bookmaker: str) -> None:
+        entry = self.prices.pop(bookmaker, None)
+        if entry is not None:
+            i = bisect.bisect_left(self.ranked, (-entry[0], bookmaker))
+            del self.ranked[i]
+
+    def update(self, bookmaker: str, price: Optional[float], updated_at: float) -> None:
+        self._unlink(bookmaker)
+        if price is None:
+            return
+        self.prices[bookmaker] = (price, updated_at)
+        bisect.insort(self.ranked, (-price, bookmaker))
+        self.oldest = min(self.oldest, updated_at)
+
+    def expire(self, cutoff: float) -> None:
+        """Drop prices last updated before the cutoff"""
+        if self.oldest >= cutoff:
+            return
+        for bookmaker in [b for b, (_, t) in self.prices.items() if t < cutoff]:
+            self._unlink(bookmaker)
+        self.oldest = min((t for _, t in self.prices.values()), default=float("inf"))
+
+
+class OddsCache:
+    """
+    Multi-bookmaker price cache indexed by (event_id, market_id, selection)
+
+    Best price lookups are O(1) and ranked lookups return the already sorted
+    book. Prices older than `ttl_seconds` are ignored and evicted when read or
+    purged. At most `max_selections` selections are kept; the least recently
+    updated one is evicted first.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_selections: int = 50000,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl_seconds: Age after which a bookmaker price is stale (None disables expiry)
+            max_selections: Bound on cached selections
+            clock: Time source for update stamps and staleness checks
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_selections = max_selections
+        self.clock = clock
+        self._books = OrderedDict()
+        self._markets = {}
+
+    # Writes
+
+    def update(self, event_id: str, market_id: str, selection: str, bookmaker: str,
+               price: Optional[float]) -> None:
+        """Set (or remove, when price is None) one bookmaker's price for a selection"""
+        key = (event_id, market_id, selection)
+        book = self._books.get(key)
+        if book is None:
+            if price is None:
+                return
+            book = self._books[key] = _SelectionBook()
+            self._markets.setdefault((event_id, market_id), set()).add(selection)
+            while len(self._books) > self.max_selections:
+                self._drop(next(iter(self._books)))
+        else:
+            self._books.move_to_end(key)
+
+        book.update(bookmaker, price, self.clock())
+        if not book.prices:
+            self._drop(key)
+
+    def update_market(self, event_id: str, market_id: str, market_data: Dict) -> int:
+        """
+        Record a market snapshot
+
+        Args:
+            market_data: {selection: {bookmaker: price}}, as in `ArbitrageEngine.find_market_arbitrage`
+
+        Returns:
+            Number of prices recorded
+        """
+        count = 0
+        for selection, bookmaker_odds in market_data.items():
+            for bookmaker, price in bookmaker_odds.items():
+                self.update(event_id, market_id, selection, bookmaker, price)
+                count += 1
+        return count
+
+    def remove_event(self, event_id: str) -> None:
+        """Forget every market of an event (settled or suspended)"""
+        for event_market in [k for k in self._markets if k[0] == event_id]:
+            for selection in list(self._markets.get(event_market, ())):
+                self._drop((*event_market, selection))
+
+    def _drop(self, key: SelectionKey) -> None:
+        self._books.pop(key, None)
+        selections = self._markets.get(key[:2])
+        if selections is not None:
+            selections.discard(key[2])
+            if not selections:
+                del self._markets[key[:2]]
+
+    def purge_expired(self) -> int:
+        """
+        Evict stale prices from every selection
+
+        Returns:
+            Number of selections dropped
+        """
+        if self.ttl_seconds is None:
+            return 0
+        cutoff = self.clock() - self.ttl_seconds
+        dropped = 0
+        for key, book in list(self._books.items()):
+            book.expire(cutoff)
+            if not book.prices:
+                self._drop(key)
+                dropped += 1
+        return dropped
+
+    # Reads
+
+    def _book(self, event_id: str, market_id: str, selection: str) -> Optional[_SelectionBook]:
+        key = (event_id, market_id, selection)
+        book = self._books.get(key)
+        if book is None:
+            return None
+        if self.ttl_seconds is not None:
+            book.expire(self.clock() - self.ttl_seconds)
+            if not book.prices:
+                self._drop(key)
+                return None
+        return book
+
+    def best(self, event_id: str, market_id: str, selection: str) -> Optional[Tuple[float, str]]:
+        """Best live (price, bookmaker) for a selection, or None"""
+        book = self._book(event_id, market_id, selection)
+        if book is None:
+            return None
+        neg_price, bookmaker = book.ranked[0]
+        return -neg_price, bookmaker
+
+    def ranked(self, event_id: str, market_id: str, selection: str,
+               depth: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Live (bookmaker, price) pairs for a selection, best price first"""
+        book = self._book(event_id, market_id, selection)
+        if book is None:
+            return []
+        levels = book.ranked if depth is None else book.ranked[:depth]
+        return [(bookmaker, -neg_price) for neg_price, bookmaker in levels]
+
+    def market(self, event_id: str, market_id: str) -> Dict[str, Dict[str, float]]:
+        """
+        Live prices of a market
+
+        Returns:
+            {selection: {bookmaker: price}} in the `find_market_arbitrage` format
+        """
+        market = {}
+        for selection in sorted(self._markets.get((event_id, market_id), ())):
+            levels = self.ranked(event_id, market_id, selection)
+            if levels:
+                market[selection] = dict(levels)
+        return market
+
+    def __len__(self) -> int:
+        return len(self._books)
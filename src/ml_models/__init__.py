@@ -2,5 +2,11 @@
 ML Models Module - init
 """
 from .predictor import MatchPredictor, OddsConverter, ValueBettingCalculator
+from .features import FeatureSchema, MATCH_FEATURE_SCHEMA
+from .compiled import CompiledGradientBoosting
+from .registry import ModelRegistry, ModelHandle, CompiledModel
+from .calibration import ProbabilityCalibrator, CalibrationMonitor
+from .online import OnlineLearner, RunningScaler, SGDLogisticModel
+from .training import HyperparameterSearch, time_series_folds, calibration_metrics
 
-__all__ = ["MatchPredictor", "OddsConverter", "ValueBettingCalculator"]
+__all__ = ["MatchPredictor", "OddsConverter", "ValueBettingCalculator", "FeatureSchema", "MATCH_FEATURE_SCHEMA", "ModelRegistry", "ModelHandle", "CompiledModel", "CompiledGradientBoosting", "HyperparameterSearch", "time_series_folds", "calibration_metrics", "ProbabilityCalibrator", "CalibrationMonitor", "OnlineLearner", "RunningScaler", "SGDLogisticModel"]
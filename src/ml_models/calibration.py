@@ -0,0 +1,305 @@
+"""
+Probability Calibration
+Per-sport, per-market isotonic and Platt calibration of model probabilities
+"""
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANY = "*"
+EPSILON = 1e-12
+
+
+def _key(sport: Optional[str], market: Optional[str]) -> str:
+    return f"{sport or ANY}|{market or ANY}"
+
+
+class PlattScaling:
+    """Sigmoid fitted on the logit of one probability column"""
+
+    def __init__(self, a: float = 1.0, b: float = 0.0):
+        self.a = a
+        self.b = b
+
+    @staticmethod
+    def _logit(p: np.ndarray) -> np.ndarray:
+        p = np.clip(p, EPSILON, 1.0 - EPSILON)
+        return np.log(p / (1.0 - p))
+
+    def fit(self, p: np.ndarray, target: np.ndarray, iterations: int = 50,
+            l2: float = 1e-6) -> "PlattScaling":
+        """Newton-Raphson on log loss (a small L2 penalty keeps separable data finite)"""
+        z = self._logit(p)
+        a, b = 1.0, 0.0
+        for _ in range(iterations):
+            q = 1.0 / (1.0 + np.exp(-(a * z + b)))
+            w = q * (1.0 - q)
+            r = q - target
+            grad = np.array([r @ z + l2 * a, r.sum() + l2 * b])
+            hess = np.array([[w @ (z * z) + l2, w @ z], [w @ z, w.sum() + l2]])
+            step = np.linalg.solve(hess, grad)
+            a, b = a - step[0], b - step[1]
+            if np.abs(step).max() < 1e-10:
+                break
+        self.a, self.b = float(a), float(b)
+        return self
+
+    def transform(self, p: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-(self.a * self._logit(p) + self.b)))
+
+    def to_dict(self) -> Dict:
+        return {"a": self.a, "b": self.b}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PlattScaling":
+        return cls(data["a"], data["b"])
+
+
+class IsotonicCalibration:
+    """Monotone step function (pool adjacent violators), interpolated between blocks"""
+
+    def __init__(self, x: Optional[Sequence[float]] = None, y: Optional[Sequence[float]] = None):
+        self.x = np.asarray(x if x is not None else [0.0, 1.0], dtype=np.float64)
+        self.y = np.asarray(y if y is not None else [0.0, 1.0], dtype=np.float64)
+
+    def fit(self, p: np.ndarray, target: np.ndarray) -> "IsotonicCalibration":
+        order = np.argsort(p, kind="mergesort")
+        xs, ys = p[order], target[order].astype(np.float64)
+
+        # Blocks as (sum, weight, first x, last x); merge while the new block is below the previous one
+        sums, weights, lows, highs = [], [], [], []
+        for x, y in zip(xs, ys):
+            sums.append(y)
+            weights.append(1.0)
+            lows.append(x)
+            highs.append(x)
+            while len(sums) > 1 and sums[-2] / weights[-2] >= sums[-1] / weights[-1]:
+                s, w, h = sums.pop(), weights.pop(), highs.pop()
+                lows.pop()
+                sums[-1] += s
+                weights[-1] += w
+                highs[-1] = h
+
+        values = np.array(sums) / np.array(weights)
+        self.x = np.column_stack([lows, highs]).ravel()
+        self.y = np.repeat(values, 2)
+        return self
+
+    def transform(self, p: np.ndarray) -> np.ndarray:
+        return np.interp(p, self.x, self.y)
+
+    def to_dict(self) -> Dict:
+        return {"x": self.x.tolist(), "y": self.y.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "IsotonicCalibration":
+        return cls(data["x"], data["y"])
+
+
+METHODS = {"isotonic": IsotonicCalibration, "platt": PlattScaling}
+
+
+class ProbabilityCalibrator:
+    """
+    Calibration maps keyed by (sport, market)
+
+    Each class column is calibrated one-vs-rest and rows are renormalized;
+    binary models calibrate the positive column only. A global map fitted on
+    all rows serves (sport, market) pairs with fewer than `min_samples`
+    examples. Calibrators are fitted on held-out predictions, never on the
+    model's own training rows.
+    """
+
+    def __init__(self, method: str = "isotonic", min_samples: int = 200):
+        """
+        Args:
+            method: "isotonic" or "platt"
+            min_samples: Rows needed before a (sport, market) pair gets its own map
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown calibration method: {method}")
+        self.method = method
+        self.min_samples = min_samples
+        self.n_classes = None
+        self.calibrators: Dict[str, List] = {}
+
+    @property
+    def is_fitted(self) -> bool:
+        return bool(self.calibrators)
+
+    @staticmethod
+    def _keys(n_rows: int, sports: Optional[Sequence], markets: Optional[Sequence]) -> np.ndarray:
+        sports = sports if sports is not None else [None] * n_rows
+        markets = markets if markets is not None else [None] * n_rows
+        return np.array([_key(s, m) for s, m in zip(sports, markets)], dtype=object)
+
+    def _columns(self, n_classes: int) -> List[int]:
+        return [1] if n_classes == 2 else list(range(n_classes))
+
+    def _fit_group(self, probabilities: np.ndarray, y: np.ndarray) -> List:
+        method = METHODS[self.method]
+        return [method().fit(probabilities[:, c], (y == c).astype(np.float64))
+                for c in self._columns(probabilities.shape[1])]
+
+    def fit(self, probabilities: np.ndarray, y: np.ndarray,
+            sports: Optional[Sequence[str]] = None,
+            markets: Optional[Sequence[str]] = None) -> "ProbabilityCalibrator":
+        """
+        Args:
+            probabilities: (n_samples, n_classes) held-out model probabilities
+            y: Class indices into the probability columns
+            sports: Sport per row (None: a single global map)
+            markets: Market per row
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        y = np.asarray(y)
+        self.n_classes = probabilities.shape[1]
+        self.calibrators = {_key(None, None): self._fit_group(probabilities, y)}
+
+        keys = self._keys(len(y), sports, markets)
+        groups, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        for g, (key, count) in enumerate(zip(groups, counts)):
+            if key != _key(None, None) and count >= self.min_samples:
+                rows = inverse == g
+                self.calibrators[key] = self._fit_group(probabilities[rows], y[rows])
+
+        logger.info(f"Fitted {self.method} calibration for {len(self.calibrators)} (sport, market) groups")
+        return self
+
+    def _apply(self, probabilities: np.ndarray, calibrators: List) -> np.ndarray:
+        out = probabilities.copy()
+        columns = self._columns(probabilities.shape[1])
+        for c, calibrator in zip(columns, calibrators):
+            out[:, c] = calibrator.transform(probabilities[:, c])
+
+        if len(columns) == 1:
+            out[:, 0] = 1.0 - out[:, 1]
+            return out
+        totals = out.sum(axis=1, keepdims=True)
+        # Rows every column calibrated to zero keep the raw probabilities
+        return np.where(totals > EPSILON, out / np.maximum(totals, EPSILON), probabilities)
+
+    def transform(self, probabilities: np.ndarray,
+                  sports: Optional[Sequence[str]] = None,
+                  markets: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Calibrate a batch; one vectorized pass per distinct (sport, market)"""
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if not self.calibrators or probabilities.shape[1] != self.n_classes:
+            return probabilities
+
+        fallback = self.calibrators[_key(None, None)]
+        keys = self._keys(len(probabilities), sports, markets)
+        groups, inverse = np.unique(keys, return_inverse=True)
+        if len(groups) == 1:
+            return self._apply(probabilities, self.calibrators.get(groups[0], fallback))
+
+        out = np.empty_like(probabilities)
+        for g, key in enumerate(groups):
+            rows = inverse == g
+            out[rows] = self._apply(probabilities[rows], self.calibrators.get(key, fallback))
+        return out
+
+    def to_dict(self) -> Dict:
+        return {
+            "method": self.method,
+            "min_samples": self.min_samples,
+            "n_classes": self.n_classes,
+            "calibrators": {key: [c.to_dict() for c in maps] for key, maps in self.calibrators.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProbabilityCalibrator":
+        calibrator = cls(data["method"], data["min_samples"])
+        calibrator.n_classes = data["n_classes"]
+        method = METHODS[data["method"]]
+        calibrator.calibrators = {key: [method.from_dict(c) for c in maps]
+                                  for key, maps in data["calibrators"].items()}
+        return calibrator
+
+
+class CalibrationMonitor:
+    """
+    Running Brier score, log loss and reliability curve of settled bets
+
+    Each settled bet adds its predicted win probability and outcome to fixed
+    bins, per (sport, market) and overall, so reports cost O(bins) no matter
+    how many bets have settled.
+    """
+
+    def __init__(self, n_bins: int = 10):
+        self.n_bins = n_bins
+        self._stats: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def _bucket(self, key: str) -> Dict[str, np.ndarray]:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = {
+                "totals": np.zeros(3),  # count, brier sum, log loss sum
+                "count": np.zeros(self.n_bins),
+                "predicted": np.zeros(self.n_bins),
+                "observed": np.zeros(self.n_bins),
+            }
+        return stats
+
+    def record_many(self, probabilities: Sequence[float], won: Sequence[bool],
+                    sport: Optional[str] = None, market: Optional[str] = None) -> None:
+        """Add settled bets of one (sport, market)"""
+        p = np.asarray(probabilities, dtype=np.float64)
+        outcome = np.asarray(won, dtype=np.float64)
+        if len(p) == 0:
+            return
+
+        q = np.clip(p, EPSILON, 1.0 - EPSILON)
+        totals = np.array([
+            len(p),
+            ((p - outcome) ** 2).sum(),
+            -(outcome * np.log(q) + (1.0 - outcome) * np.log(1.0 - q)).sum(),
+        ])
+        bins = np.minimum((p * self.n_bins).astype(int), self.n_bins - 1)
+        count = np.bincount(bins, minlength=self.n_bins)
+        predicted = np.bincount(bins, weights=p, minlength=self.n_bins)
+        observed = np.bincount(bins, weights=outcome, minlength=self.n_bins)
+
+        for key in {_key(None, None), _key(sport, None), _key(sport, market)}:
+            stats = self._bucket(key)
+            stats["totals"] += totals
+            stats["count"] += count
+            stats["predicted"] += predicted
+            stats["observed"] += observed
+
+    def record(self, probability: float, won: bool, sport: Optional[str] = None,
+               market: Optional[str] = None) -> None:
+        """Add one settled bet"""
+        self.record_many([probability], [won], sport, market)
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """(sport, market) pairs with settled bets ("*" for all)"""
+        return sorted(tuple(key.split("|")) for key in self._stats)
+
+    def report(self, sport: Optional[str] = None, market: Optional[str] = None) -> Dict:
+        """Brier score, log loss, calibration error and reliability curve"""
+        stats = self._stats.get(_key(sport, market))
+        if stats is None:
+            return {"bets": 0, "brier": None, "log_loss": None, "ece": None, "curve": []}
+
+        n, brier, log_loss = stats["totals"]
+        count = stats["count"]
+        curve = [
+            {
+                "bin": (i / self.n_bins, (i + 1) / self.n_bins),
+                "bets": int(count[i]),
+                "mean_predicted": stats["predicted"][i] / count[i],
+                "observed_rate": stats["observed"][i] / count[i],
+            }
+            for i in range(self.n_bins) if count[i]
+        ]
+        return {
+            "bets": int(n),
+            "brier": brier / n,
+            "log_loss": log_loss / n,
+            "ece": float(np.abs(stats["observed"] - stats["predicted"]).sum() / n),
+            "curve": curve,
+        }
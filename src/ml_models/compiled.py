@@ -0,0 +1,153 @@
+"""
+Compiled Models
+Gradient boosting ensembles exported to flat NumPy arrays for fast scoring
+"""
+import logging
+from typing import Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledGradientBoosting:
+    """
+    Pure-NumPy evaluator for a trained GradientBoostingClassifier + StandardScaler
+
+    Every tree node of every stage is stored in one set of flat arrays, with
+    leaves pointing at themselves. A batch is scored by advancing all
+    (sample, tree) cursors one level per step for `max_depth` steps, then
+    summing the leaf values. Features are scaled in float64 and compared in
+    float32, as sklearn does, so probabilities match `predict_proba` to
+    floating point rounding. NaN features follow the tree's missing-value
+    direction when it has one and go left otherwise.
+    """
+
+    ARRAYS = ("scaler_mean", "scaler_scale", "feature", "threshold", "left", "right",
+              "missing_left", "value", "roots", "init_raw", "learning_rate", "max_depth")
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        Args:
+            arrays: Output of `export_arrays` (or the same arrays loaded from disk)
+        """
+        missing = [name for name in self.ARRAYS if name not in arrays]
+        if missing:
+            raise ValueError(f"Compiled model is missing arrays: {missing}")
+
+        # Plain ndarray views (memmaps stay file-backed but skip subclass overhead)
+        arrays = {name: np.asarray(values) for name, values in arrays.items()}
+        self.arrays = arrays
+        self.mean = arrays["scaler_mean"]
+        self.scale = arrays["scaler_scale"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.missing_left = arrays["missing_left"]
+        self.value = arrays["value"]
+        self.roots = np.asarray(arrays["roots"]).ravel()
+        self.n_stages, self.n_trees_per_stage = arrays["roots"].shape
+        self.init_raw = arrays["init_raw"]
+        self.learning_rate = float(arrays["learning_rate"].item())
+        self.max_depth = int(arrays["max_depth"].item())
+
+        # children[2 * node + go_right] gives the next node with a single take()
+        self.children = np.column_stack([self.left, self.right]).ravel()
+        self.has_missing = bool(np.any(self.missing_left))
+        self.n_features = len(self.mean)
+
+    @staticmethod
+    def export_arrays(model, scaler) -> Dict[str, np.ndarray]:
+        """
+        Flatten a fitted GradientBoostingClassifier and StandardScaler
+
+        Raises:
+            ValueError: If the model is not a fitted gradient boosting classifier
+                with a constant (prior or zero) init estimator
+        """
+        if not hasattr(model, "estimators_") or not hasattr(model, "init_"):
+            raise ValueError("Only fitted GradientBoostingClassifier models can be compiled")
+        init = model.init_
+        if init != "zero" and getattr(init, "strategy", None) != "prior":
+            raise ValueError("Only the default prior (or zero) init estimator can be compiled")
+
+        n_features = len(scaler.mean_)
+        # The prior init estimator ignores X, so one row gives the constant
+        init_raw = model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0]
+
+        features, thresholds, lefts, rights, missing, values = [], [], [], [], [], []
+        n_stages, n_trees_per_stage = model.estimators_.shape
+        roots = np.empty((n_stages, n_trees_per_stage), dtype=np.int32)
+        offset = 0
+        max_depth = 0
+
+        for stage in range(n_stages):
+            for k in range(n_trees_per_stage):
+                tree = model.estimators_[stage, k].tree_
+                n_nodes = tree.node_count
+                nodes = np.arange(n_nodes)
+                is_leaf = tree.children_left == -1
+
+                roots[stage, k] = offset
+                features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+                thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+                lefts.append((np.where(is_leaf, nodes, tree.children_left) + offset).astype(np.int32))
+                rights.append((np.where(is_leaf, nodes, tree.children_right) + offset).astype(np.int32))
+                missing.append(np.asarray(getattr(tree, "missing_go_to_left", np.zeros(n_nodes)), dtype=bool))
+                values.append(tree.value[:, 0, 0].astype(np.float64))
+
+                offset += n_nodes
+                max_depth = max(max_depth, tree.max_depth)
+
+        return {
+            "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+            "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+            "feature": np.concatenate(features),
+            "threshold": np.concatenate(thresholds),
+            "left": np.concatenate(lefts),
+            "right": np.concatenate(rights),
+            "missing_left": np.concatenate(missing),
+            "value": np.concatenate(values),
+            "roots": roots,
+            "init_raw": np.asarray(init_raw, dtype=np.float64),
+            "learning_rate": np.asarray(model.learning_rate, dtype=np.float64),
+            "max_depth": np.asarray(max_depth, dtype=np.int32),
+        }
+
+    @classmethod
+    def from_sklearn(cls, model, scaler) -> "CompiledGradientBoosting":
+        return cls(cls.export_arrays(model, scaler))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Raw scores of shape (n_samples, n_trees_per_stage)"""
+        X = np.asarray(X, dtype=np.float64)
+        Z = ((X - self.mean) / self.scale).astype(np.float32).astype(np.float64)
+        n = len(Z)
+
+        # Single rows skip the per-row offsets; this is the live-loop case
+        flat = Z.ravel()
+        offsets = None if n == 1 else (np.arange(n, dtype=np.int64) * self.n_features)[:, None]
+        nodes = self.roots if n == 1 else np.tile(self.roots, (n, 1))
+        check_missing = self.has_missing and bool(np.isnan(flat).any())
+
+        for _ in range(self.max_depth):
+            columns = self.feature.take(nodes)
+            x = flat.take(columns if offsets is None else columns + offsets)
+            go_right = x > self.threshold.take(nodes)
+            if check_missing:
+                go_right |= np.isnan(x) & ~self.missing_left.take(nodes)
+            nodes = self.children.take((nodes << 1) + go_right)
+
+        leaf_values = self.value.take(nodes).reshape(n, self.n_stages, self.n_trees_per_stage)
+        return self.init_raw + self.learning_rate * leaf_values.sum(axis=1)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities in `classes_` order for raw (unscaled) features"""
+        raw = self.decision_function(X)
+        if raw.shape[1] == 1:
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        shifted = raw - raw.max(axis=1, keepdims=True)
+        exp = np.exp(shifted)
+        return exp / exp.sum(axis=1, keepdims=True)
@@ -0,0 +1,130 @@
+"""
+Feature Schema
+Fixed column order, sources and defaults for model input matrices
+"""
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+
+class FeatureSchema:
+    """
+    Declarative description of the model's feature matrix
+
+    Each column is (name, source key, default). Columns without a source key
+    are constants filled with their default. Missing or None values fall back
+    to the default.
+    """
+
+    def __init__(self, columns: Sequence[Tuple[str, Optional[str], float]],
+                 dtype: str = "float64"):
+        """
+        Args:
+            columns: Ordered (feature name, source key, default) tuples
+            dtype: Matrix dtype (float32 or float64)
+        """
+        if np.dtype(dtype) not in (np.dtype("float32"), np.dtype("float64")):
+            raise ValueError(f"Unsupported feature dtype: {dtype}")
+
+        self.columns = [(name, source, float(default)) for name, source, default in columns]
+        self.dtype = np.dtype(dtype)
+        self.names = [name for name, _, _ in self.columns]
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FeatureSchema):
+            return NotImplemented
+        return self.columns == other.columns and self.dtype == other.dtype
+
+    def allocate(self, n_rows: int) -> np.ndarray:
+        """Allocate an uninitialized (n_rows, n_features) matrix"""
+        return np.empty((n_rows, len(self.columns)), dtype=self.dtype)
+
+    def _check_out(self, out: Optional[np.ndarray], n_rows: int) -> np.ndarray:
+        if out is None:
+            return self.allocate(n_rows)
+        if out.shape != (n_rows, len(self.columns)):
+            raise ValueError(f"Output matrix has shape {out.shape}, expected {(n_rows, len(self.columns))}")
+        return out
+
+    def from_records(self, records: Sequence[Dict], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Fill a feature matrix from event/match dictionaries, one column at a time
+
+        Args:
+            records: Match data dictionaries
+            out: Optional preallocated matrix to fill
+
+        Returns:
+            Matrix of shape (len(records), n_features)
+        """
+        X = self._check_out(out, len(records))
+
+        for j, (_, source, default) in enumerate(self.columns):
+            if source is None:
+                X[:, j] = default
+                continue
+            values = (r.get(source) for r in records)
+            X[:, j] = [default if v is None else v for v in values]
+
+        return X
+
+    def from_dataframe(self, frame, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Fill a feature matrix from a pandas DataFrame whose columns are source keys
+
+        Args:
+            frame: DataFrame with one row per match
+            out: Optional preallocated matrix to fill
+
+        Returns:
+            Matrix of shape (len(frame), n_features)
+        """
+        X = self._check_out(out, len(frame))
+
+        for j, (_, source, default) in enumerate(self.columns):
+            if source is None or source not in frame.columns:
+                X[:, j] = default
+            else:
+                X[:, j] = frame[source].to_numpy(dtype=np.float64, na_value=default)
+
+        return X
+
+    def to_dict(self) -> Dict:
+        """Serializable form, stored alongside the model"""
+        return {
+            "columns": [list(column) for column in self.columns],
+            "dtype": self.dtype.name,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FeatureSchema":
+        return cls([tuple(column) for column in data["columns"]], dtype=data.get("dtype", "float64"))
+
+    def check_compatible(self, other: "FeatureSchema") -> None:
+        """
+        Raise ValueError if another schema would produce a different matrix layout
+        """
+        if self.names != other.names:
+            raise ValueError(f"Feature order mismatch: model expects {other.names}, predictor uses {self.names}")
+        changed = [a[0] for a, b in zip(self.columns, other.columns) if a != b]
+        if changed:
+            raise ValueError(f"Feature schema mismatch in columns {changed}")
+
+
+MATCH_FEATURE_SCHEMA = FeatureSchema([
+    ("home_team_form", "home_form", 0.5),
+    ("away_team_form", "away_form", 0.5),
+    ("home_advantage", None, 1.0),  # Home team advantage factor
+    ("head_to_head_home", "h2h_home_wins", 0.5),
+    ("recent_goals_home", "recent_goals_home", 1.5),
+    ("recent_goals_away", "recent_goals_away", 1.0),
+    ("injuries_home", "injuries_home_count", 0),
+    ("injuries_away", "injuries_away_count", 0),
+    ("home_possession_avg", "home_possession_avg", 50),
+    ("away_possession_avg", "away_possession_avg", 50),
+    ("home_shots_on_target_avg", "home_shots_avg", 4),
+    ("away_shots_on_target_avg", "away_shots_avg", 3),
+    ("momentum_factor", "momentum", 0.5),
+])
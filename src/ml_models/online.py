@@ -0,0 +1,308 @@
+"""
+Online Learning
+Incremental logistic model updates from settled bets
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Target labels used by MatchPredictor.train
+OUTCOME_LABELS = {"away_win": 0, "home_win": 1, "draw": 2}
+
+
+class RunningScaler:
+    """
+    StandardScaler with running mean/variance (Chan et al. batch merge)
+
+    Exposes `mean_`, `var_`, `scale_` and `n_samples_seen_` like sklearn's
+    StandardScaler, so it can stand in for one (including registry export).
+    """
+
+    def __init__(self, n_features: int):
+        self.mean_ = np.zeros(n_features)
+        self.var_ = np.ones(n_features)
+        self.n_samples_seen_ = 0
+
+    @classmethod
+    def from_scaler(cls, scaler) -> "RunningScaler":
+        """Continue from a fitted sklearn StandardScaler"""
+        running = cls(len(scaler.mean_))
+        running.mean_ = np.array(scaler.mean_, dtype=np.float64)
+        running.var_ = np.array(scaler.var_, dtype=np.float64)
+        running.n_samples_seen_ = int(np.max(scaler.n_samples_seen_))
+        return running
+
+    @property
+    def scale_(self) -> np.ndarray:
+        scale = np.sqrt(self.var_)
+        return np.where(scale > 0, scale, 1.0)
+
+    def partial_fit(self, X: np.ndarray) -> "RunningScaler":
+        n = len(X)
+        if n == 0:
+            return self
+        batch_mean = X.mean(axis=0)
+        batch_var = X.var(axis=0)
+        total = self.n_samples_seen_ + n
+        if self.n_samples_seen_ == 0:
+            self.mean_, self.var_ = batch_mean, batch_var
+        else:
+            delta = batch_mean - self.mean_
+            m2 = (self.var_ * self.n_samples_seen_ + batch_var * n
+                  + delta ** 2 * self.n_samples_seen_ * n / total)
+            self.mean_ = self.mean_ + delta * n / total
+            self.var_ = m2 / total
+        self.n_samples_seen_ = total
+        return self
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean_) / self.scale_
+
+    def copy(self) -> "RunningScaler":
+        clone = RunningScaler(len(self.mean_))
+        clone.mean_, clone.var_ = self.mean_.copy(), self.var_.copy()
+        clone.n_samples_seen_ = self.n_samples_seen_
+        return clone
+
+
+class SGDLogisticModel:
+    """
+    Multinomial logistic regression trained by mini-batch gradient descent
+
+    Exposes `coef_`, `intercept_`, `classes_` and `predict_proba` on scaled
+    features like sklearn's LogisticRegression.
+    """
+
+    def __init__(self, n_features: int, classes: Sequence = (0, 1, 2),
+                 learning_rate: float = 0.1, l2: float = 1e-4):
+        self.classes_ = np.asarray(classes)
+        self.coef_ = np.zeros((len(self.classes_), n_features))
+        self.intercept_ = np.zeros(len(self.classes_))
+        self.learning_rate = learning_rate
+        self.l2 = l2
+
+    @classmethod
+    def from_estimator(cls, estimator, learning_rate: float = 0.1, l2: float = 1e-4) -> "SGDLogisticModel":
+        """Warm start from a fitted sklearn LogisticRegression"""
+        coef = np.asarray(estimator.coef_, dtype=np.float64)
+        intercept = np.asarray(estimator.intercept_, dtype=np.float64)
+        model = cls(coef.shape[1], estimator.classes_, learning_rate, l2)
+        if coef.shape[0] == 1:
+            # Binary sigmoid == softmax over logits (0, w.x + b)
+            model.coef_[1], model.intercept_[1] = coef[0], intercept[0]
+        else:
+            model.coef_, model.intercept_ = coef.copy(), intercept.copy()
+        return model
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        logits = X @ self.coef_.T + self.intercept_
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def partial_fit(self, X: np.ndarray, y: np.ndarray, steps: int = 5) -> float:
+        """
+        Gradient steps on one mini-batch of scaled rows
+
+        Returns:
+            Mini-batch log loss before the update
+        """
+        onehot = (np.asarray(y)[:, None] == self.classes_[None, :]).astype(np.float64)
+        loss = None
+        for _ in range(steps):
+            probabilities = self.predict_proba(X)
+            if loss is None:
+                loss = float(-np.log(np.clip((probabilities * onehot).sum(axis=1), 1e-15, 1.0)).mean())
+            error = (probabilities - onehot) / len(X)
+            self.coef_ -= self.learning_rate * (error.T @ X + self.l2 * self.coef_)
+            self.intercept_ -= self.learning_rate * error.sum(axis=0)
+        return loss
+
+    def copy(self) -> "SGDLogisticModel":
+        clone = SGDLogisticModel(self.coef_.shape[1], self.classes_, self.learning_rate, self.l2)
+        clone.coef_, clone.intercept_ = self.coef_.copy(), self.intercept_.copy()
+        return clone
+
+
+class OnlineLearner:
+    """
+    Incremental updates of a MatchPredictor from settled bets
+
+    The learner trains a private scaler/model pair and, after each
+    mini-batch, publishes copies of both as the served snapshot with a single
+    reference swap. Predictions read whichever snapshot is current and never
+    wait for an update. With `background=True`, mini-batches are applied on a
+    worker thread, so settling bets does not wait either.
+
+    A trained logistic regression is continued from its coefficients and
+    served right away; an untrained predictor is served once the first
+    mini-batch is applied. Other trained models cannot be continued and are
+    rejected. The predictor's calibrator was fitted to the previous model, so
+    it is dropped when the learner takes over serving.
+    """
+
+    def __init__(self, predictor, batch_size: int = 64, learning_rate: float = 0.1,
+                 l2: float = 1e-4, steps: int = 5, background: bool = True,
+                 max_pending: int = 100):
+        """
+        Args:
+            predictor: MatchPredictor to serve from (untrained, or holding a
+                trained logistic regression to warm-start from)
+            batch_size: Settled matches buffered per update
+            learning_rate: Gradient step size
+            l2: L2 penalty
+            steps: Gradient steps per mini-batch
+            background: Apply updates on a worker thread
+            max_pending: Mini-batches queued before new ones are dropped
+        """
+        self.predictor = predictor
+        self.batch_size = batch_size
+        self.steps = steps
+        n_features = len(predictor.feature_schema)
+
+        warm = predictor.is_trained and hasattr(predictor.model, "coef_") and predictor.scaler is not None
+        if predictor.is_trained and not warm:
+            raise ValueError(f"Cannot continue a trained {predictor.model_type} model online; "
+                             f"train a logistic_regression or start from an untrained predictor")
+        if warm:
+            self.scaler = RunningScaler.from_scaler(predictor.scaler)
+            self.model = SGDLogisticModel.from_estimator(predictor.model, learning_rate, l2)
+        else:
+            self.scaler = RunningScaler(n_features)
+            self.model = SGDLogisticModel(n_features, sorted(OUTCOME_LABELS.values()), learning_rate, l2)
+
+        self._snapshot = (self.scaler.copy(), self.model.copy())
+        self._buffer_X: List[np.ndarray] = []
+        self._buffer_y: List[int] = []
+        self._update_lock = threading.Lock()
+        self._buffer_lock = threading.Lock()
+        self.stats = {"updates": 0, "rows": 0, "dropped": 0, "last_loss": None, "last_update_seconds": None}
+
+        self._queue = None
+        self._worker = None
+        if background:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._worker = threading.Thread(target=self._run, name="online-learner", daemon=True)
+            self._worker.start()
+
+        if warm:
+            self._serve()
+
+    # Serving
+
+    @property
+    def version(self) -> int:
+        return self.stats["updates"]
+
+    def _serve(self) -> None:
+        """Route the predictor's predictions through the current snapshot"""
+        if self.predictor.served_model is self:
+            return
+        if self.predictor.calibrator is not None:
+            logger.info("Dropping calibration fitted for the previous model; refit with fit_calibration")
+            self.predictor.calibrator = None
+        self.predictor.served_model = self
+        self.predictor.is_trained = True
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities for raw features from the current snapshot"""
+        scaler, model = self._snapshot
+        return model.predict_proba(scaler.transform(np.asarray(X, dtype=np.float64)))
+
+    # Updates
+
+    def update(self, X: np.ndarray, y: Sequence[int]) -> Dict:
+        """Apply one mini-batch now and publish the new snapshot"""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        start = time.perf_counter()
+        with self._update_lock:
+            self.scaler.partial_fit(X)
+            loss = self.model.partial_fit(self.scaler.transform(X), y, self.steps)
+            self._snapshot = (self.scaler.copy(), self.model.copy())
+
+            self.stats["updates"] += 1
+            self.stats["rows"] += len(X)
+            self.stats["last_loss"] = loss
+            self.stats["last_update_seconds"] = time.perf_counter() - start
+        self._serve()
+        logger.debug(f"Online update {self.version}: {len(X)} rows, loss {loss:.4f}, "
+                     f"{self.stats['last_update_seconds'] * 1000:.2f}ms")
+        return dict(self.stats)
+
+    def _submit(self, X: np.ndarray, y: np.ndarray) -> None:
+        if self._queue is None:
+            self.update(X, y)
+            return
+        try:
+            self._queue.put_nowait((X, y))
+        except queue.Full:
+            self.stats["dropped"] += len(X)
+            logger.warning(f"Online learner queue full; dropped {len(X)} settled matches")
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self.update(*item)
+            except Exception as e:
+                logger.error(f"Online update failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def add_results(self, matches: List[Dict], outcomes: Sequence[str]) -> None:
+        """
+        Buffer settled matches; a mini-batch is applied every `batch_size` matches
+
+        Args:
+            matches: Match data dictionaries (as passed to `predict_many`)
+            outcomes: Winning outcome per match (home_win, draw, away_win)
+        """
+        labelled = [(m, OUTCOME_LABELS[o]) for m, o in zip(matches, outcomes) if o in OUTCOME_LABELS]
+        if not labelled:
+            return
+        X = self.predictor.feature_schema.from_records([m for m, _ in labelled]).astype(np.float64)
+        with self._buffer_lock:
+            self._buffer_X.append(X)
+            self._buffer_y.extend(label for _, label in labelled)
+            full = len(self._buffer_y) >= self.batch_size
+
+        if full:
+            self.flush(wait=False)
+
+    def add_result(self, match: Dict, outcome: str) -> None:
+        self.add_results([match], [outcome])
+
+    def flush(self, wait: bool = True) -> None:
+        """Apply buffered matches; with `wait`, block until queued updates are done"""
+        with self._buffer_lock:
+            pending = (np.vstack(self._buffer_X), np.asarray(self._buffer_y)) if self._buffer_y else None
+            self._buffer_X, self._buffer_y = [], []
+        if pending is not None:
+            self._submit(*pending)
+        if wait and self._queue is not None:
+            self._queue.join()
+
+    def export(self) -> None:
+        """Make the current snapshot the predictor's model (for `save_model` or registry publishing)"""
+        scaler, model = self._snapshot
+        self.predictor.scaler = scaler.copy()
+        self.predictor.model = model.copy()
+        self.predictor.model_type = "logistic_regression"
+
+    def close(self) -> None:
+        """Apply buffered matches and stop the worker thread"""
+        self.flush()
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+            self._queue = None
@@ -4,41 +4,73 @@ Predictive models for match outcomes and betting predictions
 """
 import logging
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-import joblib
-from typing import Dict, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
 from pathlib import Path
+from .features import FeatureSchema, MATCH_FEATURE_SCHEMA
+from .compiled import CompiledGradientBoosting
+from .calibration import ProbabilityCalibrator
+from .registry import ModelHandle
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PARAMS = {
+    "gradient_boosting": {
+        "n_estimators": 100,
+        "learning_rate": 0.1,
+        "max_depth": 5,
+        "random_state": 42,
+    },
+    "logistic_regression": {
+        "max_iter": 1000,
+        "random_state": 42,
+    },
+}
+
+
+def build_estimator(model_type: str, params: Optional[Dict] = None):
+    """Untrained estimator for a model type, with `params` overriding DEFAULT_PARAMS"""
+    if model_type == "gradient_boosting":
+        from sklearn.ensemble import GradientBoostingClassifier as estimator_cls
+    elif model_type == "logistic_regression":
+        from sklearn.linear_model import LogisticRegression as estimator_cls
+    else:
+        raise ValueError(f"Unknown model type: {model_type}")
+    return estimator_cls(**{**DEFAULT_PARAMS[model_type], **(params or {})})
+
+
 class MatchPredictor:
     """
     Machine Learning predictor for match outcomes
     Supports multiple models: Logistic Regression, XGBoost, etc.
+
+    scikit-learn is imported only when a model is trained or loaded from a
+    pickle; models served from a ModelRegistry never import it.
     """
     
-    def __init__(self, model_type: str = "gradient_boosting"):
+    def __init__(self, model_type: str = "gradient_boosting",
+                 feature_schema: Optional[FeatureSchema] = None,
+                 params: Optional[Dict] = None):
         self.model_type = model_type
+        self.params = dict(params or {})
+        self.training_report = None
+        self.calibrator = None
         self.model = None
-        self.scaler = StandardScaler()
-        self.feature_names = []
+        self.scaler = None
+        self.feature_schema = feature_schema or MATCH_FEATURE_SCHEMA
+        self.feature_names = list(self.feature_schema.names)
         self.is_trained = False
-        
-        if model_type == "gradient_boosting":
-            self.model = GradientBoostingClassifier(
-                n_estimators=100,
-                learning_rate=0.1,
-                max_depth=5,
-                random_state=42
-            )
-        elif model_type == "logistic_regression":
-            self.model = LogisticRegression(
-                max_iter=1000,
-                random_state=42
-            )
+        self.served_model = None
+        self._calibration_version = None
+    
+    def _build_estimators(self) -> None:
+        """Create the untrained scaler and estimator for `model_type`"""
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler()
+        self.model = build_estimator(self.model_type, self.params)
     
     def extract_features(self, match_data: Dict) -> np.ndarray:
         """
@@ -51,26 +83,23 @@ class MatchPredictor:
         - Player availability (injuries)
         - Weather conditions
         - Season stage
+
+        Column order and defaults come from `self.feature_schema`.
         """
-        features = {
-            "home_team_form": match_data.get("home_form", 0.5),
-            "away_team_form": match_data.get("away_form", 0.5),
-            "home_advantage": 1.0,  # Home team advantage factor
-            "head_to_head_home": match_data.get("h2h_home_wins", 0.5),
-            "recent_goals_home": match_data.get("recent_goals_home", 1.5),
-            "recent_goals_away": match_data.get("recent_goals_away", 1.0),
-            "injuries_home": match_data.get("injuries_home_count", 0),
-            "injuries_away": match_data.get("injuries_away_count", 0),
-            "home_possession_avg": match_data.get("home_possession_avg", 50),
-            "away_possession_avg": match_data.get("away_possession_avg", 50),
-            "home_shots_on_target_avg": match_data.get("home_shots_avg", 4),
-            "away_shots_on_target_avg": match_data.get("away_shots_avg", 3),
-            "momentum_factor": match_data.get("momentum", 0.5),
-        }
-        
-        self.feature_names = list(features.keys())
-        return np.array(list(features.values())).reshape(1, -1)
+        return self.feature_schema.from_records([match_data])
     
+    def extract_feature_matrix(self, matches: List[Dict]) -> np.ndarray:
+        """
+        Extract features for many matches into one (n_matches, n_features) matrix
+        """
+        return self.feature_schema.from_records(matches)
+
+    def extract_feature_frame(self, frame: "pd.DataFrame") -> np.ndarray:
+        """
+        Extract features from a DataFrame with one row per match
+        """
+        return self.feature_schema.from_dataframe(frame)
+
     def train(self, X_train: np.ndarray, y_train: np.ndarray) -> None:
         """
         Train the predictive model
@@ -80,52 +109,132 @@ class MatchPredictor:
             y_train: Target labels (0: away win, 1: home win, 2: draw)
         """
         try:
+            self._build_estimators()
             X_scaled = self.scaler.fit_transform(X_train)
             self.model.fit(X_scaled, y_train)
+            self.served_model = None
+            self.calibrator = None
             self.is_trained = True
             logger.info(f"Model trained successfully: {self.model_type}")
         except Exception as e:
             logger.error(f"Error training model: {str(e)}")
     
-    def predict_probability(self, match_data: Dict) -> Dict[str, float]:
+    def predict_proba_matrix(self, X: np.ndarray) -> np.ndarray:
+        """Uncalibrated class probabilities (columns in `classes_` order) for a feature matrix"""
+        if self.served_model is not None:
+            return self.served_model.predict_proba(X)
+
+        X_scaled = self.scaler.transform(X)
+        if hasattr(self.model, 'predict_proba'):
+            return self.model.predict_proba(X_scaled)
+        return self.model.predict(X_scaled).reshape(len(X), -1)
+
+    def fit_calibration(self, X: np.ndarray, y: np.ndarray,
+                        sports: Optional[List[str]] = None,
+                        markets: Optional[List[str]] = None,
+                        method: str = "isotonic", min_samples: int = 200) -> ProbabilityCalibrator:
         """
-        Predict match outcome probabilities
-        
+        Fit per-(sport, market) calibration on held-out rows
+
+        Args:
+            X: Feature matrix not used for training
+            y: Target labels
+            sports: Sport per row
+            markets: Market per row
+            method: "isotonic" or "platt"
+            min_samples: Rows needed for a dedicated (sport, market) map
+
         Returns:
-            Dictionary with probabilities for each outcome
+            The fitted calibrator, applied by `predict_many` from now on
+        """
+        if not self.is_trained:
+            raise ValueError("Cannot calibrate an untrained model")
+
+        probabilities = self.predict_proba_matrix(X)
+        classes = getattr(self.model, "classes_", None)
+        if classes is None and hasattr(self.served_model, "manifest"):
+            classes = self.served_model.manifest().get("classes")
+        y_index = np.searchsorted(np.asarray(classes), y) if classes is not None else np.asarray(y)
+
+        self.calibrator = ProbabilityCalibrator(method, min_samples).fit(probabilities, y_index, sports, markets)
+        return self.calibrator
+
+    def predict_many(self, matches: List[Dict], market: Optional[str] = "match_odds") -> Dict[str, np.ndarray]:
+        """
+        Predict outcome probabilities for a batch of matches in a single model call
+
+        Args:
+            matches: List of match data dictionaries
+            market: Market the probabilities are calibrated for (with each match's `sport`)
+
+        Returns:
+            Columnar dictionary of arrays aligned with the input order
+            (home_win, draw, away_win, confidence)
         """
         if not self.is_trained:
             logger.warning("Model not trained yet")
             return {}
-        
+
         try:
-            X = self.extract_features(match_data)
-            X_scaled = self.scaler.transform(X)
-            
-            if hasattr(self.model, 'predict_proba'):
-                probabilities = self.model.predict_proba(X_scaled)[0]
+            X = self.extract_feature_matrix(matches)
+            if len(X) == 0:
+                empty = np.empty(0)
+                return {"home_win": empty, "draw": empty, "away_win": empty, "confidence": empty}
+
+            calibrator = self.calibrator
+            if isinstance(self.served_model, ModelHandle):
+                # One snapshot for both, so a concurrent hot swap cannot mix versions
+                compiled = self.served_model.model
+                if compiled.version != self._calibration_version:
+                    calibrator = self.calibrator = compiled.calibrator
+                    self._calibration_version = compiled.version
+                probabilities = compiled.predict_proba(X)
             else:
-                probabilities = self.model.predict(X_scaled)
-            
+                probabilities = self.predict_proba_matrix(X)
+            if calibrator is not None:
+                probabilities = calibrator.transform(
+                    probabilities, [m.get("sport") for m in matches], [market] * len(matches)
+                )
+
+            n_classes = probabilities.shape[1]
             return {
-                "home_win": float(probabilities[1] if len(probabilities) > 1 else probabilities[0]),
-                "draw": float(probabilities[2] if len(probabilities) > 2 else 0.0),
-                "away_win": float(probabilities[0] if len(probabilities) > 0 else 1 - probabilities[1]),
-                "confidence": float(np.max(probabilities)),
+                "home_win": probabilities[:, 1] if n_classes > 1 else probabilities[:, 0],
+                "draw": probabilities[:, 2] if n_classes > 2 else np.zeros(len(X)),
+                "away_win": probabilities[:, 0],
+                "confidence": probabilities.max(axis=1),
             }
-            
+
         except Exception as e:
-            logger.error(f"Error in prediction: {str(e)}")
+            logger.error(f"Error in batch prediction: {str(e)}")
             return {}
-    
+
+    def predict_probability(self, match_data: Dict) -> Dict[str, float]:
+        """
+        Predict match outcome probabilities
+
+        Returns:
+            Dictionary with probabilities for each outcome
+        """
+        predictions = self.predict_many([match_data])
+        if not predictions:
+            return {}
+
+        return {key: float(values[0]) for key, values in predictions.items()}
+
     def save_model(self, filepath: str) -> None:
         """Save trained model to disk"""
         try:
+            import joblib
+
             joblib.dump({
                 "model": self.model,
                 "scaler": self.scaler,
                 "feature_names": self.feature_names,
+                "feature_schema": self.feature_schema.to_dict(),
                 "model_type": self.model_type,
+                "params": self.params,
+                "training_report": self.training_report,
+                "calibration": self.calibrator.to_dict() if self.calibrator is not None else None,
             }, filepath)
             logger.info(f"Model saved to {filepath}")
         except Exception as e:
@@ -134,16 +243,83 @@ class MatchPredictor:
     def load_model(self, filepath: str) -> None:
         """Load trained model from disk"""
         try:
+            import joblib
+
             data = joblib.load(filepath)
+            if "feature_schema" in data:
+                self.feature_schema.check_compatible(FeatureSchema.from_dict(data["feature_schema"]))
+            elif data.get("feature_names") and data["feature_names"] != self.feature_schema.names:
+                raise ValueError(f"Feature order mismatch: model expects {data['feature_names']}")
+
             self.model = data["model"]
             self.scaler = data["scaler"]
             self.feature_names = data["feature_names"]
             self.model_type = data["model_type"]
+            self.params = data.get("params", {})
+            self.training_report = data.get("training_report")
+            calibration = data.get("calibration")
+            self.calibrator = ProbabilityCalibrator.from_dict(calibration) if calibration else None
+            self.served_model = None
             self.is_trained = True
             logger.info(f"Model loaded from {filepath}")
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
 
+    def compile_model(self) -> bool:
+        """
+        Score with a pure-NumPy export of the trained gradient boosting model
+        (see CompiledGradientBoosting) instead of sklearn's predict_proba
+
+        Returns:
+            True if the model was compiled
+        """
+        if not self.is_trained or self.served_model is not None:
+            return False
+        try:
+            self.served_model = CompiledGradientBoosting.from_sklearn(self.model, self.scaler)
+            logger.info(f"Model compiled to NumPy arrays ({self.served_model.n_stages} stages)")
+            return True
+        except ValueError as e:
+            logger.warning(f"Model not compiled: {str(e)}")
+            return False
+
+    def load_from_registry(self, registry, name: str = "match_predictor",
+                           version: Optional[str] = None,
+                           check_interval: Optional[float] = None) -> bool:
+        """
+        Serve predictions from a ModelRegistry version
+
+        Only the manifest is read here; arrays are memory-mapped on the first
+        prediction, and the handle follows hot swaps of the active version.
+
+        Args:
+            registry: ModelRegistry holding the model
+            name: Model name
+            version: Pinned version (default: follow the active version)
+            check_interval: Seconds between checks for a newly activated version
+
+        Returns:
+            True if the model can be served
+        """
+        try:
+            handle = registry.handle(name, version=version, check_interval=check_interval,
+                                     feature_schema=self.feature_schema)
+            manifest = handle.manifest()
+            self.feature_schema.check_compatible(FeatureSchema.from_dict(manifest["feature_schema"]))
+
+            self.served_model = handle
+            self.model_type = manifest.get("model_type", self.model_type)
+            calibration = manifest.get("calibration")
+            self.calibrator = ProbabilityCalibrator.from_dict(calibration) if calibration else None
+            # Replaced by the served version's own calibration after each hot swap
+            self._calibration_version = manifest["version"]
+            self.is_trained = True
+            logger.info(f"Serving model {name} {handle.version} from registry")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading model from registry: {str(e)}")
+            return False
+
 class OddsConverter:
     """
     Convert between different odds formats and calculate implied probabilities
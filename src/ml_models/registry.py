@@ -0,0 +1,398 @@
+"""
+Model Registry
+Versioned on-disk models stored as NumPy arrays for memory-mapped serving
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .calibration import ProbabilityCalibrator
+from .compiled import CompiledGradientBoosting
+from .features import FeatureSchema
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_softmax_linear(model) -> bool:
+    """
+    True if `predict_proba` is a sigmoid (one coefficient row) or softmax over
+    `X @ coef_.T + intercept_`: multinomial LogisticRegression and the online
+    SGDLogisticModel. One-vs-rest models normalize per-class sigmoids instead.
+    """
+    name = type(model).__name__
+    if name == "SGDLogisticModel":
+        return True
+    if name != "LogisticRegression":
+        return False
+    if np.asarray(model.coef_).shape[0] == 1:
+        return True
+    multi_class = getattr(model, "multi_class", "auto")
+    if multi_class == "ovr":
+        return False
+    return not (multi_class in ("auto", "deprecated") and model.solver == "liblinear")
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class CompiledModel:
+    """
+    One loaded model version
+
+    Arrays are opened with `np.load(mmap_mode="r")`, so forked workers share
+    the same read-only pages. Scaling is applied here, so `predict_proba`
+    takes raw feature matrices. The version's calibration travels with it, so
+    a hot swap replaces model and calibrator together.
+    """
+
+    def __init__(self, path: Path, manifest: Dict):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.checksum = manifest["checksum"]
+        self.model_type = manifest.get("model_type")
+        self.format = manifest["format"]
+        self.arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r")
+            for name in manifest["arrays"]
+        }
+        self._estimator = None
+        self._evaluator = CompiledGradientBoosting(self.arrays) if self.format == "gbm" else None
+        calibration = manifest.get("calibration")
+        self.calibrator = ProbabilityCalibrator.from_dict(calibration) if calibration else None
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.arrays["scaler_mean"]) / self.arrays["scaler_scale"]
+
+    def _load_estimator(self):
+        if self._estimator is None:
+            import joblib
+
+            self._estimator = joblib.load(self.path / "estimator.joblib", mmap_mode="r")
+        return self._estimator
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities (columns in `manifest["classes"]` order) for raw features"""
+        if self._evaluator is not None:
+            return self._evaluator.predict_proba(X)
+
+        X_scaled = self._scale(np.asarray(X, dtype=np.float64))
+
+        if self.format == "linear":
+            logits = X_scaled @ self.arrays["coef"].T + self.arrays["intercept"]
+            if logits.shape[1] == 1:
+                p = 1.0 / (1.0 + np.exp(-logits[:, 0]))
+                return np.column_stack([1.0 - p, p])
+            return _softmax(logits)
+
+        if self.format == "joblib":
+            return self._load_estimator().predict_proba(X_scaled)
+
+        raise ValueError(f"Unknown model format: {self.format}")
+
+
+class ModelRegistry:
+    """
+    Versioned model store
+
+    Layout:
+        <root>/<name>/<version>/manifest.json   format, schema, classes, file checksums
+        <root>/<name>/<version>/*.npy           scaler and model arrays
+        <root>/<name>/CURRENT                   active version
+
+    Multinomial (or binary) logistic regressions and gradient boosting models
+    are stored entirely as arrays. Other
+    estimators keep their scaler as arrays and the estimator as an uncompressed
+    joblib file, loaded with `mmap_mode="r"`. Versions are immutable once
+    published.
+    """
+
+    def __init__(self, root: PathLike):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # Layout
+
+    def _model_dir(self, name: str) -> Path:
+        return self.root / name
+
+    def versions(self, name: str) -> List[str]:
+        """Published versions, oldest first"""
+        model_dir = self._model_dir(name)
+        if not model_dir.exists():
+            return []
+        return sorted(p.name for p in model_dir.iterdir() if (p / "manifest.json").exists())
+
+    def current_version(self, name: str) -> Optional[str]:
+        """Active version, or None if nothing was activated"""
+        pointer = self._model_dir(name) / "CURRENT"
+        if not pointer.exists():
+            return None
+        return pointer.read_text().strip() or None
+
+    def activate(self, name: str, version: str) -> None:
+        """Point CURRENT at a published version (picked up by `ModelHandle.refresh`)"""
+        if version not in self.versions(name):
+            raise ValueError(f"Unknown version {version} for model {name}")
+        tmp = self._model_dir(name) / ".CURRENT.tmp"
+        tmp.write_text(version)
+        os.replace(tmp, self._model_dir(name) / "CURRENT")
+        logger.info(f"Model {name} activated at {version}")
+
+    def manifest(self, name: str, version: Optional[str] = None) -> Dict:
+        version = version or self.current_version(name)
+        if version is None:
+            raise ValueError(f"Model {name} has no active version")
+        return json.loads((self._model_dir(name) / version / "manifest.json").read_text())
+
+    # Publishing
+
+    @staticmethod
+    def _export(predictor) -> Dict:
+        """Arrays (and estimator, if not array-native) describing a trained predictor"""
+        scaler = predictor.scaler
+        model = predictor.model
+        if hasattr(model, "estimators_") and hasattr(model, "init_"):
+            try:
+                arrays = CompiledGradientBoosting.export_arrays(model, scaler)
+                return {"format": "gbm", "arrays": arrays, "estimator": None}
+            except ValueError as e:
+                logger.warning(f"Storing gradient boosting model as joblib: {str(e)}")
+
+        arrays = {
+            "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+            "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+        }
+
+        if _is_softmax_linear(model):
+            arrays["coef"] = np.asarray(model.coef_, dtype=np.float64)
+            arrays["intercept"] = np.asarray(model.intercept_, dtype=np.float64)
+            return {"format": "linear", "arrays": arrays, "estimator": None}
+
+        return {"format": "joblib", "arrays": arrays, "estimator": model}
+
+    def publish(self, predictor, name: str = "match_predictor", version: Optional[str] = None,
+                activate: bool = True) -> str:
+        """
+        Store a trained MatchPredictor as a new immutable version
+
+        Args:
+            predictor: Trained MatchPredictor
+            name: Model name
+            version: Version label (default: next vNNNN)
+            activate: Make it the active version
+
+        Returns:
+            Version label
+        """
+        if not predictor.is_trained:
+            raise ValueError("Cannot publish an untrained model")
+
+        existing = self.versions(name)
+        if version is None:
+            version = f"v{len(existing) + 1:04d}"
+            while version in existing:
+                version = f"v{int(version[1:]) + 1:04d}"
+        elif version in existing:
+            raise ValueError(f"Version {version} of model {name} already exists")
+
+        export = self._export(predictor)
+        model_dir = self._model_dir(name)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = model_dir / f".{version}.tmp"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir()
+
+        files = {}
+        for array_name, values in export["arrays"].items():
+            np.save(tmp_dir / f"{array_name}.npy", np.ascontiguousarray(values))
+            files[f"{array_name}.npy"] = _sha256(tmp_dir / f"{array_name}.npy")
+        if export["estimator"] is not None:
+            import joblib
+
+            joblib.dump(export["estimator"], tmp_dir / "estimator.joblib")
+            files["estimator.joblib"] = _sha256(tmp_dir / "estimator.joblib")
+
+        model = predictor.model
+        manifest = {
+            "name": name,
+            "version": version,
+            "format": export["format"],
+            "model_type": predictor.model_type,
+            "feature_schema": predictor.feature_schema.to_dict(),
+            "calibration": predictor.calibrator.to_dict() if predictor.calibrator is not None else None,
+            "classes": [int(c) if isinstance(c, (int, np.integer)) else c
+                        for c in getattr(model, "classes_", [])],
+            "arrays": list(export["arrays"]),
+            "files": files,
+            "checksum": hashlib.sha256("".join(files[f] for f in sorted(files)).encode()).hexdigest(),
+            "created_at": datetime.now().isoformat(),
+        }
+        (tmp_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp_dir, model_dir / version)
+        logger.info(f"Model {name} published as {version} ({export['format']}, {manifest['checksum'][:12]})")
+
+        if activate:
+            self.activate(name, version)
+        return version
+
+    # Loading
+
+    def verify(self, name: str, version: Optional[str] = None) -> Dict:
+        """
+        Recompute file checksums of a version
+
+        Returns:
+            The version's manifest
+
+        Raises:
+            ValueError: On a missing or modified file
+        """
+        manifest = self.manifest(name, version)
+        path = self._model_dir(name) / manifest["version"]
+        for file_name, expected in manifest["files"].items():
+            if not (path / file_name).exists():
+                raise ValueError(f"Model {name} {manifest['version']}: missing {file_name}")
+            if _sha256(path / file_name) != expected:
+                raise ValueError(f"Model {name} {manifest['version']}: checksum mismatch in {file_name}")
+        return manifest
+
+    def load(self, name: str, version: Optional[str] = None, verify: bool = True) -> CompiledModel:
+        """Open a version (default: the active one) with memory-mapped arrays"""
+        manifest = self.verify(name, version) if verify else self.manifest(name, version)
+        return CompiledModel(self._model_dir(name) / manifest["version"], manifest)
+
+    def handle(self, name: str = "match_predictor", version: Optional[str] = None,
+               check_interval: Optional[float] = None, verify: bool = True,
+               feature_schema: Optional[FeatureSchema] = None) -> "ModelHandle":
+        """Lazy, hot-swappable reference to a model (see ModelHandle)"""
+        return ModelHandle(self, name, version=version, check_interval=check_interval, verify=verify,
+                           feature_schema=feature_schema)
+
+
+class ModelHandle:
+    """
+    Lazily loaded, hot-swappable model reference
+
+    Nothing is read until the first prediction. `refresh()` (or, with
+    `check_interval`, the next prediction after the interval) follows the
+    registry's CURRENT pointer and swaps in the new version; predictions
+    already running keep the version they started with. With a feature
+    schema, a version built on an incompatible schema is never served.
+    """
+
+    def __init__(self, registry: ModelRegistry, name: str, version: Optional[str] = None,
+                 check_interval: Optional[float] = None, verify: bool = True,
+                 feature_schema: Optional[FeatureSchema] = None):
+        """
+        Args:
+            registry: Model registry
+            name: Model name
+            version: Pinned version (default: follow CURRENT)
+            check_interval: Seconds between automatic CURRENT checks (None disables)
+            verify: Check file checksums before serving a version
+            feature_schema: Schema every served version must be compatible with
+        """
+        self.registry = registry
+        self.name = name
+        self.pinned_version = version
+        self.check_interval = check_interval
+        self.verify = verify
+        self.feature_schema = feature_schema
+        self._model = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, version: Optional[str]) -> CompiledModel:
+        """Open a version, raising ValueError if its feature schema is incompatible"""
+        model = self.registry.load(self.name, version, verify=self.verify)
+        if self.feature_schema is not None:
+            self.feature_schema.check_compatible(FeatureSchema.from_dict(model.manifest["feature_schema"]))
+        return model
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self) -> CompiledModel:
+        model = self._model
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load(self.pinned_version)
+                    self._last_check = time.monotonic()
+                model = self._model
+        elif self.check_interval is not None and time.monotonic() - self._last_check >= self.check_interval:
+            self.refresh()
+            model = self._model
+        return model
+
+    @property
+    def version(self) -> Optional[str]:
+        """Loaded version, or the version that would be loaded"""
+        if self._model is not None:
+            return self._model.version
+        return self.pinned_version or self.registry.current_version(self.name)
+
+    def manifest(self) -> Dict:
+        """Manifest of the loaded (or next) version, without loading arrays"""
+        if self._model is not None:
+            return self._model.manifest
+        return self.registry.manifest(self.name, self.pinned_version)
+
+    def refresh(self) -> bool:
+        """
+        Swap to the registry's active version if it changed
+
+        Returns:
+            True if a new version was swapped in
+        """
+        self._last_check = time.monotonic()
+        if self.pinned_version is not None:
+            return False
+
+        current = self.registry.current_version(self.name)
+        if current is None or (self._model is not None and self._model.version == current):
+            return False
+        return self.swap(current)
+
+    def swap(self, version: str) -> bool:
+        """Load a version and make it the one served (kept on failure)"""
+        try:
+            model = self._load(version)
+        except Exception as e:
+            logger.error(f"Model {self.name} hot-swap to {version} failed: {str(e)}")
+            return False
+
+        with self._lock:
+            previous = self._model.version if self._model is not None else None
+            self._model = model
+        logger.info(f"Model {self.name} swapped {previous} -> {version}")
+        return True
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.model.predict_proba(X)
@@ -0,0 +1,279 @@
+"""
+Model Training
+Time-series cross-validation and parallel hyperparameter search for MatchPredictor
+"""
+import itertools
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .predictor import MatchPredictor, build_estimator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARAM_GRIDS = {
+    "gradient_boosting": {
+        "n_estimators": [100, 200],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [3, 5],
+    },
+    "logistic_regression": {
+        "C": [0.1, 1.0, 10.0],
+    },
+}
+
+
+def time_series_folds(n_samples: int, n_splits: int = 5, gap: int = 0,
+                      min_train_size: Optional[int] = None) -> List[Tuple[int, int, int]]:
+    """
+    Expanding-window folds over chronologically ordered rows
+
+    Each fold trains on rows [0, train_end) and validates on the following
+    block [train_end + gap, val_end), so no fold sees rows from its future.
+
+    Returns:
+        (train_end, val_start, val_end) per fold
+    """
+    if n_splits < 1:
+        raise ValueError("n_splits must be at least 1")
+    val_size = (n_samples - gap - (min_train_size or 0)) // (n_splits + (0 if min_train_size else 1))
+    if val_size < 1:
+        raise ValueError(f"Not enough samples ({n_samples}) for {n_splits} folds")
+
+    folds = []
+    for i in range(n_splits):
+        val_end = n_samples - (n_splits - 1 - i) * val_size
+        val_start = val_end - val_size
+        folds.append((val_start - gap, val_start, val_end))
+    return folds
+
+
+def expand_grid(param_grid: Dict[str, Sequence]) -> List[Dict]:
+    """Every combination of a {param: values} grid, in a stable order"""
+    keys = sorted(param_grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+
+
+def calibration_metrics(probabilities: np.ndarray, y: np.ndarray, n_bins: int = 10) -> Dict[str, float]:
+    """
+    Log loss, multi-class Brier score, accuracy and expected calibration error
+
+    Args:
+        probabilities: (n_samples, n_classes) predicted probabilities
+        y: Class indices into the probability columns
+        n_bins: Confidence bins for the calibration error
+    """
+    n = len(y)
+    rows = np.arange(n)
+    true_p = np.clip(probabilities[rows, y], 1e-15, 1.0)
+    onehot = np.zeros_like(probabilities)
+    onehot[rows, y] = 1.0
+
+    confidence = probabilities.max(axis=1)
+    correct = probabilities.argmax(axis=1) == y
+    bins = np.minimum((confidence * n_bins).astype(int), n_bins - 1)
+    gaps = np.abs(np.bincount(bins, weights=correct, minlength=n_bins)
+                  - np.bincount(bins, weights=confidence, minlength=n_bins))
+
+    return {
+        "log_loss": float(-np.log(true_p).mean()),
+        "brier": float(((probabilities - onehot) ** 2).sum(axis=1).mean()),
+        "accuracy": float(correct.mean()),
+        "ece": float(gaps.sum() / n) if n else 0.0,
+        "n_samples": int(n),
+    }
+
+
+def _evaluate_fold(task: Dict) -> Dict:
+    """
+    Fit one candidate on one cached fold (runs in a worker process)
+
+    Fold matrices are memory-mapped from the cache directory, so workers
+    share the parent's scaled features instead of receiving copies.
+    """
+    fold_dir = Path(task["fold_dir"])
+    X_train = np.load(fold_dir / "X_train.npy", mmap_mode="r")
+    y_train = np.load(fold_dir / "y_train.npy")
+    X_val = np.load(fold_dir / "X_val.npy", mmap_mode="r")
+    y_val = np.load(fold_dir / "y_val.npy")
+    n_classes = task["n_classes"]
+
+    start = time.perf_counter()
+    model = build_estimator(task["model_type"], task["params"])
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    # Classes absent from an early training window get zero probability
+    probabilities = np.zeros((len(y_val), n_classes))
+    probabilities[:, model.classes_] = model.predict_proba(X_val)
+    metrics = calibration_metrics(probabilities, y_val)
+    metrics["fit_seconds"] = fit_seconds
+    return {"candidate": task["candidate"], "fold": task["fold"], **metrics}
+
+
+class HyperparameterSearch:
+    """
+    Time-series cross-validated grid search over a process pool
+
+    Rows must be in chronological order. Each fold's scaler is fitted on its
+    training window only, and the scaled fold matrices are written once to a
+    cache directory that every candidate reads. Candidates are evaluated fold
+    by fold across all workers; after each fold, candidates whose mean
+    validation log loss is more than `prune_tolerance` worse than the best are
+    stopped. The winner is refitted on all rows.
+    """
+
+    def __init__(self, model_type: str = "gradient_boosting",
+                 param_grid: Optional[Dict[str, Sequence]] = None,
+                 n_splits: int = 5, gap: int = 0, n_jobs: Optional[int] = None,
+                 prune_tolerance: Optional[float] = 0.1,
+                 cache_dir: Optional[str] = None):
+        """
+        Args:
+            model_type: MatchPredictor model type
+            param_grid: {param: values} to search (default: DEFAULT_PARAM_GRIDS)
+            n_splits: Time-series folds
+            gap: Rows skipped between each training window and its validation block
+            n_jobs: Worker processes (default: all cores; 1 runs in-process)
+            prune_tolerance: Relative log loss margin for early stopping (None disables)
+            cache_dir: Directory for fold matrices (default: a temporary directory)
+        """
+        if model_type not in DEFAULT_PARAM_GRIDS:
+            raise ValueError(f"Unknown model type: {model_type}")
+
+        self.model_type = model_type
+        self.param_grid = param_grid if param_grid is not None else DEFAULT_PARAM_GRIDS[model_type]
+        self.n_splits = n_splits
+        self.gap = gap
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.prune_tolerance = prune_tolerance
+        self.cache_dir = cache_dir
+
+    @classmethod
+    def from_config(cls, config, model_type: str = "gradient_boosting") -> "HyperparameterSearch":
+        return cls(
+            model_type=model_type,
+            n_splits=getattr(config, "TRAINING_CV_SPLITS", 5),
+            gap=getattr(config, "TRAINING_CV_GAP", 0),
+            n_jobs=getattr(config, "TRAINING_N_JOBS", None),
+        )
+
+    def _cache_folds(self, X: np.ndarray, y: np.ndarray, root: Path) -> List[Path]:
+        from sklearn.preprocessing import StandardScaler
+
+        fold_dirs = []
+        for i, (train_end, val_start, val_end) in enumerate(time_series_folds(len(X), self.n_splits, self.gap)):
+            scaler = StandardScaler().fit(X[:train_end])
+            fold_dir = root / f"fold_{i}"
+            fold_dir.mkdir(parents=True, exist_ok=True)
+            np.save(fold_dir / "X_train.npy", scaler.transform(X[:train_end]))
+            np.save(fold_dir / "y_train.npy", y[:train_end])
+            np.save(fold_dir / "X_val.npy", scaler.transform(X[val_start:val_end]))
+            np.save(fold_dir / "y_val.npy", y[val_start:val_end])
+            fold_dirs.append(fold_dir)
+        return fold_dirs
+
+    def _map(self, tasks: List[Dict], executor: Optional[ProcessPoolExecutor]) -> List[Dict]:
+        if executor is None:
+            return [_evaluate_fold(task) for task in tasks]
+        return list(executor.map(_evaluate_fold, tasks))
+
+    def run(self, X: np.ndarray, y: np.ndarray) -> Dict:
+        """
+        Cross-validate every candidate in the grid
+
+        Args:
+            X: Feature matrix, rows in chronological order
+            y: Target labels (0: away win, 1: home win, 2: draw)
+
+        Returns:
+            Report with per-candidate fold metrics, mean metrics, wall-clock
+            time and pruning state, plus the best parameters
+        """
+        X = np.asarray(X, dtype=np.float64)
+        classes, y_index = np.unique(np.asarray(y), return_inverse=True)
+        candidates = [{"params": params, "folds": [], "stopped_at_fold": None, "fit_seconds": 0.0}
+                      for params in expand_grid(self.param_grid)]
+        start = time.perf_counter()
+
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as tmp:
+            fold_dirs = self._cache_folds(X, y_index, Path(tmp))
+            workers = min(self.n_jobs, len(candidates))
+            executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+            try:
+                active = list(range(len(candidates)))
+                for fold, fold_dir in enumerate(fold_dirs):
+                    tasks = [{"candidate": c, "fold": fold, "fold_dir": str(fold_dir),
+                              "model_type": self.model_type, "params": candidates[c]["params"],
+                              "n_classes": len(classes)} for c in active]
+                    for result in self._map(tasks, executor):
+                        candidate = candidates[result.pop("candidate")]
+                        candidate["folds"].append(result)
+                        candidate["fit_seconds"] += result["fit_seconds"]
+
+                    active = self._prune(candidates, active, fold)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+        for candidate in candidates:
+            for metric in ("log_loss", "brier", "accuracy", "ece"):
+                candidate[metric] = float(np.mean([f[metric] for f in candidate["folds"]]))
+
+        completed = [c for c in candidates if c["stopped_at_fold"] is None]
+        best = min(completed, key=lambda c: c["log_loss"])
+        report = {
+            "model_type": self.model_type,
+            "n_samples": len(X),
+            "n_splits": len(fold_dirs),
+            "gap": self.gap,
+            "n_jobs": self.n_jobs,
+            "classes": classes.tolist(),
+            "candidates": candidates,
+            "best_params": best["params"],
+            "best_score": {m: best[m] for m in ("log_loss", "brier", "accuracy", "ece")},
+            "wall_seconds": time.perf_counter() - start,
+        }
+        logger.info(
+            f"Search over {len(candidates)} candidates x {len(fold_dirs)} folds took "
+            f"{report['wall_seconds']:.1f}s; best {best['params']} (log loss {best['log_loss']:.4f})"
+        )
+        return report
+
+    def _prune(self, candidates: List[Dict], active: List[int], fold: int) -> List[int]:
+        """Stop candidates whose running mean log loss trails the best by more than the tolerance"""
+        if self.prune_tolerance is None or fold == self.n_splits - 1:
+            return active
+
+        running = {c: np.mean([f["log_loss"] for f in candidates[c]["folds"]]) for c in active}
+        limit = min(running.values()) * (1.0 + self.prune_tolerance)
+        kept = []
+        for c in active:
+            if running[c] > limit:
+                candidates[c]["stopped_at_fold"] = fold
+                logger.debug(f"Stopped {candidates[c]['params']} after fold {fold} ({running[c]:.4f} > {limit:.4f})")
+            else:
+                kept.append(c)
+        return kept
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> MatchPredictor:
+        """
+        Search, then refit the best candidate on all rows
+
+        Returns:
+            Trained MatchPredictor carrying the search report (`save_model`
+            writes both into one bundle)
+        """
+        report = self.run(X, y)
+        predictor = MatchPredictor(model_type=self.model_type, params=report["best_params"])
+        start = time.perf_counter()
+        predictor.train(X, y)
+        report["refit_seconds"] = time.perf_counter() - start
+        predictor.training_report = report
+        return predictor
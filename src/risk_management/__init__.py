@@ -3,5 +3,7 @@ Risk Management Module - init
 """
 from .risk_manager import BankrollManager, ResponsibleGaming, ExposureManager, RiskLevel
 from .zero_investment import BonusManager, PaperTradingSimulator, FreeArbitrageStrategy, PromotionOptimizer
+from .monte_carlo import MonteCarloSimulator
+from .portfolio import KellyPortfolioAllocator
 
-__all__ = ["BankrollManager", "ResponsibleGaming", "ExposureManager", "RiskLevel", "BonusManager", "PaperTradingSimulator", "FreeArbitrageStrategy", "PromotionOptimizer"]
+__all__ = ["BankrollManager", "ResponsibleGaming", "ExposureManager", "RiskLevel", "BonusManager", "PaperTradingSimulator", "FreeArbitrageStrategy", "PromotionOptimizer", "MonteCarloSimulator", "KellyPortfolioAllocator"]
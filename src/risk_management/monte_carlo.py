@@ -0,0 +1,170 @@
+"""
+Monte Carlo Bankroll Simulation
+Simulate thousands of bankroll paths at once to size risk before staking real money
+"""
+import logging
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence, Union
+
+from .risk_manager import BankrollManager
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+StakingPolicy = Union[str, Callable[[np.ndarray, int], np.ndarray]]
+
+
+class MonteCarloSimulator:
+    """
+    Vectorized bankroll simulator
+
+    Every path sees the same sequence of bets (win probability and odds per bet)
+    with independently drawn outcomes. Bets are settled in order, and each step
+    updates all paths with one NumPy operation.
+    """
+
+    POLICIES = ("kelly", "flat", "fractional")
+
+    def __init__(self, initial_bankroll: float = 1000.0, n_paths: int = 10000,
+                 ruin_threshold: float = 0.01, seed: Optional[int] = None):
+        """
+        Args:
+            initial_bankroll: Starting bankroll for every path
+            n_paths: Number of simulated paths
+            ruin_threshold: Bankroll at or below which a path stops betting
+            seed: Random seed for reproducible runs
+        """
+        self.initial_bankroll = initial_bankroll
+        self.n_paths = n_paths
+        self.ruin_threshold = ruin_threshold
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def _bet_sequence(win_probabilities: ArrayLike, odds: ArrayLike,
+                      n_bets: Optional[int]) -> tuple:
+        probs = np.atleast_1d(np.asarray(win_probabilities, dtype=np.float64))
+        odds = np.atleast_1d(np.asarray(odds, dtype=np.float64))
+        length = n_bets or max(len(probs), len(odds))
+        if len(probs) not in (1, length) or len(odds) not in (1, length):
+            raise ValueError("win_probabilities and odds must be scalars or have one entry per bet")
+        return np.broadcast_to(probs, (length,)), np.broadcast_to(odds, (length,))
+
+    def _stake_fractions(self, policy: str, probs: np.ndarray, odds: np.ndarray,
+                         bankroll_manager: Optional[BankrollManager],
+                         fraction: float) -> np.ndarray:
+        """Fraction of the current bankroll staked on each bet"""
+        if policy == "kelly":
+            manager = bankroll_manager or BankrollManager(self.initial_bankroll)
+            cache = {}
+            fractions = np.empty(len(probs))
+            for i, key in enumerate(zip(probs.tolist(), odds.tolist())):
+                if key not in cache:
+                    cache[key] = manager.kelly_criterion(*key)
+                fractions[i] = cache[key]
+            if bankroll_manager is not None:
+                fractions = np.minimum(fractions, bankroll_manager.max_single_bet_percent / 100)
+            return fractions
+        if policy == "fractional":
+            return np.full(len(probs), fraction)
+        raise ValueError(f"Unknown staking policy: {policy}")
+
+    def simulate(self, win_probabilities: ArrayLike, odds: ArrayLike,
+                 policy: StakingPolicy = "kelly", n_bets: Optional[int] = None,
+                 flat_stake: float = 10.0, fraction: float = 0.02,
+                 bankroll_manager: Optional[BankrollManager] = None,
+                 percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+                 keep_paths: bool = False) -> Dict:
+        """
+        Simulate bankroll paths over a sequence of bets
+
+        Args:
+            win_probabilities: True win probability per bet (scalar or sequence)
+            odds: Decimal odds per bet (scalar or sequence)
+            policy: "kelly" (BankrollManager.kelly_criterion on the current bankroll,
+                capped by max_single_bet_percent when a manager is given),
+                "flat" (fixed stake), "fractional" (fixed fraction of current bankroll),
+                or a callable (bankrolls, bet_index) -> stakes
+            n_bets: Number of bets when both inputs are scalars
+            flat_stake: Stake for the flat policy
+            fraction: Bankroll fraction for the fractional policy
+            bankroll_manager: Manager whose Kelly sizing and caps to apply
+            percentiles: Percentile bands to report
+            keep_paths: Include the full (n_paths, n_bets + 1) bankroll matrix
+
+        Returns:
+            Dictionary with percentile bands, risk of ruin and drawdown distribution
+        """
+        probs, odds = self._bet_sequence(win_probabilities, odds, n_bets)
+        n_steps = len(probs)
+
+        fractions = None
+        if isinstance(policy, str) and policy != "flat":
+            fractions = self._stake_fractions(policy, probs, odds, bankroll_manager, fraction)
+
+        wins = self.rng.random((self.n_paths, n_steps)) < probs
+        bankroll = np.full(self.n_paths, float(self.initial_bankroll))
+        peak = bankroll.copy()
+        max_drawdown = np.zeros(self.n_paths)
+        ruined = np.zeros(self.n_paths, dtype=bool)
+        bands = np.empty((len(percentiles), n_steps + 1))
+        bands[:, 0] = self.initial_bankroll
+        paths = np.empty((self.n_paths, n_steps + 1)) if keep_paths else None
+        if keep_paths:
+            paths[:, 0] = bankroll
+
+        for t in range(n_steps):
+            if callable(policy):
+                stakes = np.asarray(policy(bankroll.copy(), t), dtype=np.float64)
+            elif policy == "flat":
+                stakes = np.full(self.n_paths, flat_stake)
+            else:
+                stakes = bankroll * fractions[t]
+
+            stakes = np.where(ruined, 0.0, np.clip(stakes, 0.0, bankroll))
+            bankroll = bankroll + np.where(wins[:, t], stakes * (odds[t] - 1.0), -stakes)
+
+            ruined |= bankroll <= self.ruin_threshold
+            np.maximum(peak, bankroll, out=peak)
+            np.maximum(max_drawdown, 1.0 - bankroll / peak, out=max_drawdown)
+
+            bands[:, t + 1] = np.percentile(bankroll, percentiles)
+            if keep_paths:
+                paths[:, t + 1] = bankroll
+
+        result = {
+            "n_paths": self.n_paths,
+            "n_bets": n_steps,
+            "policy": policy if isinstance(policy, str) else getattr(policy, "__name__", "custom"),
+            "percentiles": list(percentiles),
+            "percentile_bands": bands,
+            "final_bankroll": {
+                "mean": float(bankroll.mean()),
+                "median": float(np.median(bankroll)),
+                "std": float(bankroll.std()),
+            },
+            "probability_of_profit": float((bankroll > self.initial_bankroll).mean()),
+            "risk_of_ruin": float(ruined.mean()),
+            "max_drawdown": {
+                "mean": float(max_drawdown.mean()),
+                "percentiles": dict(zip(percentiles, np.percentile(max_drawdown, percentiles).tolist())),
+            },
+            "max_drawdown_distribution": max_drawdown,
+            "final_bankrolls": bankroll,
+        }
+        if keep_paths:
+            result["paths"] = paths
+
+        logger.info(
+            f"Simulated {self.n_paths} paths x {n_steps} bets ({result['policy']}): "
+            f"median final {result['final_bankroll']['median']:.2f}, risk of ruin {result['risk_of_ruin']:.2%}"
+        )
+        return result
+
+    def compare_policies(self, win_probabilities: ArrayLike, odds: ArrayLike,
+                         policies: Sequence[StakingPolicy] = POLICIES, **kwargs) -> Dict[str, Dict]:
+        """Run `simulate` for several staking policies on the same bet sequence"""
+        results = {}
+        for policy in policies:
+            result = self.simulate(win_probabilities, odds, policy=policy, **kwargs)
+            results[result["policy"]] = result
+        return results
@@ -0,0 +1,270 @@
+"""
+Portfolio Staking
+Simultaneous Kelly allocation across concurrent bets under bankroll limits
+"""
+import logging
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .risk_manager import BankrollManager
+
+logger = logging.getLogger(__name__)
+
+
+class KellyPortfolioAllocator:
+    """
+    Allocate stakes across simultaneous bets by maximizing expected log growth
+
+    Bets on the same event are treated as mutually exclusive outcomes; bets on
+    different events are independent. Stakes respect the BankrollManager's
+    max single bet and remaining daily loss allowance (the total staked is kept
+    within what may still be lost today).
+    """
+
+    def __init__(self, bankroll_manager: BankrollManager, kelly_fraction: float = 0.25,
+                 max_scenarios: int = 20000, seed: Optional[int] = None):
+        """
+        Args:
+            bankroll_manager: Source of bankroll and stake limits
+            kelly_fraction: Multiplier applied to the full-Kelly solution
+            max_scenarios: Joint outcomes enumerated exactly up to this count,
+                sampled beyond it
+            seed: Random seed for scenario sampling
+        """
+        self.bankroll_manager = bankroll_manager
+        self.kelly_fraction = kelly_fraction
+        self.max_scenarios = max_scenarios
+        self.rng = np.random.default_rng(seed)
+
+    # Limits
+
+    def _limits(self) -> Tuple[float, float]:
+        """(max fraction per bet, max total fraction) from the bankroll manager"""
+        bm = self.bankroll_manager
+        bm.reset_daily_stats()
+        bankroll = bm.current_bankroll
+        if bankroll <= 0:
+            return 0.0, 0.0
+
+        max_single = bm.max_single_bet_percent / 100
+        remaining_daily = bankroll * (bm.max_daily_loss_percent / 100) - bm.daily_losses
+        return max_single, max(0.0, min(remaining_daily / bankroll, 1.0))
+
+    @staticmethod
+    def _group_events(bets: List[Dict]) -> List[List[int]]:
+        groups = {}
+        for i, bet in enumerate(bets):
+            groups.setdefault(bet.get("event") or f"__bet_{i}", []).append(i)
+        return list(groups.values())
+
+    # Closed form
+
+    @staticmethod
+    def _event_kelly(probs: np.ndarray, odds: np.ndarray) -> np.ndarray:
+        """
+        Exact full-Kelly fractions for mutually exclusive outcomes of one event
+        (reduces to (bp - q) / b for a single bet)
+        """
+        fractions = np.zeros(len(probs))
+        order = np.argsort(-(probs * odds))
+        chosen = []
+        reserve = 1.0
+
+        for i in order:
+            if probs[i] * odds[i] <= reserve:
+                break
+            candidate = chosen + [i]
+            p_rest = 1.0 - probs[candidate].sum()
+            inv_rest = 1.0 - (1.0 / odds[candidate]).sum()
+            if inv_rest <= 0:
+                # Covering these outcomes is an arbitrage: stake everything on them
+                chosen, reserve = candidate, 0.0
+                break
+            chosen, reserve = candidate, p_rest / inv_rest
+
+        if chosen:
+            chosen = np.array(chosen)
+            fractions[chosen] = np.maximum(probs[chosen] - reserve / odds[chosen], 0.0)
+        return fractions
+
+    def _closed_form(self, probs: np.ndarray, odds: np.ndarray, groups: List[List[int]]) -> np.ndarray:
+        fractions = np.zeros(len(probs))
+        for group in groups:
+            fractions[group] = self._event_kelly(probs[group], odds[group])
+        return fractions
+
+    # Solver
+
+    def _enumerable(self, groups: List[List[int]]) -> bool:
+        """True when every joint outcome fits within `max_scenarios`"""
+        return np.prod([len(g) + 1 for g in groups], dtype=float) <= self.max_scenarios
+
+    def _scenarios(self, probs: np.ndarray, odds: np.ndarray,
+                   groups: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Payoff matrix R (scenarios x bets, odds where the bet wins) and scenario weights
+        """
+        n = len(probs)
+
+        if self._enumerable(groups):
+            per_event = []
+            for group in groups:
+                p = probs[group]
+                per_event.append(list(zip(list(group) + [None], list(p) + [max(0.0, 1.0 - p.sum())])))
+
+            combos = list(product(*per_event))
+            R = np.zeros((len(combos), n))
+            weights = np.empty(len(combos))
+            for s, combo in enumerate(combos):
+                weight = 1.0
+                for winner, p in combo:
+                    weight *= p
+                    if winner is not None:
+                        R[s, winner] = odds[winner]
+                weights[s] = weight
+            # Impossible scenarios (e.g. no outcome wins when probabilities sum to 1)
+            # must not constrain the stakes
+            possible = weights > 0
+            return R[possible], weights[possible]
+
+        S = self.max_scenarios
+        R = np.zeros((S, n))
+        rows = np.arange(S)
+        for group in groups:
+            cumulative = np.cumsum(probs[group])
+            winner = np.searchsorted(cumulative, self.rng.random(S), side="right")
+            hit = winner < len(group)
+            columns = np.asarray(group)[winner[hit]]
+            R[rows[hit], columns] = odds[columns]
+        return R, np.full(S, 1.0 / S)
+
+    @staticmethod
+    def _log_growth(fractions: np.ndarray, R: np.ndarray, weights: np.ndarray) -> float:
+        wealth = 1.0 - fractions.sum() + R @ fractions
+        if np.any(wealth <= 0):
+            return -np.inf
+        return float(weights @ np.log(wealth))
+
+    def _solve(self, R: np.ndarray, weights: np.ndarray, upper: np.ndarray,
+               total_cap: float, start: np.ndarray) -> np.ndarray:
+        from scipy.optimize import minimize
+
+        excess = R - 1.0
+
+        def objective(f):
+            wealth = 1.0 - f.sum() + R @ f
+            if np.any(wealth <= 0):
+                return np.inf, np.zeros_like(f)
+            return -(weights @ np.log(wealth)), -((weights / wealth) @ excess)
+
+        result = minimize(
+            objective,
+            start,
+            jac=True,
+            method="SLSQP",
+            bounds=list(zip(np.zeros(len(upper)), upper)),
+            constraints=[{
+                "type": "ineq",
+                "fun": lambda f: total_cap - f.sum(),
+                "jac": lambda f: -np.ones_like(f),
+            }],
+            options={"maxiter": 200, "ftol": 1e-12},
+        )
+        if not result.success:
+            logger.warning(f"Kelly portfolio solver did not converge: {result.message}")
+        return np.clip(result.x, 0.0, upper)
+
+    @staticmethod
+    def _apply_caps(fractions: np.ndarray, upper: np.ndarray, total_cap: float) -> np.ndarray:
+        fractions = np.minimum(fractions, upper)
+        total = fractions.sum()
+        if total > total_cap > 0:
+            fractions = fractions * (total_cap / total)
+        elif total_cap <= 0:
+            fractions = np.zeros_like(fractions)
+        return fractions
+
+    # Public API
+
+    def allocate(self, bets: List[Dict], method: str = "auto") -> Dict:
+        """
+        Allocate stakes across simultaneous bets
+
+        Args:
+            bets: List of bet dictionaries
+                {"event": "event_name", "probability": 0.65, "odds": 1.80, ...}
+            method: "closed_form" (exact per event, events sized independently and
+                scaled into the caps), "solver" (joint optimum of expected log growth
+                under the caps), or "auto" (closed form when every bet is on its
+                own event, solver otherwise)
+
+        Returns:
+            Allocation in the `MultiBetOptimizer.optimize_multiple_bets` format plus
+            expected log growth and the method used. With the closed form, growth is
+            only computed when the joint outcomes can be enumerated exactly (None
+            otherwise), so large slates never build a scenario matrix.
+        """
+        bankroll = self.bankroll_manager.current_bankroll
+        if not bets:
+            return {"total_allocated": 0.0, "remaining_bankroll": bankroll, "allocations": {},
+                    "total_expected_value": 0.0, "expected_log_growth": 0.0, "method": method}
+
+        probs = np.array([b.get("probability", 0.5) for b in bets], dtype=np.float64)
+        odds = np.array([b.get("odds", 1.5) for b in bets], dtype=np.float64)
+        groups = self._group_events(bets)
+
+        for group in groups:
+            if probs[group].sum() > 1.0 + 1e-9:
+                raise ValueError(f"Probabilities for event '{bets[group[0]].get('event')}' sum to more than 1")
+
+        max_single, total_cap = self._limits()
+        fraction = self.kelly_fraction if self.kelly_fraction > 0 else 1.0
+        upper = np.where(odds > 1.0, max_single, 0.0)
+
+        if method == "auto":
+            method = "closed_form" if all(len(g) == 1 for g in groups) else "solver"
+
+        if method not in ("closed_form", "solver"):
+            raise ValueError(f"Unknown allocation method: {method}")
+
+        full_kelly = self._closed_form(probs, odds, groups)
+        R = weights = None
+        if method == "closed_form":
+            fractions = self._apply_caps(full_kelly * fraction, upper, total_cap)
+            if self._enumerable(groups):
+                R, weights = self._scenarios(probs, odds, groups)
+        else:
+            R, weights = self._scenarios(probs, odds, groups)
+            # Solve for full Kelly under caps scaled up by 1/fraction, then scale down
+            full_upper = np.minimum(upper / fraction, 1.0)
+            full_cap = min(total_cap / fraction, 0.999)
+            start = self._apply_caps(full_kelly, full_upper, full_cap)
+            fractions = self._solve(R, weights, full_upper, full_cap, start) * fraction
+            fractions = self._apply_caps(fractions, upper, total_cap)
+
+        fractions[fractions < 1e-9] = 0.0
+        growth = self._log_growth(fractions, R, weights) if R is not None else None
+
+        allocations = {}
+        for i, bet in enumerate(bets):
+            stake = bankroll * fractions[i]
+            allocations[f"bet_{i}"] = {
+                "event": bet.get("event"),
+                "stake": stake,
+                "probability": probs[i],
+                "odds": odds[i],
+                "kelly_percent": fractions[i] * 100,
+                "expected_value": stake * (probs[i] * odds[i] - 1),
+            }
+
+        total_allocation = float(bankroll * fractions.sum())
+        return {
+            "total_allocated": total_allocation,
+            "remaining_bankroll": bankroll - total_allocation,
+            "allocations": allocations,
+            "total_expected_value": sum(v["expected_value"] for v in allocations.values()),
+            "expected_log_growth": growth,
+            "method": method,
+        }
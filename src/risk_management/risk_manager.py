@@ -4,7 +4,7 @@ Bankroll management, Kelly Criterion, stop-loss, and responsible gaming
 """
 import logging
 import numpy as np
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, Union
 from enum import Enum
 from datetime import datetime, timedelta
 
@@ -199,15 +199,22 @@ class ResponsibleGaming:
 class ExposureManager:
     """
     Manage exposure across sports, markets, and teams
+
+    With an EntityIndex, teams are keyed by integer id, so different
+    provider spellings of one team accumulate together. Teams may also be
+    given as ids already issued by that index.
     """
     
-    def __init__(self):
+    def __init__(self, entities=None):
         self.max_exposure_per_sport = 0.10  # Max 10% of bankroll per sport
         self.max_exposure_per_team = 0.05   # Max 5% per team
         self.current_exposure = {}
+        self.entities = entities
     
-    def add_exposure(self, sport: str, team: str, amount: float) -> None:
+    def add_exposure(self, sport: str, team: Union[str, int], amount: float) -> None:
         """Record exposure"""
+        if self.entities is not None and isinstance(team, str):
+            team = self.entities.resolve(team)
         if sport not in self.current_exposure:
             self.current_exposure[sport] = {}
         
@@ -2,41 +2,65 @@
 Utilities Module
 Logging, database management, and helper functions
 """
+import atexit
 import logging
+import itertools
 import json
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, Any, Iterator, List, Optional
 
-def setup_logging(log_level: str = "INFO", log_dir: str = "logs") -> logging.Logger:
+def setup_logging(log_level: str = "INFO", log_dir: str = "logs",
+                  queued: bool = False) -> logging.Logger:
     """
     Setup centralized logging with file and console handlers
     
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_dir: Directory for log files
+        queued: Only enqueue records on the calling thread; a QueueListener
+            thread formats them and does the file and console I/O
         
     Returns:
         Configured logger instance
     """
+    logger = logging.getLogger("sports_betting_system")
+    level = getattr(logging, log_level)
+    logger.setLevel(level)
+    
+    # Safe to call repeatedly: reuse the handlers from the first call
+    existing = [h for h in logger.handlers if getattr(h, "_sports_betting_handler", False)]
+    if existing:
+        for handler in existing:
+            handler.setLevel(level)
+            listener = getattr(handler, "_listener", None)
+            for target in (listener.handlers if listener else ()):
+                target.setLevel(level)
+        return logger
+    
     log_path = Path(log_dir)
     log_path.mkdir(exist_ok=True)
     
-    logger = logging.getLogger("sports_betting_system")
-    logger.setLevel(getattr(logging, log_level))
-    
     # File handler with rotation
     fh = RotatingFileHandler(
         log_path / "system.log",
         maxBytes=10485760,  # 10MB
         backupCount=5
     )
-    fh.setLevel(getattr(logging, log_level))
+    fh.setLevel(level)
     
     # Console handler
     ch = logging.StreamHandler()
-    ch.setLevel(getattr(logging, log_level))
+    ch.setLevel(level)
     
     # Formatter
     formatter = logging.Formatter(
@@ -45,21 +69,212 @@ def setup_logging(log_level: str = "INFO", log_dir: str = "logs") -> logging.Log
     fh.setFormatter(formatter)
     ch.setFormatter(formatter)
     
-    logger.addHandler(fh)
-    logger.addHandler(ch)
+    if queued:
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, fh, ch, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        qh = QueueHandler(log_queue)
+        qh.setLevel(level)
+        qh._listener = listener
+        handlers = (qh,)
+    else:
+        handlers = (fh, ch)
+    
+    for handler in handlers:
+        handler._sports_betting_handler = True
+        logger.addHandler(handler)
     
     return logger
 
+class _AuditWriter:
+    """
+    One background thread writing the queued records of every AuditLogger
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.loggers = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._exit_hook = False
+
+    @property
+    def alive(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def register(self, audit: "AuditLogger") -> None:
+        with self._lock:
+            self.loggers.add(audit)
+            if not self.alive:
+                self.thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self.thread.start()
+            if not self._exit_hook:
+                atexit.register(self.shutdown)
+                self._exit_hook = True
+
+    def _run(self) -> None:
+        while True:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + first[0].flush_interval
+            stop = False
+            while len(batch) < first[0].batch_size:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            lines_by_logger = {}
+            for audit, line in batch:
+                lines_by_logger.setdefault(audit, []).append(line)
+            for audit, lines in lines_by_logger.items():
+                try:
+                    audit._write_batch(lines)
+                except Exception as e:
+                    audit.logger.error(f"Audit write failed ({len(lines)} records lost): {str(e)}")
+                finally:
+                    audit._written(len(lines))
+            if stop:
+                return
+
+    def shutdown(self) -> None:
+        """Close every logger (writing out its records), then stop the thread"""
+        for audit in list(self.loggers):
+            audit.close()
+        with self._lock:
+            if self.alive:
+                self.queue.put(None)
+                self.thread.join(timeout=10)
+            self.thread = None
+
+
+_AUDIT_WRITER = _AuditWriter()
+
+# Process-wide file sequence, so loggers sharing a directory never pick the same name
+_AUDIT_FILE_SEQ = itertools.count(1)
+
+
 class AuditLogger:
     """
     Centralized audit logging for compliance and transparency
     Logs all betting decisions and system actions
+
+    Records are written as compact newline-delimited JSON to rotating files in
+    `log_dir`. Each record is serialized on the calling thread, so later
+    changes to the caller's dictionaries cannot leak into the log. In queued
+    mode (the default) the line is then only enqueued; one background thread
+    shared by every AuditLogger writes batches, so the betting loop never
+    waits on disk. If `max_queue` records are already pending the record is
+    dropped and counted rather than blocking.
     """
     
-    def __init__(self, log_dir: str = "logs/audit"):
+    def __init__(self, log_dir: str = "logs/audit", queued: bool = True,
+                 max_bytes: int = 10485760, rotate_seconds: float = 3600.0,
+                 batch_size: int = 256, flush_interval: float = 0.5,
+                 max_queue: int = 100000):
+        """
+        Args:
+            log_dir: Directory for audit files
+            queued: Write from a background thread instead of the caller's
+            max_bytes: Rotate once the current file reaches this size
+            rotate_seconds: Rotate once the current file is this old
+            batch_size: Most records written per batch
+            flush_interval: Longest a queued record waits before being written
+            max_queue: Pending records before new ones are dropped
+        """
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.logger = logging.getLogger("audit_logger")
+        self.queued = queued
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.dropped = 0
+        
+        self._file = None
+        self._file_opened = 0.0
+        self._write_lock = threading.Lock()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        
+        if queued:
+            _AUDIT_WRITER.register(self)
+    
+    # Writing
+    
+    def _emit(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        if not self.queued or self._closed:
+            self._write_batch([line])
+            return
+        with self._pending_lock:
+            if self._pending >= self.max_queue:
+                self.dropped += 1
+                return
+            self._pending += 1
+        _AUDIT_WRITER.queue.put((self, line))
+    
+    def _written(self, count: int) -> None:
+        with self._pending_lock:
+            self._pending -= count
+    
+    def _write_batch(self, lines: List[str]) -> None:
+        data = "".join(lines)
+        with self._write_lock:
+            self._maybe_rotate()
+            self._file.write(data)
+            self._file.flush()
+    
+    def _maybe_rotate(self) -> None:
+        if self._file is not None:
+            too_big = self._file.tell() >= self.max_bytes
+            too_old = time.monotonic() - self._file_opened >= self.rotate_seconds
+            if not (too_big or too_old):
+                return
+            self._file.close()
+        
+        name = (f"audit-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+                f"-{next(_AUDIT_FILE_SEQ):06d}.ndjson")
+        self._file = open(self.log_dir / name, "a", encoding="utf-8")
+        self._file_opened = time.monotonic()
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every queued record has been written
+        
+        Returns:
+            True if the queue drained within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            if not _AUDIT_WRITER.alive:
+                break
+            time.sleep(0.01)
+        return self._pending == 0
+    
+    def close(self) -> None:
+        """Write out queued records and close the current file (later records are written directly)"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.queued:
+            self.flush(timeout=10)
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    # Records
     
     def log_decision(self, decision: Dict[str, Any]) -> None:
         """
@@ -68,7 +283,8 @@ class AuditLogger:
         Args:
             decision: Dictionary containing decision details
         """
-        log_entry = {
+        self._emit({
+            "type": "decision",
             "timestamp": datetime.now().isoformat(),
             "event_id": decision.get("event_id"),
             "model_prediction": decision.get("prediction"),
@@ -78,60 +294,330 @@ class AuditLogger:
             "decision": decision.get("action"),  # place_bet, skip, etc.
             "reason": decision.get("reason"),
             "risk_metrics": decision.get("risk_metrics"),
-        }
-        
-        self.logger.info(json.dumps(log_entry, indent=2))
+        })
     
     def log_error(self, error_type: str, details: Dict) -> None:
         """Log system errors"""
-        error_log = {
+        self._emit({
+            "type": "error",
             "timestamp": datetime.now().isoformat(),
             "error_type": error_type,
             "details": details,
-        }
-        self.logger.error(json.dumps(error_log, indent=2))
+        })
+
+def iter_audit_records(log_dir: str = "logs/audit", record_type: Optional[str] = None,
+                       start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream audit records back from the NDJSON files, oldest file first
+    
+    Args:
+        log_dir: Audit directory written by AuditLogger
+        record_type: Only "decision" or "error" records
+        start: Inclusive ISO timestamp lower bound
+        end: Exclusive ISO timestamp upper bound
+        
+    Yields:
+        Audit record dictionaries
+    """
+    log_path = Path(log_dir)
+    # File names start with their creation time, so name order is write order
+    for path in sorted(log_path.glob("audit-*.ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                # A line without its newline is still being written
+                if not line.endswith("\n"):
+                    break
+                record = json.loads(line)
+                if record_type is not None and record.get("type") != record_type:
+                    continue
+                timestamp = record.get("timestamp", "")
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    continue
+                yield record
+
+
+@lru_cache(maxsize=None)
+def _schema() -> SimpleNamespace:
+    """Table definitions, built on first use so importing this module does not load SQLAlchemy"""
+    from sqlalchemy import Column, DateTime, Float, Index, Integer, MetaData, String, Table
+
+    metadata = MetaData()
+
+    events_table = Table(
+        "events", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("event_id", String(64), nullable=False),
+        Column("sport", String(32)),
+        Column("home_team", String(128)),
+        Column("away_team", String(128)),
+        Column("status", String(32)),
+        Column("home_score", Integer),
+        Column("away_score", Integer),
+        Column("event_timestamp", String(40)),
+        Column("recorded_at", DateTime, nullable=False),
+        Index("ix_events_event_id", "event_id"),
+    )
+
+    predictions_table = Table(
+        "predictions", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("event_id", String(64), nullable=False),
+        Column("sport", String(32)),
+        Column("model_type", String(32)),
+        Column("home_win", Float),
+        Column("draw", Float),
+        Column("away_win", Float),
+        Column("confidence", Float),
+        Column("created_at", DateTime, nullable=False),
+        Index("ix_predictions_event_id", "event_id"),
+    )
+
+    bets_table = Table(
+        "bets", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("bet_id", String(64), nullable=False),
+        Column("event_id", String(64), nullable=False),
+        Column("sport", String(32)),
+        Column("market_id", String(64)),
+        Column("selection", String(64)),
+        Column("odds", Float),
+        Column("stake", Float),
+        Column("status", String(16)),
+        Column("profit", Float),
+        Column("placed_at", DateTime, nullable=False),
+        Column("settled_at", DateTime),
+        Index("ix_bets_bet_id", "bet_id"),
+        Index("ix_bets_sport_status_settled", "sport", "status", "settled_at"),
+    )
+
+    return SimpleNamespace(metadata=metadata, events=events_table,
+                           predictions=predictions_table, bets=bets_table)
+
 
 class DatabaseManager:
     """
     Database connection and management
+    Writes are buffered and sent as bulk inserts on `flush()` (once per cycle)
+
+    After a failed flush, saves stop triggering early flushes until a
+    `flush()` succeeds again, and the buffer keeps only the newest
+    `max_pending_rows` rows (the oldest are dropped and counted in
+    `dropped_rows`).
     """
     
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, pool_size: int = 5, max_overflow: int = 10,
+                 autoflush_rows: int = 5000, max_pending_rows: int = 50000):
+        """
+        Args:
+            connection_string: SQLAlchemy URL (PostgreSQL or SQLite)
+            pool_size: Persistent connections kept in the pool (server databases)
+            max_overflow: Extra connections allowed above pool_size under load
+            autoflush_rows: Buffered rows that force an early flush
+            max_pending_rows: Bound on buffered rows while the database is failing
+        """
         self.connection_string = connection_string
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.autoflush_rows = autoflush_rows
+        self.max_pending_rows = max(max_pending_rows, autoflush_rows)
         self.connection = None
+        self.engine = None
+        self.dropped_rows = 0
+        self._pending = {kind: deque() for kind in ("events", "predictions", "bets", "settlements")}
+        self._order = deque()  # kind of each buffered row, oldest first
+        self._flush_failed = False
     
+    @property
+    def is_connected(self) -> bool:
+        return self.engine is not None
+
+    def _create_engine(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.engine import make_url
+        from sqlalchemy.pool import StaticPool
+
+        url = make_url(self.connection_string)
+        if url.get_backend_name() == "sqlite":
+            if url.database in (None, "", ":memory:"):
+                # One shared connection, otherwise each checkout sees an empty database
+                return create_engine(url, poolclass=StaticPool,
+                                     connect_args={"check_same_thread": False})
+            return create_engine(url, connect_args={"check_same_thread": False})
+
+        return create_engine(
+            url,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_pre_ping=True,
+        )
+
     def connect(self) -> bool:
-        """Establish database connection"""
+        """Establish database connection pool and create missing tables"""
+        logger = logging.getLogger(__name__)
         try:
-            # Placeholder for actual DB connection
-            logger = logging.getLogger(__name__)
+            self.engine = self._create_engine()
+            _schema().metadata.create_all(self.engine)
             logger.info("Database connection established")
             return True
         except Exception as e:
-            logger = logging.getLogger(__name__)
+            self.engine = None
             logger.error(f"Database connection failed: {str(e)}")
             return False
-    
+
+    def close(self) -> None:
+        """Flush pending writes and release pooled connections"""
+        if self.engine is not None:
+            self.flush()
+            self.engine.dispose()
+            self.engine = None
+
+    def _buffer(self, kind: str, row: Dict) -> bool:
+        self._pending[kind].append(row)
+        self._order.append(kind)
+        if len(self._order) > self.max_pending_rows:
+            self._pending[self._order.popleft()].popleft()
+            self.dropped_rows += 1
+        if len(self._order) >= self.autoflush_rows and not self._flush_failed:
+            return self.flush()
+        return True
+
     def save_event(self, event: Dict) -> bool:
         """Save sports event data"""
-        return True
+        return self._buffer("events", {
+            "event_id": str(event.get("event_id")),
+            "sport": event.get("sport"),
+            "home_team": event.get("home_team"),
+            "away_team": event.get("away_team"),
+            "status": event.get("status"),
+            "home_score": event.get("home_score"),
+            "away_score": event.get("away_score"),
+            "event_timestamp": event.get("timestamp"),
+            "recorded_at": datetime.now(),
+        })
     
     def save_prediction(self, prediction: Dict) -> bool:
         """Save model prediction"""
-        return True
+        return self._buffer("predictions", {
+            "event_id": str(prediction.get("event_id")),
+            "sport": prediction.get("sport"),
+            "model_type": prediction.get("model_type"),
+            "home_win": prediction.get("home_win"),
+            "draw": prediction.get("draw"),
+            "away_win": prediction.get("away_win"),
+            "confidence": prediction.get("confidence"),
+            "created_at": datetime.now(),
+        })
     
     def save_bet(self, bet: Dict) -> bool:
         """Save bet execution"""
+        return self._buffer("bets", {
+            "bet_id": str(bet.get("bet_id")),
+            "event_id": str(bet.get("event_id")),
+            "sport": bet.get("sport"),
+            "market_id": bet.get("market_id"),
+            "selection": bet.get("selection"),
+            "odds": bet.get("odds"),
+            "stake": bet.get("stake"),
+            "status": bet.get("status", "pending"),
+            "profit": None,
+            "placed_at": datetime.now(),
+            "settled_at": None,
+        })
+
+    def settle_bet(self, bet_id: str, status: str, profit: float) -> bool:
+        """Record a bet result (won/lost/voided) and its profit (negative stake if lost)"""
+        return self._buffer("settlements", {
+            "b_bet_id": str(bet_id),
+            "b_status": status,
+            "b_profit": profit,
+            "b_settled_at": datetime.now(),
+        })
+
+    def flush(self) -> bool:
+        """
+        Write all buffered rows in one transaction using bulk inserts
+
+        Returns:
+            True if the buffer was written (or empty)
+        """
+        if not self._order:
+            return True
+
+        logger = logging.getLogger(__name__)
+        if self.engine is None:
+            logger.error("Database not connected - cannot flush pending writes")
+            self._flush_failed = True
+            return False
+
+        from sqlalchemy import bindparam
+
+        schema = _schema()
+        events_table, predictions_table, bets_table = schema.events, schema.predictions, schema.bets
+        pending = self._pending
+        try:
+            with self.engine.begin() as conn:
+                for table in (events_table, predictions_table, bets_table):
+                    if pending[table.name]:
+                        conn.execute(table.insert(), list(pending[table.name]))
+                if pending["settlements"]:
+                    conn.execute(
+                        bets_table.update()
+                        .where(bets_table.c.bet_id == bindparam("b_bet_id"))
+                        .values(status=bindparam("b_status"), profit=bindparam("b_profit"),
+                                settled_at=bindparam("b_settled_at")),
+                        list(pending["settlements"]),
+                    )
+        except Exception as e:
+            logger.error(f"Database flush failed ({len(self._order)} rows buffered, "
+                         f"{self.dropped_rows} dropped): {str(e)}")
+            self._flush_failed = True
+            return False
+
+        written = len(self._order)
+        self._pending = {kind: deque() for kind in pending}
+        self._order = deque()
+        self._flush_failed = False
+        logger.debug(f"Database flush wrote {written} rows")
         return True
     
     def get_historical_accuracy(self, sport: str, limit: int = 100) -> Dict:
-        """Get model accuracy statistics"""
-        return {
-            "sport": sport,
-            "total_bets": limit,
-            "win_rate": 0.55,
-            "roi": 0.12,
-        }
+        """Get model accuracy statistics over the most recent settled bets"""
+        stats = {"sport": sport, "total_bets": 0, "win_rate": 0.0, "roi": 0.0}
+        if self.engine is None:
+            return stats
+
+        from sqlalchemy import case, func, select
+
+        bets_table = _schema().bets
+        recent = (
+            select(bets_table.c.status, bets_table.c.stake, bets_table.c.profit)
+            .where(bets_table.c.sport == sport)
+            .where(bets_table.c.status.in_(["won", "lost"]))
+            .order_by(bets_table.c.settled_at.desc())
+            .limit(limit)
+            .subquery()
+        )
+        query = select(
+            func.count(),
+            func.sum(case((recent.c.status == "won", 1), else_=0)),
+            func.sum(recent.c.stake),
+            func.sum(recent.c.profit),
+        )
+
+        try:
+            with self.engine.connect() as conn:
+                total, wins, staked, profit = conn.execute(query).one()
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Accuracy query failed: {str(e)}")
+            return stats
+
+        if total:
+            stats["total_bets"] = total
+            stats["win_rate"] = wins / total
+            stats["roi"] = (profit or 0.0) / staked if staked else 0.0
+        return stats
 
 class ArchitectureDocumentation:
     """
@@ -2,7 +2,9 @@
 Tests for Advanced Arbitrage and Multi-Bet System
 """
 import pytest
-from src.execution import ArbitrageEngine, MultiBetOptimizer, CoverageStrategy
+import numpy as np
+from src.execution import (ArbitrageEngine, IncrementalArbitrageDetector, MultiBetOptimizer, CoverageStrategy,
+                           ComparisonEngine, OddsCache)
 
 
 class TestArbitrageEngine:
@@ -67,6 +69,127 @@ class TestArbitrageEngine:
         assert stakes["guaranteed_profit"] > 0
         assert stakes["total_investment"] == 500
 
+    def test_scan_odds_tensor_matches_per_market_path(self):
+        """Test vectorized board scan agrees with find_market_arbitrage"""
+        engine = ArbitrageEngine(min_profit_margin=0.01)
+
+        markets = [
+            {"a": {"betfair": 1.95, "kambi": 2.05}, "b": {"betfair": 2.20, "pinnacle": 2.10}},
+            {"a": {"betfair": 1.50}, "b": {"kambi": 1.50}},
+            {"home": {"betfair": 2.9, "kambi": 3.1}, "draw": {"pinnacle": 3.9}, "away": {"kambi": 3.6}},
+            {"a": {"betfair": 2.02}, "b": {"kambi": 2.02}},
+            {"w": {"betfair": 4.5}, "x": {"kambi": 4.4}, "y": {"pinnacle": 4.6}, "z": {"betfair": 4.8}},
+        ]
+
+        batch = engine.scan_markets(markets)
+        single = [engine.find_market_arbitrage(m) for m in markets]
+
+        assert len(batch) == len(single)
+        for got, expected in zip(batch, single):
+            if expected is None:
+                assert got is None
+                continue
+            assert got["bookmakers"] == expected["bookmakers"]
+            assert got["best_odds"] == pytest.approx(expected["best_odds"])
+            assert got["profit_margin"] == pytest.approx(expected["profit_margin"])
+
+    def test_scan_odds_tensor_missing_prices(self):
+        """Test NaN handling and stake proportions in the tensor scan"""
+        engine = ArbitrageEngine(min_profit_margin=0.01)
+
+        odds = np.array([
+            [[1.95, np.nan], [np.nan, 2.20], [np.nan, np.nan]],
+            [[1.50, 1.40], [np.nan, np.nan], [np.nan, np.nan]],
+        ])
+        scan = engine.scan_odds_tensor(odds, np.array([2, 2]))
+
+        assert scan["best_bookmaker_idx"][0].tolist() == [0, 1, -1]
+        assert scan["num_outcomes"].tolist() == [2, 1]
+        assert scan["arbitrage_found"].tolist() == [True, False]
+        assert scan["inv_odds_sum"][1] == np.inf
+        assert scan["stake_proportions"][0].sum() == pytest.approx(1.0)
+        assert scan["stake_proportions"][0, 2] == 0.0
+
+        expected = engine.calculate_arbitrage_stakes(1.0, [1.95, 2.20], ["x", "y"], ["a", "b"])
+        assert scan["profit_margin"][0] * 100 == pytest.approx(expected["profit_margin_percent"])
+
+        # Without counts every slot is an outcome, so the unpriced third one leaves the market incomplete
+        assert not engine.scan_odds_tensor(odds)["arbitrage_found"].any()
+
+    def test_scan_markets_unpriced_outcome_and_ties(self):
+        """Test an uncovered outcome is never an arbitrage and ties follow per-outcome order"""
+        engine = ArbitrageEngine(min_profit_margin=0.01)
+        assert engine.scan_markets([{"home": {"b1": 3.0}, "away": {"b2": 3.0}, "draw": {}}]) == [None]
+
+        markets = [
+            {"a": {"b1": 1.5}, "b": {"b2": 1.5}},
+            {"a": {"b2": 2.1, "b1": 2.1}, "b": {"b1": 2.1}},
+        ]
+        assert engine.scan_markets(markets)[1]["bookmakers"] == engine.find_market_arbitrage(markets[1])["bookmakers"]
+
+
+class TestIncrementalArbitrageDetector:
+    """Test delta-driven arbitrage detection"""
+
+    def test_reports_threshold_crossings_only(self):
+        """Test that only entering/leaving arbitrage is reported"""
+        detector = IncrementalArbitrageDetector(min_profit_margin=0.01)
+        seeded = detector.add_market("m1", {
+            "a": {"betfair": 1.90, "kambi": 1.85},
+            "b": {"betfair": 1.95, "pinnacle": 2.00},
+        })
+        assert seeded is None
+
+        # Raises the best price on "a" enough to open an arbitrage
+        entered = detector.update("m1", "a", "kambi", 2.10)
+        assert entered["arbitrage_found"] is True
+        assert entered["bookmakers"] == ["kambi", "pinnacle"]
+        assert entered["second_best_odds"] == [1.90, 1.95]
+
+        # Still an arbitrage: no report
+        assert detector.update("m1", "b", "betfair", 1.97) is None
+
+        # Best bookmaker withdraws, second-best takes over and the arb closes
+        exited = detector.update("m1", "a", "kambi", None)
+        assert exited["arbitrage_found"] is False
+        assert exited["best_odds"][0] == 1.90
+        assert detector.current_opportunities() == []
+
+    def test_matches_full_recompute(self):
+        """Test running state against find_market_arbitrage after random updates"""
+        rng = np.random.default_rng(7)
+        detector = IncrementalArbitrageDetector(min_profit_margin=0.01)
+        engine = ArbitrageEngine(min_profit_margin=0.01)
+        market = {"home": {}, "draw": {}, "away": {}}
+        detector.add_market("m", market)
+        bookmakers = ["betfair", "kambi", "pinnacle", "bet365"]
+
+        for _ in range(500):
+            outcome = ["home", "draw", "away"][rng.integers(3)]
+            bookmaker = bookmakers[rng.integers(4)]
+            price = float(np.round(rng.uniform(2.5, 4.2), 2))
+            detector.update("m", outcome, bookmaker, price)
+            market[outcome][bookmaker] = price
+
+            if all(market.values()):
+                expected = engine.find_market_arbitrage(market)
+                state = detector.get_market_state("m")
+                assert state["arbitrage_found"] == (expected is not None)
+                assert state["best_odds"] == [max(market[o].values()) for o in market]
+
+    def test_repeated_price_is_not_its_own_second_best(self):
+        """Test re-sent and restored prices do not duplicate a bookmaker in the heap"""
+        detector = IncrementalArbitrageDetector()
+        detector.add_market("m", {"a": {"A": 2.0, "B": 1.9}, "b": {"A": 1.5}})
+        detector.update("m", "a", "A", 2.0)
+        assert detector.get_market_state("m")["second_best_odds"] == [1.9, None]
+
+        detector.update("m", "a", "A", 1.8)
+        detector.update("m", "a", "A", 2.0)
+        state = detector.get_market_state("m")
+        assert state["second_best_odds"] == [1.9, None]
+        assert state["inv_odds_sum"] == 1 / 2.0 + 1 / 1.5
+
 
 class TestMultiBetOptimizer:
     """Test multi-bet optimization and parlay functionality"""
@@ -118,6 +241,20 @@ class TestMultiBetOptimizer:
         assert allocation["remaining_bankroll"] >= 0
         assert allocation["total_expected_value"] > 0
     
+    def test_portfolio_stays_within_bankroll(self):
+        """Test joint sizing keeps a large slate within the bankroll limits"""
+        from src.risk_management import BankrollManager
+
+        optimizer = MultiBetOptimizer()
+        bets = [{"event": f"Event {i}", "probability": 0.70, "odds": 1.90} for i in range(200)]
+
+        naive = optimizer.optimize_multiple_bets(bets, bankroll=1000)
+        joint = optimizer.optimize_portfolio(bets, BankrollManager(1000))
+
+        assert naive["total_allocated"] > 1000
+        assert joint["total_allocated"] <= 1000 * 0.05 + 1e-6
+        assert joint["remaining_bankroll"] > 0
+
     def test_find_best_combination(self):
         """Test finding best bet combination"""
         optimizer = MultiBetOptimizer()
@@ -134,6 +271,47 @@ class TestMultiBetOptimizer:
         assert best["parlay_odds"] > 1.0
         assert best["expected_value_percent"] > 0
 
+    def test_top_combinations_match_brute_force(self):
+        """Test heap search against full enumeration for every size"""
+        from itertools import combinations
+
+        optimizer = MultiBetOptimizer()
+        rng = np.random.default_rng(11)
+        events = [
+            {"probability": float(p), "odds": float(o)}
+            for p, o in zip(rng.uniform(0.3, 0.8, 14), rng.uniform(1.3, 3.5, 14))
+        ]
+
+        top = optimizer.find_top_combinations(events, max_size=4, top_n=6, min_ev=None)
+
+        for size in range(2, 5):
+            brute = sorted(
+                combinations(range(len(events)), size),
+                key=lambda c: -np.prod([events[i]["probability"] * events[i]["odds"] for i in c]),
+            )[:6]
+            got = top[size]
+            assert len(got) == 6
+            expected_ev = [
+                (np.prod([events[i]["probability"] * events[i]["odds"] for i in c]) - 1) * 100 for c in brute
+            ]
+            assert [c["expected_value_percent"] for c in got] == pytest.approx(expected_ev)
+            assert got[0]["event_indices"] == brute[0]
+
+    def test_top_combinations_stop_at_non_positive_ev(self):
+        """Test that only positive-EV parlays are returned by default"""
+        optimizer = MultiBetOptimizer()
+        events = [
+            {"probability": 0.6, "odds": 2.0},
+            {"probability": 0.55, "odds": 2.0},
+            {"probability": 0.3, "odds": 2.0},
+        ]
+
+        top = optimizer.find_top_combinations(events, max_size=3, top_n=10)
+
+        assert len(top[2]) == 1
+        assert top[2][0]["event_indices"] == (0, 1)
+        assert top[3] == []
+
 
 class TestCoverageStrategy:
     """Test full coverage and hedging strategies"""
@@ -182,6 +360,92 @@ class TestCoverageStrategy:
         assert "hedge_stake" in hedge or "note" in hedge
 
 
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestOddsCache:
+    """Test shared odds cache"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def cache(self, clock):
+        return OddsCache(ttl_seconds=10, max_selections=100, clock=clock)
+
+    def test_best_and_ranked_follow_updates(self, cache):
+        cache.update_market("E1", "match_odds", {"home_win": {"betfair": 2.40, "kambi": 2.55, "pinnacle": 2.50}})
+
+        assert cache.best("E1", "match_odds", "home_win") == (2.55, "kambi")
+        assert cache.ranked("E1", "match_odds", "home_win", depth=2) == [("kambi", 2.55), ("pinnacle", 2.50)]
+
+        cache.update("E1", "match_odds", "home_win", "kambi", 2.30)
+        assert cache.best("E1", "match_odds", "home_win") == (2.50, "pinnacle")
+
+        cache.update("E1", "match_odds", "home_win", "pinnacle", None)
+        assert cache.ranked("E1", "match_odds", "home_win") == [("betfair", 2.40), ("kambi", 2.30)]
+
+    def test_stale_prices_expire(self, cache, clock):
+        cache.update("E1", "match_odds", "home_win", "betfair", 2.60)
+        clock.now = 6
+        cache.update("E1", "match_odds", "home_win", "kambi", 2.40)
+
+        clock.now = 12
+        assert cache.best("E1", "match_odds", "home_win") == (2.40, "kambi")
+
+        clock.now = 20
+        assert cache.best("E1", "match_odds", "home_win") is None
+        assert len(cache) == 0
+
+    def test_memory_is_bounded(self, clock):
+        cache = OddsCache(ttl_seconds=None, max_selections=3, clock=clock)
+        for i in range(5):
+            cache.update(f"E{i}", "match_odds", "home_win", "betfair", 2.0)
+
+        assert len(cache) == 3
+        assert cache.best("E0", "match_odds", "home_win") is None
+        assert cache.market("E4", "match_odds") == {"home_win": {"betfair": 2.0}}
+
+    def test_engines_share_cache(self, cache):
+        cache.update_market("E1", "match_odds", {
+            "home_win": {"betfair": 2.10, "kambi": 2.05},
+            "away_win": {"betfair": 2.00, "pinnacle": 2.15},
+        })
+        comparison = ComparisonEngine(odds_cache=cache)
+        arbitrage = ArbitrageEngine(odds_cache=cache)
+
+        best = comparison.get_best_odds("E1", "match_odds", "home_win")
+        assert best["best_odds"] == 2.10
+        assert best["best_bookmaker"] == "betfair"
+        assert "best_odds" not in comparison.get_best_odds("E2", "match_odds", "home_win")
+
+        assert comparison.detect_arbitrage(event_id="E1")["arbitrage_found"]
+        result = arbitrage.find_cached_arbitrage("E1")
+        assert result["bookmakers"] == ["pinnacle", "betfair"]
+        assert arbitrage.scan_cached_markets([("E1", "match_odds")])[0]["best_odds"] == result["best_odds"]
+
+    def test_ingest_fetched_odds(self, cache):
+        comparison = ComparisonEngine(odds_cache=cache)
+        count = comparison.ingest_odds("E1", {
+            "market_type": "match_odds",
+            "back_odds": [
+                {"selection": "home_win", "price": 1.9},
+                {"selection": "home_win", "price": 1.95, "bookmaker": "kambi"},
+            ],
+        })
+
+        assert count == 2
+        assert comparison.get_best_odds("E1", "match_odds", "home_win")["available_odds"] == {
+            "kambi": 1.95, "betfair": 1.9
+        }
+
+
 class TestIntegration:
     """Integration tests for complete workflows"""
     
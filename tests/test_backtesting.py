@@ -0,0 +1,169 @@
+"""
+Tests for the event-driven backtester
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from src.backtesting import Backtester
+from src.data_acquisition import TeamFeatureStore
+from src.ml_models import MatchPredictor, OnlineLearner
+from src.risk_management import BankrollManager, ResponsibleGaming
+
+
+def _write_history(tmp_path, odds_rows, result_rows):
+    odds_path = tmp_path / "odds.csv"
+    results_path = tmp_path / "results.csv"
+    pd.DataFrame(odds_rows).to_csv(odds_path, index=False)
+    pd.DataFrame(result_rows).to_csv(results_path, index=False)
+    return odds_path, results_path
+
+
+class TestBacktester:
+    def test_bets_settle_at_result_time(self, tmp_path):
+        odds_rows = [
+            {"timestamp": "2025-01-01 12:00", "event_id": "e1", "selection": "home_win", "odds": 2.0, "model_probability": 0.60},
+            {"timestamp": "2025-01-01 12:05", "event_id": "e2", "selection": "home_win", "odds": 1.5, "model_probability": 0.60},
+            {"timestamp": "2025-01-01 12:30", "event_id": "e1", "selection": "home_win", "odds": 2.1, "model_probability": 0.60},
+            {"timestamp": "2025-01-02 10:00", "event_id": "e3", "selection": "away_win", "odds": 3.0, "model_probability": 0.40},
+        ]
+        result_rows = [
+            {"timestamp": "2025-01-01 14:00", "event_id": "e1", "winner": "home_win"},
+            {"timestamp": "2025-01-02 12:00", "event_id": "e3", "winner": "draw"},
+        ]
+        odds_path, results_path = _write_history(tmp_path, odds_rows, result_rows)
+
+        bm = BankrollManager(1000.0)
+        summary = Backtester(bm).run(odds_path, results_path, chunksize=2)
+
+        assert summary["bets_settled"] == 2
+        assert summary["won"] == 1 and summary["lost"] == 1
+        assert summary["skipped"]["no_value"] == 1
+        assert summary["skipped"]["already_bet"] == 1
+        assert summary["calibration"]["bets"] == 2
+        assert summary["calibration"]["brier"] == pytest.approx(((0.6 - 1) ** 2 + 0.4 ** 2) / 2)
+
+        win, loss = summary["ledger"]
+        assert win["profit"] == pytest.approx(win["stake"])
+        assert loss["profit"] == pytest.approx(-loss["stake"])
+        assert summary["final_bankroll"] == pytest.approx(1000.0 + win["profit"] + loss["profit"])
+        assert [day.isoformat() for day, _ in summary["equity_curve"]] == ["2025-01-01", "2025-01-02"]
+
+    def test_leaves_bankroll_history_alone(self, tmp_path, caplog):
+        odds_rows = [{"timestamp": "2025-01-01 12:00", "event_id": "e1", "selection": "home_win",
+                      "odds": 2.0, "model_probability": 0.60}]
+        result_rows = [{"timestamp": "2025-01-01 14:00", "event_id": "e1", "winner": "away_win"}]
+        odds_path, results_path = _write_history(tmp_path, odds_rows, result_rows)
+
+        bm = BankrollManager(1000.0)
+        bm.record_bet_result(10.0, "won", 8.0)
+        with caplog.at_level("INFO", logger="src.risk_management.risk_manager"):
+            summary = Backtester(bm).run(odds_path, results_path)
+
+        assert summary["lost"] == 1
+        assert len(bm.bets_history) == 1
+        assert bm.daily_losses == pytest.approx(summary["ledger"][0]["stake"])
+        assert not [r for r in caplog.records if r.getMessage().startswith("Bet ")]
+
+    def test_open_bets_reserve_their_stakes(self, tmp_path):
+        odds_rows = [{"timestamp": f"2025-01-01 12:0{i}", "event_id": f"e{i}", "selection": "home_win",
+                      "odds": 2.0, "model_probability": 0.60} for i in range(2)]
+        odds_rows.append({"timestamp": "2025-01-01 12:05", "event_id": "e2", "selection": "home_win",
+                          "odds": 2.0, "model_probability": 0.45})
+        result_rows = [{"timestamp": "2025-01-01 14:00", "event_id": "e0", "winner": "home_win"}]
+        odds_path, results_path = _write_history(tmp_path, odds_rows, result_rows)
+
+        bm = BankrollManager(1000.0)
+        backtester = Backtester(bm, min_value=-1.0)
+        summary = backtester.run(odds_path, results_path)
+
+        # The second bet is sized from the 980 left after the first (2% cap)
+        first, second = summary["ledger"][0], backtester.open_bets["e1"]["home_win"]
+        assert (first["stake"], second["stake"]) == (pytest.approx(20.0), pytest.approx(19.6))
+        # A negative Kelly fraction places nothing
+        assert summary["skipped"]["zero_stake"] == 1 and "e2" not in backtester.open_bets
+        assert summary["open_stake"] == pytest.approx(19.6)
+        assert bm.current_bankroll == pytest.approx(1000.0 + 20.0 - 19.6)
+        assert summary["final_bankroll"] == pytest.approx(1020.0)
+
+        backtester.reset()
+        assert bm.current_bankroll == pytest.approx(1020.0) and backtester.open_stake == 0.0
+
+    def test_loss_streak_pause_and_daily_limit(self, tmp_path):
+        odds_rows, result_rows = [], []
+        for i in range(6):
+            odds_rows.append({"timestamp": f"2025-03-01 10:{i:02d}", "event_id": f"e{i}",
+                              "selection": "home_win", "odds": 2.0, "model_probability": 0.7})
+            result_rows.append({"timestamp": f"2025-03-01 10:{i:02d}:30", "event_id": f"e{i}", "winner": "away_win"})
+        odds_path, results_path = _write_history(tmp_path, odds_rows, result_rows)
+
+        backtester = Backtester(BankrollManager(1000.0), ResponsibleGaming(pause_after_losses=2, max_daily_bets=10))
+        summary = backtester.run(odds_path, results_path)
+
+        assert summary["bets_settled"] == 2
+        assert summary["skipped"]["paused"] == 4
+
+    def test_predictor_scores_chunks(self, tmp_path):
+        rng = np.random.default_rng(0)
+        predictor = MatchPredictor(model_type="logistic_regression")
+        predictor.train(rng.normal(size=(80, 13)), rng.integers(0, 2, size=80))
+
+        odds_rows = [{"timestamp": f"2025-01-01 1{i}:00", "event_id": f"e{i}", "selection": "home_win",
+                      "odds": 50.0, "home_form": 0.5} for i in range(3)]
+        result_rows = [{"timestamp": "2025-01-02 00:00", "event_id": "e0", "winner": "home_win"}]
+        odds_path, results_path = _write_history(tmp_path, odds_rows, result_rows)
+
+        summary = Backtester(BankrollManager(1000.0), predictor=predictor).run(odds_path, results_path)
+
+        assert summary["skipped"]["no_prediction"] == 0
+        assert summary["bets_settled"] + summary["bets_open"] + sum(summary["skipped"].values()) == 3
+
+    def test_settled_bets_feed_online_learner(self, tmp_path):
+        predictor = MatchPredictor(model_type="logistic_regression")
+        predictor.train(np.random.default_rng(0).normal(size=(80, 13)), np.arange(80) % 3)
+        learner = OnlineLearner(predictor, batch_size=2, background=False)
+
+        odds_rows = [{"timestamp": f"2025-01-01 1{i}:00", "event_id": f"e{i}", "selection": "home_win",
+                      "odds": 2.0, "model_probability": 0.7, "home_form": 0.9} for i in range(4)]
+        result_rows = [{"timestamp": f"2025-01-01 1{i}:30", "event_id": f"e{i}", "winner": "home_win"}
+                       for i in range(4)]
+        odds_path, results_path = _write_history(tmp_path, odds_rows, result_rows)
+
+        summary = Backtester(BankrollManager(1000.0), online_learner=learner).run(odds_path, results_path)
+
+        assert summary["bets_settled"] == 4
+        assert learner.stats["updates"] == 2 and learner.stats["rows"] == 4
+
+    def test_feature_store_is_point_in_time(self, tmp_path):
+        store = TeamFeatureStore(window=5, stats=("goals",))
+        store.ingest_history(pd.DataFrame({
+            "date": pd.to_datetime(["2025-01-01", "2025-01-03"]),
+            "home_team": ["A", "A"], "away_team": ["B", "B"],
+            "home_score": [1, 5], "away_score": [0, 0],
+        }))
+
+        class RecordingPredictor:
+            records = []
+
+            def predict_many(self, records):
+                self.records.extend(records)
+                return {}
+
+        odds_rows = [{"timestamp": f"2025-01-0{day} 12:00", "event_id": f"e{day}", "selection": "home_win",
+                      "odds": 2.0, "home_team": "A", "away_team": "B"} for day in (2, 4)]
+        result_rows = [{"timestamp": "2025-01-05 00:00", "event_id": "e2", "winner": "home_win"}]
+        odds_path, results_path = _write_history(tmp_path, odds_rows, result_rows)
+        predictor = RecordingPredictor()
+        Backtester(BankrollManager(1000.0), predictor=predictor, feature_store=store).run(odds_path, results_path)
+
+        assert [r["recent_goals_home"] for r in predictor.records] == [1.0, 3.0]
+        assert [r["recent_goals_away"] for r in predictor.records] == [0.0, 0.0]
+
+    def test_rejects_unsorted_input(self, tmp_path):
+        odds_rows = [
+            {"timestamp": "2025-01-02", "event_id": "e1", "selection": "home_win", "odds": 2.0, "model_probability": 0.6},
+            {"timestamp": "2025-01-01", "event_id": "e2", "selection": "home_win", "odds": 2.0, "model_probability": 0.6},
+        ]
+        odds_path, results_path = _write_history(tmp_path, odds_rows, [{"timestamp": "2025-01-03", "event_id": "e1", "winner": "draw"}])
+
+        with pytest.raises(ValueError):
+            Backtester(BankrollManager(1000.0)).run(odds_path, results_path)
@@ -1,10 +1,18 @@
 """
 Unit Tests for Sports Betting System
 """
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
 import pytest
 import numpy as np
-from src.ml_models import MatchPredictor, ValueBettingCalculator, OddsConverter
-from src.risk_management import BankrollManager, ResponsibleGaming
+from src.ml_models import MatchPredictor, ValueBettingCalculator, OddsConverter, FeatureSchema, ModelRegistry, CompiledGradientBoosting
+from src.ml_models import HyperparameterSearch, time_series_folds, calibration_metrics
+from src.ml_models import ProbabilityCalibrator, CalibrationMonitor, OnlineLearner, RunningScaler
+from src.risk_management import BankrollManager, ResponsibleGaming, MonteCarloSimulator, KellyPortfolioAllocator
 from src.execution import BetExecutor
 from src.data_acquisition import SportsDataFetcher
 
@@ -26,6 +34,442 @@ class TestMatchPredictor:
         assert 0 < stake <= 1000
         assert stake <= 1000 * 0.02  # Max single bet percent
 
+    def test_predict_many_matches_single_predictions(self):
+        rng = np.random.default_rng(1)
+        predictor = MatchPredictor()
+        X = rng.normal(size=(90, 13))
+        predictor.train(X, rng.integers(0, 3, size=90))
+
+        matches = [
+            {"home_form": 0.8, "away_form": 0.3, "momentum": 0.9},
+            {},
+            {"home_form": 0.2, "recent_goals_home": 0.5, "home_shots_avg": 7},
+        ]
+        batch = predictor.predict_many(matches)
+
+        assert batch["home_win"].shape == (3,)
+        for i, match in enumerate(matches):
+            single = predictor.predict_probability(match)
+            for key in ("home_win", "draw", "away_win", "confidence"):
+                assert single[key] == pytest.approx(batch[key][i])
+
+    def test_predict_many_untrained(self):
+        assert MatchPredictor().predict_many([{}]) == {}
+
+class TestFeatureSchema:
+    def test_records_and_dataframe_agree(self):
+        import pandas as pd
+
+        predictor = MatchPredictor()
+        records = [
+            {"home_form": 0.7, "away_form": None, "home_shots_avg": 6},
+            {"momentum": 0.1, "injuries_home_count": 2},
+        ]
+        X = predictor.extract_feature_matrix(records)
+        X_frame = predictor.extract_feature_frame(pd.DataFrame(records))
+
+        assert X.shape == (2, 13)
+        assert X[0, 1] == 0.5  # None falls back to the default
+        assert X[:, 2].tolist() == [1.0, 1.0]  # Constant home advantage
+        np.testing.assert_array_equal(X, X_frame)
+
+    def test_float32_preallocated_output(self):
+        schema = FeatureSchema([("a", "x", 1.0), ("b", "y", 2.0)], dtype="float32")
+        out = schema.allocate(3)
+        X = schema.from_records([{"x": 5}, {}, {"y": 7}], out=out)
+
+        assert X is out and X.dtype == np.float32
+        assert X.tolist() == [[5.0, 2.0], [1.0, 2.0], [1.0, 7.0]]
+
+    def test_load_model_rejects_feature_order_mismatch(self, tmp_path):
+        rng = np.random.default_rng(0)
+        predictor = MatchPredictor(model_type="logistic_regression")
+        predictor.train(rng.normal(size=(40, 13)), rng.integers(0, 2, size=40))
+        path = str(tmp_path / "model.joblib")
+        predictor.save_model(path)
+
+        columns = list(predictor.feature_schema.columns)
+        columns[0], columns[1] = columns[1], columns[0]
+        reordered = MatchPredictor(model_type="logistic_regression", feature_schema=FeatureSchema(columns))
+        reordered.load_model(path)
+        assert not reordered.is_trained
+
+        same = MatchPredictor(model_type="logistic_regression")
+        same.load_model(path)
+        assert same.is_trained
+
+def _trained_predictor(model_type, seed=0, n_classes=3):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(120, 13))
+    predictor = MatchPredictor(model_type=model_type)
+    predictor.train(X, rng.integers(0, n_classes, size=120))
+    return predictor
+
+
+class TestModelRegistry:
+    MATCHES = [
+        {"home_form": 0.8, "away_form": 0.3, "momentum": 0.9},
+        {},
+        {"home_form": 0.2, "recent_goals_home": 0.5, "home_shots_avg": 7},
+    ]
+
+    @pytest.mark.parametrize("model_type,n_classes", [
+        ("logistic_regression", 3),
+        ("logistic_regression", 2),
+        ("gradient_boosting", 3),
+    ])
+    def test_served_predictions_match_trained_model(self, tmp_path, model_type, n_classes):
+        trained = _trained_predictor(model_type, n_classes=n_classes)
+        registry = ModelRegistry(tmp_path)
+        version = registry.publish(trained)
+
+        served = MatchPredictor()
+        assert served.load_from_registry(registry)
+        assert served.model_type == model_type
+        assert not served.served_model.is_loaded
+
+        expected = trained.predict_many(self.MATCHES)
+        actual = served.predict_many(self.MATCHES)
+        for key in expected:
+            np.testing.assert_allclose(actual[key], expected[key], rtol=0, atol=1e-12)
+
+        model = served.served_model.model
+        assert model.version == version
+        if model.format in ("linear", "gbm"):
+            assert all(isinstance(a, np.memmap) for a in model.arrays.values())
+        if model_type == "gradient_boosting":
+            assert model.format == "gbm"
+
+    def test_one_vs_rest_linear_models_keep_their_estimator(self, tmp_path):
+        from sklearn.linear_model import SGDClassifier
+
+        trained = _trained_predictor("logistic_regression")
+        trained.model = SGDClassifier(loss="log_loss", random_state=0).fit(
+            trained.scaler.transform(np.random.default_rng(1).normal(size=(120, 13))), np.arange(120) % 3)
+        registry = ModelRegistry(tmp_path)
+        registry.publish(trained)
+
+        served = MatchPredictor()
+        served.load_from_registry(registry)
+        actual = served.predict_many(self.MATCHES)
+        assert served.served_model.model.format == "joblib"
+        np.testing.assert_allclose(actual["home_win"], trained.predict_many(self.MATCHES)["home_win"])
+
+    def test_checksum_mismatch_is_rejected(self, tmp_path):
+        registry = ModelRegistry(tmp_path)
+        version = registry.publish(_trained_predictor("logistic_regression"))
+        path = tmp_path / "match_predictor" / version / "coef.npy"
+        coef = np.load(path)
+        np.save(path, coef * 2)
+
+        with pytest.raises(ValueError, match="checksum"):
+            registry.load("match_predictor")
+        served = MatchPredictor()
+        served.load_from_registry(registry)
+        assert served.predict_many(self.MATCHES) == {}
+
+    def test_hot_swap_follows_active_version(self, tmp_path):
+        registry = ModelRegistry(tmp_path)
+        first = _trained_predictor("logistic_regression", seed=1)
+        second = _trained_predictor("logistic_regression", seed=2)
+        v1 = registry.publish(first)
+
+        served = MatchPredictor()
+        served.load_from_registry(registry, check_interval=0)
+        np.testing.assert_allclose(served.predict_many(self.MATCHES)["home_win"],
+                                   first.predict_many(self.MATCHES)["home_win"])
+
+        v2 = registry.publish(second)
+        np.testing.assert_allclose(served.predict_many(self.MATCHES)["home_win"],
+                                   second.predict_many(self.MATCHES)["home_win"])
+        assert served.served_model.version == v2
+
+        registry.activate("match_predictor", v1)
+        assert served.served_model.refresh()
+        assert served.served_model.version == v1
+        assert registry.versions("match_predictor") == [v1, v2]
+
+    def test_hot_swap_replaces_calibration(self, tmp_path):
+        registry = ModelRegistry(tmp_path)
+        calibrated = _trained_predictor("logistic_regression", seed=1)
+        rng = np.random.default_rng(5)
+        calibrated.fit_calibration(rng.normal(size=(200, 13)), rng.integers(0, 3, size=200),
+                                   method="platt", min_samples=10)
+        registry.publish(calibrated)
+
+        served = MatchPredictor()
+        served.load_from_registry(registry, check_interval=0)
+        np.testing.assert_allclose(served.predict_many(self.MATCHES)["home_win"],
+                                   calibrated.predict_many(self.MATCHES)["home_win"])
+
+        uncalibrated = _trained_predictor("logistic_regression", seed=2)
+        registry.publish(uncalibrated)
+        np.testing.assert_allclose(served.predict_many(self.MATCHES)["home_win"],
+                                   uncalibrated.predict_many(self.MATCHES)["home_win"])
+        assert served.calibrator is None
+
+    def test_hot_swap_rejects_incompatible_schema(self, tmp_path):
+        registry = ModelRegistry(tmp_path)
+        v1 = registry.publish(_trained_predictor("logistic_regression", seed=1))
+        served = MatchPredictor()
+        served.load_from_registry(registry)
+        expected = served.predict_many(self.MATCHES)["home_win"]
+
+        changed = _trained_predictor("logistic_regression", seed=2)
+        name, source, default = changed.feature_schema.columns[0]
+        changed.feature_schema = FeatureSchema([(name, source, default + 0.1)] + changed.feature_schema.columns[1:])
+        registry.publish(changed)
+
+        assert not served.served_model.refresh()
+        assert served.served_model.version == v1
+        np.testing.assert_allclose(served.predict_many(self.MATCHES)["home_win"], expected)
+
+    def test_publish_untrained_fails(self, tmp_path):
+        with pytest.raises(ValueError):
+            ModelRegistry(tmp_path).publish(MatchPredictor())
+
+
+class TestCompiledGradientBoosting:
+    @pytest.mark.parametrize("n_classes", [2, 3])
+    def test_matches_sklearn_probabilities(self, n_classes):
+        trained = _trained_predictor("gradient_boosting", n_classes=n_classes)
+        compiled = CompiledGradientBoosting.from_sklearn(trained.model, trained.scaler)
+        X = np.random.default_rng(7).normal(size=(64, 13))
+
+        expected = trained.model.predict_proba(trained.scaler.transform(X))
+        np.testing.assert_allclose(compiled.predict_proba(X), expected, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(compiled.predict_proba(X[:1]), expected[:1], rtol=0, atol=1e-9)
+
+    def test_compile_model_serves_predictions(self):
+        trained = _trained_predictor("gradient_boosting")
+        matches = TestModelRegistry.MATCHES
+        expected = trained.predict_many(matches)
+
+        assert trained.compile_model()
+        assert isinstance(trained.served_model, CompiledGradientBoosting)
+        actual = trained.predict_many(matches)
+        for key in expected:
+            np.testing.assert_allclose(actual[key], expected[key], rtol=0, atol=1e-9)
+
+    def test_non_tree_models_are_not_compiled(self):
+        trained = _trained_predictor("logistic_regression")
+        assert not trained.compile_model()
+        assert trained.served_model is None
+
+
+class TestHyperparameterSearch:
+    def _data(self, n=240, seed=0):
+        rng = np.random.default_rng(seed)
+        X = rng.normal(size=(n, 13))
+        y = (X[:, 0] + 0.5 * rng.normal(size=n) > 0).astype(int)
+        return X, y
+
+    def test_folds_never_train_on_the_future(self):
+        folds = time_series_folds(100, n_splits=4, gap=3)
+        assert len(folds) == 4
+        for train_end, val_start, val_end in folds:
+            assert train_end + 3 == val_start < val_end <= 100
+        assert folds[-1][2] == 100
+
+    def test_calibration_metrics_for_perfect_predictions(self):
+        metrics = calibration_metrics(np.eye(3)[[0, 2, 1]], np.array([0, 2, 1]))
+        assert metrics["log_loss"] == pytest.approx(0.0, abs=1e-9)
+        assert metrics["brier"] == 0.0
+        assert metrics["accuracy"] == 1.0
+        assert metrics["ece"] == 0.0
+
+    def test_search_prunes_and_reports_candidates(self):
+        X, y = self._data()
+        search = HyperparameterSearch("logistic_regression", param_grid={"C": [1e-4, 1.0]},
+                                      n_splits=3, n_jobs=1, prune_tolerance=0.05)
+        report = search.run(X, y)
+
+        assert report["best_params"] == {"C": 1.0}
+        weak, strong = report["candidates"]
+        assert weak["stopped_at_fold"] == 0 and len(weak["folds"]) == 1
+        assert strong["stopped_at_fold"] is None and len(strong["folds"]) == 3
+        assert strong["fit_seconds"] > 0
+        assert {"log_loss", "brier", "ece", "accuracy"} <= set(strong["folds"][0])
+
+    def test_parallel_fit_writes_loadable_bundle(self, tmp_path):
+        X, y = self._data()
+        search = HyperparameterSearch("gradient_boosting", n_splits=2, n_jobs=2,
+                                      param_grid={"n_estimators": [10, 20], "max_depth": [2]})
+        predictor = search.fit(X, y)
+        predictor.save_model(str(tmp_path / "bundle.joblib"))
+
+        loaded = MatchPredictor()
+        loaded.load_model(str(tmp_path / "bundle.joblib"))
+        assert loaded.is_trained
+        assert loaded.params == predictor.training_report["best_params"]
+        assert loaded.model.n_estimators == loaded.params["n_estimators"]
+        assert len(loaded.training_report["candidates"]) == 2
+
+
+class TestProbabilityCalibration:
+    def _overconfident(self, n=4000, seed=0):
+        # Raw probabilities p whose true win rate is p ** 2
+        rng = np.random.default_rng(seed)
+        p = rng.uniform(0.05, 0.95, size=n)
+        y = (rng.uniform(size=n) < p ** 2).astype(int)
+        return np.column_stack([1 - p, p]), y
+
+    @pytest.mark.parametrize("method", ["isotonic", "platt"])
+    def test_calibration_improves_brier(self, method):
+        probabilities, y = self._overconfident()
+        test_probabilities, test_y = self._overconfident(seed=1)
+        calibrator = ProbabilityCalibrator(method).fit(probabilities, y)
+        calibrated = calibrator.transform(test_probabilities)
+
+        assert np.allclose(calibrated.sum(axis=1), 1.0)
+        assert (calibration_metrics(calibrated, test_y)["brier"]
+                < calibration_metrics(test_probabilities, test_y)["brier"] - 0.005)
+        ordered = calibrated[np.argsort(test_probabilities[:, 1]), 1]
+        assert np.all(np.diff(ordered) >= -1e-12)
+
+    def test_maps_are_per_sport_with_global_fallback(self):
+        probabilities, y = self._overconfident()
+        # Tennis probabilities are underconfident instead: true win rate sqrt(p)
+        p = probabilities[:, 1]
+        underconfident = (np.random.default_rng(2).uniform(size=len(p)) < np.sqrt(p)).astype(int)
+        sports = ["soccer"] * len(y) + ["tennis"] * len(y)
+        calibrator = ProbabilityCalibrator("platt", min_samples=100).fit(
+            np.vstack([probabilities, probabilities]), np.concatenate([y, underconfident]),
+            sports, ["match_odds"] * len(sports))
+
+        row = np.array([[0.2, 0.8]] * 3)
+        out = calibrator.transform(row, ["soccer", "tennis", "golf"], ["match_odds"] * 3)
+        assert out[0, 1] < 0.8 < out[1, 1]
+        assert out[0, 1] < out[2, 1] < out[1, 1]
+
+        restored = ProbabilityCalibrator.from_dict(calibrator.to_dict())
+        np.testing.assert_allclose(restored.transform(row, ["soccer", "tennis", "golf"], ["match_odds"] * 3), out)
+
+    def test_calibration_is_stored_with_the_model(self, tmp_path):
+        trained = _trained_predictor("logistic_regression")
+        rng = np.random.default_rng(5)
+        trained.fit_calibration(rng.normal(size=(300, 13)), rng.integers(0, 3, size=300), method="platt")
+        matches = [dict(m, sport="soccer") for m in TestModelRegistry.MATCHES]
+        expected = trained.predict_many(matches)
+
+        trained.save_model(str(tmp_path / "model.joblib"))
+        loaded = MatchPredictor()
+        loaded.load_model(str(tmp_path / "model.joblib"))
+        registry = ModelRegistry(tmp_path / "registry")
+        registry.publish(trained)
+        served = MatchPredictor()
+        served.load_from_registry(registry)
+
+        for predictor in (loaded, served):
+            np.testing.assert_allclose(predictor.predict_many(matches)["home_win"], expected["home_win"])
+        assert not np.allclose(expected["home_win"],
+                               trained.predict_proba_matrix(trained.extract_feature_matrix(matches))[:, 1])
+
+    def test_monitor_accumulates_incrementally(self):
+        monitor = CalibrationMonitor(n_bins=5)
+        p = np.array([0.1, 0.3, 0.7, 0.9])
+        won = np.array([0, 1, 1, 1])
+        monitor.record_many(p[:2], won[:2], "soccer", "match_odds")
+        for prob, outcome in zip(p[2:], won[2:]):
+            monitor.record(prob, outcome, "tennis", "match_odds")
+
+        overall = monitor.report()
+        assert overall["bets"] == 4
+        assert overall["brier"] == pytest.approx(np.mean((p - won) ** 2))
+        assert sum(point["bets"] for point in overall["curve"]) == 4
+        assert monitor.report("soccer", "match_odds")["bets"] == 2
+        assert monitor.report("tennis")["brier"] == pytest.approx(np.mean((p[2:] - 1) ** 2))
+        assert monitor.report("golf")["bets"] == 0
+
+
+class TestOnlineLearner:
+    def _matches(self, n, seed=0):
+        # home_form drives the outcome: high form -> home win, low -> away win
+        rng = np.random.default_rng(seed)
+        form = rng.uniform(0, 1, size=n)
+        matches = [{"home_form": f, "away_form": 1 - f} for f in form]
+        outcomes = ["home_win" if f > 0.5 else "away_win" for f in form]
+        return matches, outcomes
+
+    def test_running_scaler_matches_full_batch(self):
+        X = np.random.default_rng(0).normal(3.0, 2.0, size=(500, 4))
+        scaler = RunningScaler(4)
+        for chunk in np.array_split(X, 7):
+            scaler.partial_fit(chunk)
+        np.testing.assert_allclose(scaler.mean_, X.mean(axis=0))
+        np.testing.assert_allclose(scaler.var_, X.var(axis=0))
+        assert scaler.n_samples_seen_ == 500
+
+    @pytest.mark.parametrize("n_classes", [2, 3])
+    def test_warm_start_keeps_predictions(self, n_classes):
+        trained = _trained_predictor("logistic_regression", n_classes=n_classes)
+        expected = trained.predict_many(TestModelRegistry.MATCHES)
+
+        learner = OnlineLearner(trained, background=False)
+        assert trained.served_model is learner
+        actual = trained.predict_many(TestModelRegistry.MATCHES)
+        for key in expected:
+            np.testing.assert_allclose(actual[key], expected[key], atol=1e-9)
+
+    def test_rejects_models_it_cannot_continue(self):
+        predictor = _trained_predictor("gradient_boosting")
+        expected = predictor.predict_many(TestModelRegistry.MATCHES)
+        with pytest.raises(ValueError):
+            OnlineLearner(predictor, background=False)
+        assert predictor.served_model is None
+        np.testing.assert_allclose(predictor.predict_many(TestModelRegistry.MATCHES)["home_win"],
+                                   expected["home_win"])
+
+    def test_takes_over_serving_without_stale_calibration(self):
+        trained = _trained_predictor("logistic_regression")
+        rng = np.random.default_rng(1)
+        trained.fit_calibration(rng.normal(size=(200, 13)), rng.integers(0, 3, size=200), min_samples=10)
+        OnlineLearner(trained, background=False)
+        assert trained.calibrator is None
+
+        cold = MatchPredictor(model_type="logistic_regression")
+        learner = OnlineLearner(cold, background=False)
+        assert cold.served_model is None
+        learner.update(rng.normal(size=(32, 13)), np.arange(32) % 3)
+        assert cold.served_model is learner and cold.is_trained
+
+    def test_learns_from_settled_matches_in_background(self):
+        predictor = MatchPredictor(model_type="logistic_regression")
+        learner = OnlineLearner(predictor, batch_size=50, learning_rate=0.5)
+        assert not predictor.is_trained
+
+        matches, outcomes = self._matches(1000)
+        for i in range(0, 1000, 10):
+            learner.add_results(matches[i:i + 10], outcomes[i:i + 10])
+        learner.flush()
+
+        assert learner.stats["updates"] == 20 and learner.stats["rows"] == 1000
+        assert learner.stats["last_update_seconds"] < 0.05
+        test_matches, test_outcomes = self._matches(200, seed=1)
+        batch = predictor.predict_many(test_matches)
+        predicted = np.where(batch["home_win"] > batch["away_win"], "home_win", "away_win")
+        assert (predicted == np.array(test_outcomes)).mean() > 0.9
+        learner.close()
+
+    def test_predictions_do_not_wait_for_updates(self):
+        predictor = _trained_predictor("logistic_regression")
+        learner = OnlineLearner(predictor, background=False)
+        with learner._update_lock:
+            assert predictor.predict_many(TestModelRegistry.MATCHES)["home_win"].shape == (3,)
+
+    def test_exported_model_round_trips(self, tmp_path):
+        predictor = _trained_predictor("logistic_regression")
+        learner = OnlineLearner(predictor, background=False)
+        learner.update(np.random.default_rng(3).normal(size=(32, 13)), np.arange(32) % 3)
+        learner.export()
+        expected = predictor.predict_many(TestModelRegistry.MATCHES)
+
+        predictor.save_model(str(tmp_path / "online.joblib"))
+        loaded = MatchPredictor()
+        loaded.load_model(str(tmp_path / "online.joblib"))
+        np.testing.assert_allclose(loaded.predict_many(TestModelRegistry.MATCHES)["home_win"], expected["home_win"])
+
+
 class TestValueBetting:
     def test_value_calculation_positive(self):
         value = ValueBettingCalculator.calculate_value(0.65, 1.80)
@@ -68,6 +512,93 @@ class TestBankrollManager:
         assert bm.current_bankroll == 900.0
         assert bm.daily_losses == 100.0
 
+class TestMonteCarloSimulator:
+    def test_flat_stake_expected_value(self):
+        sim = MonteCarloSimulator(initial_bankroll=1000, n_paths=20000, seed=1)
+        result = sim.simulate(0.55, 2.0, policy="flat", n_bets=100, flat_stake=10)
+
+        # EV per bet = 10 * (0.55 * 2.0 - 1) = 1.0
+        assert result["final_bankroll"]["mean"] == pytest.approx(1100, rel=0.01)
+        assert result["percentile_bands"].shape == (5, 101)
+        assert result["risk_of_ruin"] == 0.0
+
+    def test_kelly_policy_uses_bankroll_manager(self):
+        bm = BankrollManager(1000, max_single_bet_percent=2.0)
+        sim = MonteCarloSimulator(initial_bankroll=1000, n_paths=500, seed=2)
+        result = sim.simulate([0.65, 0.40], [1.80, 2.0], policy="kelly", bankroll_manager=bm, keep_paths=True)
+
+        # First bet capped at 2% of bankroll, second has no edge and is skipped
+        first_step = np.abs(result["paths"][:, 1] - 1000)
+        assert first_step.max() <= 20 + 1e-9
+        np.testing.assert_array_equal(result["paths"][:, 2], result["paths"][:, 1])
+
+    def test_aggressive_staking_ruins_paths(self):
+        sim = MonteCarloSimulator(initial_bankroll=100, n_paths=2000, ruin_threshold=1.0, seed=3)
+        result = sim.simulate(0.45, 2.0, policy="fractional", fraction=0.5, n_bets=200)
+
+        assert result["risk_of_ruin"] > 0.9
+        assert result["max_drawdown"]["mean"] > 0.9
+        assert result["max_drawdown_distribution"].shape == (2000,)
+
+class TestKellyPortfolioAllocator:
+    def test_single_bet_matches_kelly_formula(self):
+        bm = BankrollManager(1000, max_single_bet_percent=100.0, max_daily_loss_percent=100.0)
+        result = KellyPortfolioAllocator(bm, kelly_fraction=1.0).allocate(
+            [{"event": "A", "probability": 0.6, "odds": 2.0}]
+        )
+
+        assert result["method"] == "closed_form"
+        assert result["allocations"]["bet_0"]["stake"] == pytest.approx(1000 * 0.2)
+
+    def test_large_slate_respects_bankroll_limits(self):
+        bm = BankrollManager(1000, max_single_bet_percent=2.0, max_daily_loss_percent=5.0)
+        bets = [{"event": f"E{i}", "probability": 0.65, "odds": 1.80} for i in range(40)]
+
+        for method in ("closed_form", "solver"):
+            result = KellyPortfolioAllocator(bm, seed=0).allocate(bets, method=method)
+            stakes = [a["stake"] for a in result["allocations"].values()]
+            assert max(stakes) <= 20 + 1e-6
+            assert result["total_allocated"] <= 50 + 1e-6
+
+    def test_closed_form_skips_scenarios_for_large_slates(self, monkeypatch):
+        bm = BankrollManager(1000, max_single_bet_percent=2.0, max_daily_loss_percent=5.0)
+        allocator = KellyPortfolioAllocator(bm)
+        bets = [{"event": f"E{i}", "probability": 0.65, "odds": 1.80} for i in range(300)]
+
+        def no_scenarios(*args):
+            raise AssertionError("closed form built a scenario matrix")
+
+        monkeypatch.setattr(allocator, "_scenarios", no_scenarios)
+        result = allocator.allocate(bets)
+
+        assert result["method"] == "closed_form"
+        assert result["expected_log_growth"] is None
+        assert result["total_allocated"] == pytest.approx(50)
+
+    def test_mutually_exclusive_outcomes_solver_matches_closed_form(self):
+        bm = BankrollManager(1000, max_single_bet_percent=100.0, max_daily_loss_percent=100.0)
+        allocator = KellyPortfolioAllocator(bm, kelly_fraction=1.0)
+        bets = [
+            {"event": "Match", "probability": 0.45, "odds": 2.5},
+            {"event": "Match", "probability": 0.30, "odds": 3.6},
+            {"event": "Match", "probability": 0.15, "odds": 4.0},
+        ]
+
+        closed = allocator.allocate(bets, method="closed_form")
+        solved = allocator.allocate(bets, method="solver")
+
+        for key in closed["allocations"]:
+            assert solved["allocations"][key]["stake"] == pytest.approx(
+                closed["allocations"][key]["stake"], abs=1.0
+            )
+        assert solved["expected_log_growth"] == pytest.approx(closed["expected_log_growth"], abs=1e-6)
+
+    def test_probabilities_over_one_rejected(self):
+        bm = BankrollManager(1000)
+        bets = [{"event": "X", "probability": 0.7, "odds": 2.0}, {"event": "X", "probability": 0.5, "odds": 2.5}]
+        with pytest.raises(ValueError):
+            KellyPortfolioAllocator(bm).allocate(bets)
+
 class TestResponsibleGaming:
     def test_loss_streak_detection(self):
         rg = ResponsibleGaming(pause_after_losses=3)
@@ -111,6 +642,145 @@ class TestBetExecutor:
         invalid_bet["stake"] = 0.001
         assert not executor.validate_bet(invalid_bet)
 
+class TestBettingSystemOrchestrator:
+    @pytest.fixture
+    def system(self, tmp_path, monkeypatch):
+        from config import TestingConfig
+        from main import BettingSystemOrchestrator
+
+        monkeypatch.chdir(tmp_path)
+        system = BettingSystemOrchestrator(TestingConfig)
+
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(60, 13))
+        y = (X[:, 0] > 0).astype(int)
+        system.predictor.train(X, y)
+        return system
+
+    def test_process_events_fetches_board_once(self, system, monkeypatch):
+        board = [
+            {"event_id": f"evt_{i}", "home_team": f"Home {i % 2}", "away_team": f"Away {i}", "sport": "soccer"}
+            for i in range(5)
+        ]
+        calls = {"live": 0, "history": 0}
+
+        def fetch_live_events(sport="soccer"):
+            calls["live"] += 1
+            return board
+
+        def fetch_historical_data(team, limit=50):
+            calls["history"] += 1
+            return None
+
+        monkeypatch.setattr(system.data_fetcher, "fetch_live_events", fetch_live_events)
+        monkeypatch.setattr(system.data_fetcher, "fetch_historical_data", fetch_historical_data)
+
+        result = system.process_events(["evt_0", "evt_3", "evt_4", "missing"])
+
+        assert calls == {"live": 1, "history": 2}
+        assert set(result["stage_timings"]) == {
+            "fetch", "enrichment", "prediction", "odds_comparison", "value", "staking"
+        }
+        assert all(t >= 0 for t in result["stage_timings"].values())
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        code = ("import sys, main; "
+                "print(sorted(m for m in ('pandas', 'sklearn', 'sqlalchemy') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parents[1], check=True)
+        assert result.stdout.strip() == "[]"
+
+    def test_odds_are_keyed_by_fixture(self, system, monkeypatch):
+        board = [
+            {"event_id": "sr_1", "home_team": "FC Porto", "away_team": "SL Benfica", "provider": "sportradar"},
+        ]
+        monkeypatch.setattr(system.data_fetcher, "fetch_live_events", lambda sport="soccer": board)
+        monkeypatch.setattr(system.data_fetcher, "fetch_historical_data", lambda team, limit=50: None)
+
+        system.process_events()
+
+        fixture = system.entities.fixture_id("Porto", "Benfica", "betfair")
+        assert system.odds_key("sr_1") == fixture
+        assert system.odds_key("unknown") == "unknown"
+
+class _StubSystem:
+    def __init__(self, cycle_seconds=0.0):
+        self.cycle_seconds = cycle_seconds
+        self.warm_ups = 0
+        self.cycles = 0
+
+    def warm_up(self):
+        self.warm_ups += 1
+        return True
+
+    def odds_key(self, event_id):
+        return event_id
+
+    def process_events(self, sport="soccer"):
+        self.cycles += 1
+        time.sleep(self.cycle_seconds)
+        return {"decisions": [{}], "stage_timings": {"fetch": self.cycle_seconds}}
+
+
+class TestBotDaemon:
+    def test_reuses_warm_orchestrator(self):
+        from src.daemon import BotDaemon
+
+        system = _StubSystem()
+        daemon = BotDaemon(system, interval_seconds=0.02, sports=["soccer", "tennis"])
+        metrics = asyncio.run(daemon.run(max_cycles=3))
+
+        assert system.warm_ups == 1
+        assert system.cycles == 6
+        assert metrics["cycles"] == 3
+        assert metrics["last_cycle"]["decisions"] == 2
+        assert metrics["drift_seconds"]["max"] < 0.02
+
+    def test_overrunning_cycles_skip_ticks(self):
+        from src.daemon import BotDaemon
+
+        daemon = BotDaemon(_StubSystem(cycle_seconds=0.05), interval_seconds=0.02)
+        metrics = asyncio.run(daemon.run(max_cycles=2))
+
+        assert metrics["skipped_ticks"] >= 1
+        assert metrics["latency_seconds"]["max"] >= 0.05
+
+    def test_polls_due_odds_between_cycles(self):
+        from types import SimpleNamespace
+        from src.daemon import BotDaemon
+        from src.data_acquisition import AdaptivePollScheduler
+        from src.execution import ComparisonEngine, OddsCache
+
+        cache = OddsCache()
+        system = _StubSystem()
+        system.odds_cache = cache
+        system.comparison_engine = ComparisonEngine(odds_cache=cache)
+        system.data_fetcher = SimpleNamespace(
+            fetch_live_events=lambda sport="soccer": [{"event_id": "E1", "status": "live"}],
+            fetch_event_odds=lambda event_id: {"back_odds": [{"selection": "home_win", "price": 2.1}]},
+        )
+        poller = AdaptivePollScheduler(in_play_interval=0.01, min_interval=0.01)
+
+        daemon = BotDaemon(system, interval_seconds=0.1, poll_scheduler=poller)
+        metrics = asyncio.run(daemon.run(max_cycles=2))
+
+        assert metrics["odds_polls"] >= 2
+        assert cache.best("E1", "match_odds", "home_win") == (2.1, "betfair")
+
+    def test_stop_ends_loop(self):
+        from src.daemon import BotDaemon
+
+        daemon = BotDaemon(_StubSystem(), interval_seconds=60)
+
+        async def run_and_stop():
+            task = asyncio.create_task(daemon.run())
+            await asyncio.sleep(0.05)
+            daemon.stop()
+            return await asyncio.wait_for(task, timeout=1)
+
+        metrics = asyncio.run(run_and_stop())
+        assert metrics["cycles"] == 1
+
 # Run tests
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
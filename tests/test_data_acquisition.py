@@ -0,0 +1,654 @@
+"""
+Tests for Data Acquisition (async fetching against a local stub server)
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from requests.adapters import HTTPAdapter
+from src.data_acquisition import (SportsDataFetcher, AsyncSportsDataFetcher, AsyncRateLimiter, OddsTickStore,
+                                  FetchCache, LRUCache, AdaptivePollScheduler, TeamRatings, DataProcessor,
+                                  TeamFeatureStore, EntityIndex, normalize_name)
+from src.risk_management import ExposureManager
+import pandas as pd
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    delay = 0.2
+    # Requests being served right now, and the most seen at once
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            time.sleep(self.delay)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+        sport = self.path.strip("/").split("/")[0]
+        body = json.dumps({"events": [
+            {"id": f"{sport}_1", "home": {"name": f"{sport} A"}, "away": {"name": f"{sport} B"}},
+        ]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    _StubHandler.in_flight = _StubHandler.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+class TestAsyncSportsDataFetcher:
+    def test_fans_out_concurrently(self, stub_server):
+        fetcher = SportsDataFetcher("key", base_urls={"sportradar": stub_server})
+        async_fetcher = AsyncSportsDataFetcher(fetcher, max_concurrency=8)
+        sports = ["soccer", "tennis", "basketball", "hockey", "golf", "rugby"]
+
+        board = async_fetcher.run_board(sports)
+
+        # Requests overlapped instead of running one after another
+        assert _StubHandler.peak > 1
+        assert set(board["events"]) == set(sports)
+        assert board["events"]["tennis"][0]["event_id"] == "tennis_1"
+        assert board["events"]["tennis"][0]["provider"] == "sportradar"
+        assert set(board["odds"]) == {f"{s}_1" for s in sports}
+        assert "soccer A" in board["historical"]
+
+    def test_concurrency_limit_bounds_parallelism(self, stub_server):
+        fetcher = SportsDataFetcher("key", base_urls={"sportradar": stub_server})
+        async_fetcher = AsyncSportsDataFetcher(fetcher, max_concurrency=2)
+
+        events = asyncio.run(async_fetcher.fetch_all_live_events(["a", "b", "c", "d"]))
+
+        assert len(events) == 4
+        assert _StubHandler.peak == 2
+
+    def test_sizes_default_pools_only(self):
+        own, configured = SportsDataFetcher("key", provider="a"), SportsDataFetcher("key", provider="b")
+        retrying = HTTPAdapter(max_retries=3)
+        configured.session.mount("https://", retrying)
+
+        AsyncSportsDataFetcher({"a": own, "b": configured}, max_concurrency=16)
+
+        assert configured.session.adapters["https://"] is retrying
+        assert configured.session.adapters["http://"]._pool_maxsize == 16
+        assert own.session.adapters["https://"]._pool_maxsize == 16
+        assert own.session.adapters["https://"] is not configured.session.adapters["http://"]
+
+    def test_throttled_provider_does_not_hold_slots(self):
+        completed = []
+
+        class RecordingFetcher(SportsDataFetcher):
+            def fetch_live_events(self, sport="soccer"):
+                completed.append(self.provider)
+                return []
+
+        async_fetcher = AsyncSportsDataFetcher(
+            {"slow": RecordingFetcher("key", provider="slow"), "fast": RecordingFetcher("key", provider="fast")},
+            max_concurrency=1,
+        )
+        async_fetcher.limiters["slow"] = AsyncRateLimiter(rate=20, burst=1)
+
+        async def run():
+            await asyncio.gather(*(async_fetcher.fetch_live_events(s, "slow") for s in ("a", "b", "c")),
+                                 async_fetcher.fetch_live_events("d", "fast"))
+
+        asyncio.run(run())
+        # Only the first slow request has a token; the fast one must not queue behind the rest
+        assert completed.index("fast") <= 1
+
+    def test_rate_limiter_spaces_requests(self):
+        # Virtual clock: sleeping advances time instantly, so waits are exact
+        clock = {"now": 100.0}
+        slept = []
+
+        async def fake_sleep(seconds):
+            slept.append(seconds)
+            clock["now"] += seconds
+
+        # 16/s: waits of 1/16s are exact in binary, so no rounding leftovers
+        limiter = AsyncRateLimiter(rate=16, burst=1, clock=lambda: clock["now"], sleep=fake_sleep)
+
+        async def run():
+            for _ in range(5):
+                await limiter.acquire()
+
+        asyncio.run(run())
+        assert slept == [1 / 16] * 4
+        assert clock["now"] == 100.0 + 4 / 16
+
+
+class FakeRedis:
+    """Thread-safe in-memory stand-in for the redis.Redis methods the cache uses"""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def _expired(self, name):
+        entry = self.data.get(name)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[name]
+
+    def get(self, name):
+        with self.lock:
+            self._expired(name)
+            entry = self.data.get(name)
+            return entry[0] if entry else None
+
+    def set(self, name, value, ex=None, px=None, nx=False):
+        with self.lock:
+            self._expired(name)
+            if nx and name in self.data:
+                return None
+            if isinstance(value, str):
+                value = value.encode()
+            ttl = px / 1000 if px is not None else ex
+            self.data[name] = (value, time.monotonic() + ttl if ttl is not None else None)
+            return True
+
+    def pttl(self, name):
+        with self.lock:
+            self._expired(name)
+            entry = self.data.get(name)
+            if entry is None:
+                return -2
+            return -1 if entry[1] is None else int((entry[1] - time.monotonic()) * 1000)
+
+    def delete(self, name):
+        with self.lock:
+            return 1 if self.data.pop(name, None) is not None else 0
+
+
+class TestFetchCache:
+    def test_lru_evicts_and_expires(self):
+        now = [0.0]
+        lru = LRUCache(max_entries=2, clock=lambda: now[0])
+        lru.set("a", 1, ttl=10)
+        lru.set("b", 2, ttl=10)
+        lru.get("a")
+        lru.set("c", 3, ttl=10)
+
+        assert lru.get("b") == (False, None)
+        assert lru.get("a") == (True, 1)
+        now[0] = 11
+        assert lru.get("c") == (False, None)
+
+    def test_fetcher_reads_through_cache(self, stub_server):
+        fetcher = SportsDataFetcher("key", base_urls={"sportradar": stub_server}, cache=FetchCache())
+
+        first = fetcher.fetch_live_events("soccer")
+        second = fetcher.fetch_live_events("soccer")
+
+        assert first == second
+        assert fetcher.cache.stats["misses"] == 1
+        assert fetcher.cache.stats["local_hits"] == 1
+
+    def test_concurrent_misses_share_one_fetch(self):
+        cache = FetchCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"event_id": "E1"}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_fetch("odds", "odds:E1", loader)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == [{"event_id": "E1"}] * 8
+
+    def test_workers_share_redis_tier(self):
+        redis = FakeRedis()
+        workers = [FetchCache(redis_client=redis, poll_interval=0.01) for _ in range(4)]
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return ["event"]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda w=w: results.append(w.get_or_fetch("live_events", "live:soccer", loader)))
+            for w in workers
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == [["event"]] * 4
+        assert sum(w.stats["redis_hits"] for w in workers) == 3
+
+    def test_redis_hit_keeps_remaining_ttl_locally(self):
+        redis = FakeRedis()
+        FetchCache(redis_client=redis, ttls={"odds": 5}).get_or_fetch("odds", "k", lambda: {"price": 2.0})
+        redis.data["apuestas:fetch:k"] = (redis.data["apuestas:fetch:k"][0], time.monotonic() + 1)
+
+        now = [0.0]
+        worker = FetchCache(local=LRUCache(clock=lambda: now[0]), redis_client=redis, ttls={"odds": 5})
+        assert worker.get_or_fetch("odds", "k", lambda: {}) == {"price": 2.0}
+        assert worker.stats["redis_hits"] == 1
+        # The local copy expires with the Redis one, not a full 5s later
+        now[0] = 1.5
+        assert worker.local.get("k") == (False, None)
+
+    def test_empty_responses_and_ttls(self):
+        now = [0.0]
+        cache = FetchCache(local=LRUCache(clock=lambda: now[0]), ttls={"odds": 5})
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return {} if len(calls) == 1 else {"price": 2.0}
+
+        assert cache.get_or_fetch("odds", "k", loader) == {}
+        assert cache.get_or_fetch("odds", "k", loader) == {"price": 2.0}
+        assert cache.get_or_fetch("odds", "k", loader) == {"price": 2.0}
+        now[0] = 6
+        cache.get_or_fetch("odds", "k", loader)
+        assert len(calls) == 3
+
+
+class VirtualClock:
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestAdaptivePollScheduler:
+    def test_intervals_follow_kickoff_and_in_play_state(self):
+        clock = VirtualClock()
+        poller = AdaptivePollScheduler(clock=clock)
+        poller.track("live", status="live")
+        poller.track("soon", kickoff=clock.now + 600)
+        poller.track("later", kickoff=clock.now + 5 * 3600)
+        poller.track("next_week", kickoff=clock.now + 7 * 86400)
+        poller.track("done", status="closed")
+
+        intervals = [poller.interval_for(e) for e in ("live", "soon", "later", "next_week")]
+        assert intervals == sorted(intervals)
+        assert "done" not in poller.events
+
+    def test_kickoff_pulls_next_poll_forward(self):
+        clock = VirtualClock()
+        poller = AdaptivePollScheduler(clock=clock)
+        poller.track("E1", kickoff=clock.now + 3 * 3600)
+        assert poller.due() == ["E1"]
+        poller.mark_polled("E1")
+
+        clock.advance(60)
+        poller.track("E1", status="live")
+        clock.advance(poller.in_play_interval)
+        assert poller.due() == ["E1"]
+
+    def test_naive_kickoff_is_utc(self):
+        clock = VirtualClock()
+        poller = AdaptivePollScheduler(clock=clock)
+        kickoff = datetime.fromtimestamp(clock.now + 600, tz=timezone.utc)
+        poller.track("naive", kickoff=kickoff.replace(tzinfo=None))
+        poller.track("iso", kickoff=kickoff.replace(tzinfo=None).isoformat())
+        poller.track("aware", kickoff=kickoff)
+        assert poller.events["naive"]["kickoff"] == poller.events["iso"]["kickoff"] == clock.now + 600
+        assert poller.interval_for("naive") == poller.interval_for("aware")
+
+    def test_request_budget_is_respected_and_shared(self):
+        clock = VirtualClock()
+        poller = AdaptivePollScheduler(max_requests_per_minute=30, clock=clock)
+        for i in range(100):
+            poller.track(f"E{i}", status="live")
+
+        request_times = []
+        for _ in range(600):
+            for event_id in poller.due():
+                poller.mark_polled(event_id)
+                request_times.append(clock.now)
+            clock.advance(1)
+
+        for t in request_times:
+            in_window = sum(1 for r in request_times if t - 60 < r <= t)
+            assert in_window <= 30
+        assert all(state["polls"] >= 1 for state in poller.events.values())
+
+    def test_volatile_prices_poll_more_often(self):
+        clock = VirtualClock()
+        poller = AdaptivePollScheduler(clock=clock)
+        kickoff = clock.now + 3600
+        poller.track("calm", kickoff=kickoff)
+        poller.track("moving", kickoff=kickoff)
+
+        prices = {"calm": 2.0, "moving": 2.0}
+        for step in range(1800):
+            for event_id in poller.due():
+                if event_id == "moving":
+                    prices["moving"] *= 1.05 if step % 2 else 0.95
+                poller.mark_polled(event_id, {"home_win": prices[event_id]})
+            clock.advance(1)
+
+        assert poller.events["moving"]["polls"] > 2 * poller.events["calm"]["polls"]
+
+    def test_events_leaving_the_board_stop_polling(self):
+        clock = VirtualClock()
+        poller = AdaptivePollScheduler(clock=clock)
+        poller.sync_board([{"event_id": "S1", "status": "live"}, {"event_id": "S2", "status": "live"}],
+                          board="soccer")
+        poller.sync_board([{"event_id": "T1", "status": "live"}], board="tennis")
+        poller.track("manual", status="live")
+        poller.run_pending(lambda event_id: None)
+
+        # S1 finished and dropped off the live feed
+        clock.advance(60)
+        poller.sync_board([{"event_id": "S2", "status": "live"}], board="soccer")
+        assert set(poller.events) == {"S2", "T1", "manual"}
+
+        polled = []
+        for _ in range(120):
+            polled += poller.run_pending(lambda event_id: None)
+            clock.advance(1)
+        assert "S1" not in polled
+        assert {"S2", "T1", "manual"} <= set(polled)
+
+    def test_seconds_until_due(self):
+        clock = VirtualClock()
+        poller = AdaptivePollScheduler(clock=clock)
+        assert poller.seconds_until_due() is None
+
+        poller.track("E1", status="live")
+        assert poller.seconds_until_due() == 0
+        poller.run_pending(lambda event_id: {"home_win": 1.9})
+        assert poller.seconds_until_due() == pytest.approx(poller.in_play_interval)
+
+
+class TestOddsTickStore:
+    def test_time_range_queries_across_segments(self, tmp_path):
+        store = OddsTickStore(tmp_path / "ticks", segment_size=4)
+        for i in range(10):
+            store.append("evt_1", "match_odds", "home_win", ["betfair", "kambi"][i % 2], 1000 + i, 2.0 + i / 100)
+        store.append("evt_2", "match_odds", "draw", "pinnacle", 1003.5, 3.3)
+        store.flush()
+
+        assert len(store) == 11
+        assert len(store.segments) == 3
+
+        ticks = store.query(start=1002, end=1006)
+        assert ticks["ts"].tolist() == [1002_000_000, 1003_000_000, 1003_500_000, 1004_000_000, 1005_000_000]
+
+        kambi = store.query(bookmaker="kambi", event="evt_1")
+        assert ticks["price"].dtype == np.float64
+        assert kambi["price"].tolist() == pytest.approx([2.01, 2.03, 2.05, 2.07, 2.09])
+        assert store.query(bookmaker="unknown")["ts"].size == 0
+
+    def test_reopen_and_closing_prices(self, tmp_path):
+        store = OddsTickStore(tmp_path / "ticks")
+        store.append_market("evt_1", "match_odds", {"home": {"betfair": 2.0, "kambi": 2.1}, "away": {"betfair": 1.9}}, 100)
+        store.append_market("evt_1", "match_odds", {"home": {"betfair": 2.2}}, 200)
+        store.append_market("evt_1", "match_odds", {"home": {"kambi": 1.5}}, 300)
+        store.flush()
+
+        reopened = OddsTickStore(tmp_path / "ticks")
+        assert len(reopened) == 5
+        assert reopened.closing_prices("evt_1", "match_odds", before=250) == {
+            "home": {"betfair": 2.2, "kambi": 2.1},
+            "away": {"betfair": 1.9},
+        }
+
+        frame = reopened.to_frame(reopened.query(outcome="away"))
+        assert frame["bookmaker"].tolist() == ["betfair"]
+
+
+class TestTeamRatings:
+    def _history(self, n=600, n_teams=12, seed=0):
+        rng = np.random.default_rng(seed)
+        home = rng.integers(0, n_teams, size=n)
+        away = (home + rng.integers(1, n_teams, size=n)) % n_teams
+        return pd.DataFrame({
+            "date": pd.date_range("2023-01-01", periods=n, freq="12h"),
+            "home_team": [f"team_{i}" for i in home],
+            "away_team": [f"team_{i}" for i in away],
+            "home_score": rng.poisson(1.6, size=n),
+            "away_score": rng.poisson(1.1, size=n),
+        })
+
+    @pytest.mark.parametrize("method", ["elo", "glicko"])
+    def test_rebuild_matches_sequential_updates(self, method):
+        history = self._history()
+        sequential = TeamRatings(method, capacity=4)
+        for row in history.itertuples():
+            sequential.update(row.home_team, row.away_team, row.home_score, row.away_score, row.date)
+
+        rebuilt = TeamRatings.from_history(history.sample(frac=1, random_state=1), method=method)
+        for team in sequential.names:
+            assert rebuilt.team_summary(team) == pytest.approx(
+                {**sequential.team_summary(team), "team_id": rebuilt.entities.lookup(team)})
+
+    def test_update_moves_ratings_and_form(self):
+        ratings = TeamRatings(k_factor=20, home_advantage=0, form_window=2)
+        ratings.update("A", "B", 2, 0)
+        assert ratings.team_summary("A")["rating"] == pytest.approx(1510.0)
+        assert ratings.team_summary("B")["rating"] == pytest.approx(1490.0)
+
+        ratings.update("B", "A", 1, 1)
+        ratings.update("A", "C", 0, 3)
+        summary = ratings.team_summary("A")
+        assert summary["games"] == 3
+        assert summary["form"] == pytest.approx((0.5 + 0.0) / 2)
+        assert summary["goals_avg"] == pytest.approx((1 + 0) / 2)
+        assert ratings.expected_score("A", "B") > 0.5
+
+    def test_glicko_deviation_shrinks_with_games_and_grows_when_idle(self):
+        ratings = TeamRatings("glicko", rd_growth=10)
+        for day in range(1, 11):
+            ratings.update("A", "B", 1, 0, f"2024-01-{day:02d}")
+        settled = ratings.team_summary("A")["rating_deviation"]
+        assert settled < 350
+
+        ratings.update("A", "C", 1, 0, "2024-06-01")
+        assert ratings.team_summary("A")["rating_deviation"] > settled * 0.9
+
+    def test_save_and_load(self, tmp_path):
+        ratings = TeamRatings.from_history(self._history(n=50), method="glicko")
+        ratings.save(tmp_path / "ratings.npz")
+        loaded = TeamRatings.load(tmp_path / "ratings.npz", method="glicko")
+        assert loaded.names == ratings.names
+        assert loaded.match_features("team_1", "team_2") == ratings.match_features("team_1", "team_2")
+
+    def test_enrichment_uses_ratings(self):
+        history = self._history(n=100)
+        event = {"home_team": "team_1", "away_team": "team_2"}
+
+        enriched = DataProcessor().enrich_event_with_context(dict(event), history)
+        assert enriched["home_form"] is not None and enriched["away_form"] is not None
+        assert 0 < enriched["rating_expectancy"] < 1
+
+        unknown = DataProcessor(TeamRatings()).enrich_event_with_context(dict(event), pd.DataFrame())
+        assert unknown["home_form"] is None and unknown["rating_expectancy"] > 0.5
+
+
+class TestTeamFeatureStore:
+    def _history(self):
+        return pd.DataFrame({
+            "date": pd.to_datetime(["2024-01-01", "2024-01-08", "2024-01-15", "2024-01-22"]),
+            "home_team": ["A", "B", "A", "C"],
+            "away_team": ["B", "A", "C", "A"],
+            "home_score": [2, 0, 1, 3],
+            "away_score": [1, 0, 1, 2],
+            "shots_home": [6.0, 3.0, np.nan, 7.0],
+            "shots_away": [4.0, 5.0, 2.0, 9.0],
+        })
+
+    def test_point_in_time_lookups_exclude_later_results(self):
+        store = TeamFeatureStore(window=2, stats=("goals", "shots"))
+        store.ingest_history(self._history())
+
+        result = store.as_of(["A", "A", "A", "C", "Z"],
+                             ["2024-01-01", "2024-01-08", "2024-01-20", "2024-01-22", "2024-02-01"])
+        np.testing.assert_array_equal(result["matches"], [0, 1, 3, 1, 0])
+        assert np.isnan(result["goals_avg"][0]) and np.isnan(result["goals_avg"][4])
+        assert result["goals_avg"][1] == 2.0
+        # Last two of A's matches before Jan 20: 0 (Jan 8) and 1 (Jan 15); shots 5 and missing
+        assert result["goals_avg"][2] == pytest.approx(0.5)
+        assert result["shots_avg"][2] == pytest.approx(5.0)
+        assert result["goals_avg"][3] == pytest.approx(1.0)
+
+    def test_ewm_and_incremental_ingest_match_bulk(self):
+        history = self._history()
+        bulk = TeamFeatureStore(window=3, halflife=1.0)
+        bulk.ingest_history(history)
+        incremental = TeamFeatureStore(window=3, halflife=1.0, capacity=1)
+        for match in history.to_dict("records"):
+            incremental.ingest(match)
+
+        current = incremental.current(["A", "B", "C"])
+        latest = bulk.as_of(["A", "B", "C"], ["2030-01-01"] * 3)
+        for column in current:
+            np.testing.assert_allclose(current[column], latest[column])
+        # A scored 2, 0, 1, 2: EWM with alpha 0.5 seeded by the first value
+        assert current["goals_ewm"][0] == pytest.approx(((2 * 0.5 + 0) * 0.5 + 0.5) * 0.5 + 1.0)
+        assert current["matches"][0] == 4
+
+    def test_rejects_out_of_order_results(self):
+        store = TeamFeatureStore()
+        store.ingest({"date": "2024-02-01", "home_team": "A", "away_team": "B", "home_score": 1, "away_score": 0})
+        with pytest.raises(ValueError, match="chronological"):
+            store.ingest({"date": "2024-01-01", "home_team": "C", "away_team": "A",
+                          "home_score": 1, "away_score": 0})
+
+    def test_enrichment_fills_rolling_statistics(self):
+        event = {"home_team": "A", "away_team": "C", "timestamp": "2024-01-16"}
+        enriched = DataProcessor().enrich_event_with_context(event, self._history())
+        assert enriched["home_shots_avg"] == pytest.approx((6 + 5) / 2)
+        assert enriched["away_shots_avg"] == pytest.approx(2.0)
+        assert enriched["recent_goals_home"] == pytest.approx(1.0)
+
+
+class TestEntityIndex:
+    def test_normalization_and_aliases(self):
+        assert normalize_name("FC Barcelona") == normalize_name("Barcelona") == "barcelona"
+        assert normalize_name("Atlético  Madrid") == "atletico madrid"
+        assert normalize_name("Brighton & Hove Albion") == "brighton and hove albion"
+
+        index = EntityIndex({"Man Utd": "Manchester United"})
+        assert index.resolve("Barcelona") == index.resolve("FC Barcelona", "betfair")
+        assert index.resolve("Man Utd", "betfair") == index.resolve("Manchester United FC")
+        assert index.name(index.resolve("Man Utd")) == "Manchester United"
+        assert len(index) == 2
+        assert index.lookup("Real Madrid") == -1 and len(index) == 2
+        assert index.resolve_many(["Barcelona", "Man Utd"]).tolist() == [0, 1]
+
+    def test_fuzzy_matching_is_cross_provider_only(self):
+        index = EntityIndex()
+        wolves = index.resolve("Wolverhampton Wanderers", "sportradar")
+        assert index.resolve("Wolverhampton Wanderer", "sportradar") != wolves
+        assert index.resolve("Wolverhampton Wanderers.", "betfair") == wolves
+        assert index.resolve("Wolverhampton Wandrers", "pinnacle") == wolves
+        assert [m["name"] for m in index.fuzzy_matches] == ["Wolverhampton Wandrers"]
+        # Fuzzy resolutions are visible to provider-less lookups (ratings, features)
+        assert index.lookup("Wolverhampton Wandrers") == wolves
+        assert index.lookup("Wolverhampton Wandrers", "sportradar") == -1
+        assert index.lookup(wolves) == wolves and index.lookup(len(index)) == -1
+
+        # Numbers must agree (reserve and age-group sides)
+        assert index.resolve("Team 1", "sportradar") != index.resolve("Team 2", "betfair")
+
+        assert (index.fixture_id("FC Porto", "Benfica", "sportradar")
+                == index.fixture_id("Porto", "SL Benfica.", "betfair")
+                != index.fixture_id("Benfica", "Porto", "betfair"))
+
+    def test_fuzzy_matching_stays_within_scope_and_fixture(self):
+        index = EntityIndex()
+        # Near-identical names from different leagues stay separate
+        lisbon = index.resolve("Sporting CP", "sportradar", "Primeira Liga")
+        assert index.resolve("Sporting KC", "betfair", "MLS") != lisbon
+        assert index.resolve("Sporting CP.", "betfair", "Primeira Liga") == lisbon
+
+        # Within one sport, a fuzzy team match needs the fixture to confirm it
+        index = EntityIndex()
+        lisbon_derby = index.fixture_id("Sporting CP", "Benfica", "sportradar", "soccer")
+        assert index.fixture_id("Sporting KC", "LA Galaxy", "betfair", "soccer") != lisbon_derby
+        assert index.lookup("Sporting KC") != index.lookup("Sporting CP")
+        assert index.fixture_id("Sportin CP", "Benfica", "pinnacle", "soccer") == lisbon_derby
+        assert [m["name"] for m in index.fuzzy_matches] == ["Sportin CP"]
+
+    def test_round_trip(self):
+        index = EntityIndex({"Spurs": "Tottenham Hotspur"})
+        index.resolve_many(["Arsenal", "Spurs", "Chelsea FC"])
+        loaded = EntityIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+        assert loaded.names == index.names
+        assert [loaded.lookup(n) for n in ("Chelsea", "Tottenham Hotspur", "Spurs")] == [2, 1, 1]
+
+    def test_shared_index_joins_ratings_features_and_exposure(self, tmp_path):
+        index = EntityIndex()
+        ratings = TeamRatings(entities=index)
+        store = TeamFeatureStore(entities=index)
+        ratings.update("FC Barcelona", "Real Madrid CF", 2, 0)
+        store.ingest({"home_team": "FC Barcelona", "away_team": "Real Madrid CF",
+                      "home_score": 2, "away_score": 0, "date": "2024-01-01"})
+
+        assert ratings.team_summary("Barcelona")["games"] == 1
+        assert store.match_features(["Barcelona"], ["Real Madrid"])["recent_goals_home"] == [2.0]
+        assert ratings.team_summary("Sevilla") is None
+
+        # Teams interned elsewhere still read as unseen here
+        index.resolve("Sevilla")
+        assert ratings.team_summary("Sevilla") is None
+        assert store.current(["Sevilla"])["matches"].tolist() == [0]
+
+        ratings.save(tmp_path / "ratings.npz")
+        other = EntityIndex()
+        other.resolve("Valencia")
+        loaded = TeamRatings.load(tmp_path / "ratings.npz", entities=other)
+        assert loaded.team_summary("Barcelona")["rating"] == ratings.team_summary("Barcelona")["rating"]
+        assert loaded.team_summary("Barcelona")["team_id"] == other.lookup("Barcelona") == 1
+
+        exposure = ExposureManager(entities=index)
+        exposure.add_exposure("soccer", "FC Barcelona", 10.0)
+        exposure.add_exposure("soccer", "Barcelona", 5.0)
+        assert exposure.current_exposure["soccer"] == {index.lookup("Barcelona"): 15.0}
+
+        processor = DataProcessor(ratings=ratings, feature_store=store, entities=index)
+        raw = {"home_team": "Barcelona", "away_team": "Real Madrid", "provider": "betfair"}
+        assert "home_team_id" not in DataProcessor.normalize_event_data(raw)
+        event = processor.resolve_event(raw)
+        assert (event["home_team_id"], event["away_team_id"]) == (0, 1)
+
+        # Enrichment looks teams up by id, so the display name no longer matters
+        event["home_team"] = "Barca"
+        processor.enrich_event_with_context(event, pd.DataFrame())
+        assert event["home_rating"] == ratings.team_summary(0)["rating"] > ratings.initial_rating
+        assert event["recent_goals_home"] == 2.0
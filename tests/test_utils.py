@@ -0,0 +1,164 @@
+"""
+Tests for utilities (persistence layer)
+"""
+import threading
+from datetime import datetime
+
+import pytest
+
+from src.utils import DatabaseManager, AuditLogger, setup_logging, iter_audit_records
+
+
+class TestDatabaseManager:
+    @pytest.fixture
+    def db(self):
+        db = DatabaseManager("sqlite:///:memory:")
+        assert db.connect()
+        yield db
+        db.close()
+
+    def test_writes_are_buffered_until_flush(self, db):
+        db.save_event({"event_id": "evt_1", "sport": "soccer", "home_team": "A", "away_team": "B"})
+        db.save_prediction({"event_id": "evt_1", "sport": "soccer", "home_win": 0.6, "confidence": 0.6})
+
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM events").scalar() == 0
+
+        assert db.flush()
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM events").scalar() == 1
+            assert conn.exec_driver_sql("SELECT home_win FROM predictions").scalar() == 0.6
+
+    def test_historical_accuracy_from_settled_bets(self, db):
+        results = [("won", 8.0), ("lost", -10.0), ("won", 12.0), ("voided", 0.0)]
+        for i, (status, profit) in enumerate(results):
+            db.save_bet({"bet_id": f"b{i}", "event_id": f"e{i}", "sport": "soccer", "odds": 2.0, "stake": 10.0})
+            db.settle_bet(f"b{i}", status, profit)
+        db.save_bet({"bet_id": "t1", "event_id": "e9", "sport": "tennis", "odds": 1.5, "stake": 10.0})
+        db.flush()
+
+        stats = db.get_historical_accuracy("soccer")
+        assert stats["total_bets"] == 3
+        assert stats["win_rate"] == pytest.approx(2 / 3)
+        assert stats["roi"] == pytest.approx(10.0 / 30.0)
+        assert db.get_historical_accuracy("tennis")["total_bets"] == 0
+
+    def test_flush_without_connection_keeps_buffer(self):
+        db = DatabaseManager("sqlite:///:memory:")
+        db.save_event({"event_id": "evt_1"})
+        assert not db.flush()
+        assert db.connect() and db.flush()
+
+    def test_outage_bounds_buffer_and_retries(self, monkeypatch):
+        db = DatabaseManager("sqlite:///:memory:", autoflush_rows=10, max_pending_rows=25)
+        attempts = []
+        real_flush = db.flush
+
+        def counting_flush():
+            attempts.append(len(db._order))
+            return real_flush()
+
+        monkeypatch.setattr(db, "flush", counting_flush)
+        for i in range(100):
+            db.save_event({"event_id": f"evt_{i}"})
+
+        # One failed early flush, then saves only buffer until the next cycle's flush
+        assert attempts == [10]
+        assert db.dropped_rows == 75
+
+        assert db.connect() and db.flush()
+        with db.engine.connect() as conn:
+            ids = [r[0] for r in conn.exec_driver_sql("SELECT event_id FROM events ORDER BY id")]
+        assert ids == [f"evt_{i}" for i in range(75, 100)]
+        db.close()
+
+
+def test_setup_logging_is_idempotent(tmp_path):
+    logger = setup_logging("INFO", log_dir=str(tmp_path))
+    handlers = list(logger.handlers)
+
+    assert setup_logging("DEBUG", log_dir=str(tmp_path)) is logger
+    assert logger.handlers == handlers
+    assert all(h.level == 10 for h in handlers if getattr(h, "_sports_betting_handler", False))
+    setup_logging("INFO", log_dir=str(tmp_path))
+
+
+class TestAuditLogger:
+    def test_queued_records_replay_in_order(self, tmp_path):
+        audit = AuditLogger(log_dir=str(tmp_path), batch_size=16, flush_interval=0.05)
+        for i in range(100):
+            audit.log_decision({"event_id": f"evt_{i}", "stake": i, "action": "place_bet"})
+        audit.log_error("event_processing", {"event_id": "evt_x"})
+        audit.close()
+
+        decisions = list(iter_audit_records(str(tmp_path), record_type="decision"))
+        assert [r["event_id"] for r in decisions] == [f"evt_{i}" for i in range(100)]
+        assert [r["error_type"] for r in iter_audit_records(str(tmp_path), record_type="error")] == [
+            "event_processing"
+        ]
+        # Compact NDJSON: one record per line
+        lines = "".join(p.read_text() for p in tmp_path.glob("audit-*.ndjson")).splitlines()
+        assert len(lines) == 101 and all(": " not in line for line in lines)
+
+    def test_hot_path_does_not_wait_on_disk(self, tmp_path, monkeypatch):
+        audit = AuditLogger(log_dir=str(tmp_path), max_queue=10)
+        disk = threading.Event()
+        monkeypatch.setattr(audit, "_write_batch", lambda batch: disk.wait(5))
+
+        # The writer is stuck on disk: the first 10 records stay pending, the rest are dropped
+        for i in range(50):
+            audit.log_decision({"event_id": f"evt_{i}"})
+        assert audit._pending == 10
+        assert audit.dropped == 40
+
+        disk.set()
+        assert audit.flush()
+        audit.close()
+
+    def test_loggers_sharing_a_directory_get_distinct_files(self, tmp_path, monkeypatch):
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(2025, 1, 1, 12, 0, 0)
+
+        monkeypatch.setattr("src.utils.datetime", FrozenDatetime)
+        first = AuditLogger(log_dir=str(tmp_path), queued=False)
+        second = AuditLogger(log_dir=str(tmp_path), queued=False)
+        first.log_decision({"event_id": "evt_1"})
+        second.log_decision({"event_id": "evt_2"})
+        first.close()
+        second.close()
+
+        assert len(list(tmp_path.glob("audit-*.ndjson"))) == 2
+        assert [r["event_id"] for r in iter_audit_records(str(tmp_path))] == ["evt_1", "evt_2"]
+
+    def test_records_are_captured_when_logged(self, tmp_path):
+        audit = AuditLogger(log_dir=str(tmp_path / "a"), flush_interval=0.05)
+        other = AuditLogger(log_dir=str(tmp_path / "b"), flush_interval=0.05)
+        prediction = {"home_win": 0.6}
+        audit.log_decision({"event_id": "evt_1", "prediction": prediction})
+        prediction["home_win"] = 0.1
+        other.log_error("event_processing", {"event_id": "evt_2"})
+        audit.close()
+        other.close()
+
+        assert [r["model_prediction"] for r in iter_audit_records(str(tmp_path / "a"))] == [{"home_win": 0.6}]
+        assert len(list(iter_audit_records(str(tmp_path / "b")))) == 1
+        assert [t.name for t in threading.enumerate()].count("audit-writer") == 1
+
+    def test_size_rotation(self, tmp_path):
+        audit = AuditLogger(log_dir=str(tmp_path), queued=False, max_bytes=2000)
+        for i in range(50):
+            audit.log_decision({"event_id": f"evt_{i}", "reason": "x" * 50})
+        audit.close()
+
+        assert len(list(tmp_path.glob("audit-*.ndjson"))) > 1
+        assert len(list(iter_audit_records(str(tmp_path)))) == 50
+
+    def test_flush_waits_for_writer(self, tmp_path):
+        audit = AuditLogger(log_dir=str(tmp_path), flush_interval=0.05)
+        audit.log_decision({"event_id": "evt_1"})
+        assert audit.flush()
+        assert [r["event_id"] for r in iter_audit_records(str(tmp_path))] == ["evt_1"]
+        audit.close()
+